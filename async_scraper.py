@@ -0,0 +1,301 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+
+from character_name_utils import CharacterNormalizer
+from darkly_speaking_dexter_v3 import DexterScraper
+from parse_cache import ParseCache, page_hash
+from log_utils import setup_logging
+from raw_page_archive import RawPageArchive
+
+FORUM_URL = "https://transcripts.foreverdreaming.org/viewforum.php?f={forum_id}"
+
+_DONE = object()
+
+
+class RateLimiter:
+    """Token bucket shared by every fetch in an event loop.
+
+    ``rate`` is the sustained number of requests per second across all
+    forums; ``burst`` lets a few requests through back to back after idling.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncDexterScraper:
+    """Asyncio scraper pipeline that reuses DexterScraper's parsing logic.
+
+    Each forum runs as four stages connected by bounded queues, so a slow
+    stage applies backpressure to the ones before it:
+
+        index discovery -> fetch workers -> parse workers (executor) -> ordered writer
+
+    Several forums can be scraped concurrently in one event loop and share the
+    HTTP session and parse executor. Cancelling a run flushes every episode
+    that was already parsed into ``episodes_by_forum``.
+    """
+
+    def __init__(self,
+                 base_urls: Sequence[str] = (FORUM_URL.format(forum_id=187),),
+                 fetch_concurrency: int = 4,
+                 parse_workers: int = 2,
+                 queue_size: int = 16,
+                 delay: float = 2.5,
+                 timeout: float = 30,
+                 retries: int = 3,
+                 archive: Optional[RawPageArchive] = None,
+                 parse_cache: Optional[ParseCache] = None,
+                 executor: Optional[Executor] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 name_mappings: Optional[Dict[str, Dict[str, str]]] = None):
+        self.base_urls = list(base_urls)
+        self.fetch_concurrency = fetch_concurrency
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.delay = delay
+        self.timeout = timeout
+        self.retries = retries
+        self.archive = archive
+        self.parse_cache = parse_cache
+        self.executor = executor
+        # Archive writes run on a thread of their own, one at a time (see run)
+        self._archive_executor: Optional[Executor] = None
+        self.rate_limiter = rate_limiter
+        # Per-forum normalizer tables, keyed by base url; Dexter's by default
+        self.name_mappings = name_mappings or {}
+        self.episodes_by_forum: Dict[str, List[Dict]] = {url: [] for url in self.base_urls}
+        self.progress: Dict[str, Dict[str, int]] = {
+            url: {'discovered': 0, 'fetched': 0, 'parsed': 0, 'failed': 0} for url in self.base_urls
+        }
+        self.logger = logging.getLogger(__name__)
+        self._parsers = threading.local()
+
+    @classmethod
+    def for_forums(cls, forum_ids: Sequence[int], **kwargs) -> 'AsyncDexterScraper':
+        """Build a scraper for several forums (other shows' ``f=`` ids)."""
+        return cls(base_urls=[FORUM_URL.format(forum_id=f) for f in forum_ids], **kwargs)
+
+    def _parser(self, base_url: str) -> DexterScraper:
+        """Return this worker thread's DexterScraper; parsing keeps per-episode state."""
+        parsers = getattr(self._parsers, 'by_url', None)
+        if parsers is None:
+            parsers = self._parsers.by_url = {}
+        if base_url not in parsers:
+            mappings = self.name_mappings.get(base_url)
+            normalizer = CharacterNormalizer(mappings) if mappings is not None else None
+            parsers[base_url] = DexterScraper(base_url, parse_cache=self.parse_cache,
+                                              name_normalizer=normalizer)
+        return parsers[base_url]
+
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[bytes]:
+        """Fetch a page with retries on server errors, archiving it if configured."""
+        for attempt in range(self.retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                async with session.get(url) as response:
+                    if response.status in (500, 502, 503, 504) and attempt < self.retries:
+                        raise aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=response.status
+                        )
+                    response.raise_for_status()
+                    body = await response.read()
+                    headers, charset = dict(response.headers), response.charset
+                if self.archive is not None:
+                    # Compressing and writing the page would stall every other fetch on the loop
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._archive_executor, self.archive.store, url, body, headers, charset
+                    )
+                return body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    self.logger.error("Failed to fetch %s: %s", url, e)
+                    return None
+                await asyncio.sleep(2 ** attempt)
+        return None
+
+    async def _run_in_executor(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def _discover(self, session: aiohttp.ClientSession, base_url: str,
+                        fetch_queue: asyncio.Queue) -> None:
+        body = await self._fetch(session, base_url)
+        links = []
+        if body is not None:
+            links = await self.parse_links(base_url, body)
+        self.logger.info("Queueing %d episodes from %s", len(links), base_url)
+        self.progress[base_url]['discovered'] = len(links)
+        for idx, link in enumerate(links):
+            await fetch_queue.put((idx, link))
+        for _ in range(self.fetch_concurrency):
+            await fetch_queue.put(_DONE)
+
+    async def _fetch_worker(self, session: aiohttp.ClientSession, base_url: str,
+                            fetch_queue: asyncio.Queue, parse_queue: asyncio.Queue,
+                            results: asyncio.Queue) -> None:
+        progress = self.progress[base_url]
+        while True:
+            job = await fetch_queue.get()
+            if job is _DONE:
+                return
+            idx, url = job
+            body = await self._fetch(session, url)
+            if body is None:
+                progress['failed'] += 1
+                await results.put((idx, None))
+            else:
+                progress['fetched'] += 1
+                await parse_queue.put((idx, url, body))
+            # A shared rate limiter already paces requests across forums
+            if self.rate_limiter is None:
+                await asyncio.sleep(self.delay + random.random() * 0.5)
+
+    async def _parse_worker(self, base_url: str, parse_queue: asyncio.Queue,
+                            results: asyncio.Queue) -> None:
+        while True:
+            job = await parse_queue.get()
+            if job is _DONE:
+                return
+            idx, url, body = job
+            episode = await self.parse_page(base_url, url, body)
+            self.progress[base_url]['parsed' if episode else 'failed'] += 1
+            await results.put((idx, episode))
+
+    async def parse_links(self, base_url: str, body: bytes) -> List[str]:
+        """Extract episode links from a fetched forum page off the event loop."""
+        return await self._run_in_executor(
+            lambda: self._parser(base_url).parse_episode_links(body)
+        )
+
+    async def parse_page(self, base_url: str, url: str, body: bytes) -> Optional[Dict]:
+        """Parse a fetched page off the event loop."""
+        return await self._run_in_executor(
+            lambda: self._parser(base_url).parse_episode_html(body, url, page_hash(body))
+        )
+
+    async def _writer(self, base_url: str, results: asyncio.Queue) -> None:
+        """Append parsed episodes in forum listing order."""
+        episodes = self.episodes_by_forum.setdefault(base_url, [])
+        pending: Dict[int, Optional[Dict]] = {}
+        next_idx = 0
+        try:
+            while True:
+                item = await results.get()
+                if item is _DONE:
+                    break
+                idx, episode = item
+                pending[idx] = episode
+                while next_idx in pending:
+                    ready = pending.pop(next_idx)
+                    if ready:
+                        episodes.append(ready)
+                        self.logger.info("Scraped episode: %s (%d lines)",
+                                         ready['title'], len(ready['dialogue']))
+                    next_idx += 1
+        finally:
+            # On shutdown or cancellation keep whatever was already parsed
+            for idx in sorted(pending):
+                if pending[idx]:
+                    episodes.append(pending[idx])
+
+    async def scrape_forum(self, session: aiohttp.ClientSession, base_url: str) -> List[Dict]:
+        """Run the full pipeline for one forum."""
+        fetch_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        parse_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: asyncio.Queue = asyncio.Queue()
+
+        writer = asyncio.create_task(self._writer(base_url, results))
+        producers = [asyncio.create_task(self._discover(session, base_url, fetch_queue))]
+        fetchers = [
+            asyncio.create_task(self._fetch_worker(session, base_url, fetch_queue, parse_queue, results))
+            for _ in range(self.fetch_concurrency)
+        ]
+        parsers = [
+            asyncio.create_task(self._parse_worker(base_url, parse_queue, results))
+            for _ in range(self.parse_workers)
+        ]
+        stages = producers + fetchers + parsers
+        try:
+            await asyncio.gather(*producers, *fetchers)
+            for _ in parsers:
+                await parse_queue.put(_DONE)
+            await asyncio.gather(*parsers)
+            await results.put(_DONE)
+            await writer
+        except BaseException:
+            for task in stages:
+                task.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            # Let the writer drain results that were parsed before shutdown
+            results.put_nowait(_DONE)
+            await asyncio.gather(writer, return_exceptions=True)
+            raise
+        return self.episodes_by_forum[base_url]
+
+    async def run(self) -> Dict[str, List[Dict]]:
+        """Scrape every configured forum concurrently."""
+        owns_executor = self.executor is None
+        if owns_executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.parse_workers)
+        if self.archive is not None:
+            # RawPageArchive is not thread-safe, so its writes are serialized on one thread
+            self._archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive')
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                await asyncio.gather(*(self.scrape_forum(session, url) for url in self.base_urls))
+        except asyncio.CancelledError:
+            self.logger.warning("Scrape cancelled; keeping episodes parsed so far")
+            raise
+        finally:
+            if owns_executor:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+            if self._archive_executor is not None:
+                self._archive_executor.shutdown(wait=True)
+                self._archive_executor = None
+        return self.episodes_by_forum
+
+    def to_scraper(self, base_url: str) -> DexterScraper:
+        """Wrap one forum's results in a DexterScraper so its savers can be reused."""
+        scraper = DexterScraper(base_url)
+        scraper.episodes_data = self.episodes_by_forum.get(base_url, [])
+        return scraper
+
+
+def main():
+    setup_logging()
+    scraper = AsyncDexterScraper(archive=RawPageArchive('raw_pages'))
+    try:
+        asyncio.run(scraper.run())
+    except KeyboardInterrupt:
+        pass
+    scraper.to_scraper(scraper.base_urls[0]).save_to_json()
+
+
+if __name__ == "__main__":
+    main()
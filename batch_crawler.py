@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from async_scraper import FORUM_URL, AsyncDexterScraper, RateLimiter
+from character_name_utils import CharacterNormalizer
+from darkly_speaking_dexter_v3 import DexterScraper
+from parse_cache import ParseCache, page_hash
+from log_utils import setup_logging
+from raw_page_archive import RawPageArchive
+
+# Per-process state for the parse worker pool
+_worker_parsers: Dict[str, DexterScraper] = {}
+_worker_cache: Optional[ParseCache] = None
+
+
+def _init_worker(parse_cache_path: Optional[str]) -> None:
+    global _worker_cache
+    if parse_cache_path:
+        _worker_cache = ParseCache(parse_cache_path)
+
+
+def _worker_parser(base_url: str, name_mappings: Optional[Dict[str, str]]) -> DexterScraper:
+    if base_url not in _worker_parsers:
+        normalizer = CharacterNormalizer(name_mappings) if name_mappings is not None else None
+        _worker_parsers[base_url] = DexterScraper(base_url, parse_cache=_worker_cache,
+                                                  name_normalizer=normalizer)
+    return _worker_parsers[base_url]
+
+
+def _parse_links_in_worker(base_url: str, name_mappings: Optional[Dict[str, str]],
+                           body: bytes) -> List[str]:
+    return _worker_parser(base_url, name_mappings).parse_episode_links(body)
+
+
+def _parse_page_in_worker(base_url: str, name_mappings: Optional[Dict[str, str]],
+                          url: str, body: bytes) -> Optional[Dict]:
+    return _worker_parser(base_url, name_mappings).parse_episode_html(body, url, page_hash(body))
+
+
+def load_manifest(path: str) -> Dict:
+    """Load and check a batch crawl manifest.
+
+    Example::
+
+        {
+          "rate_limit": 1.0,
+          "fetch_concurrency": 8,
+          "parse_workers": 4,
+          "archive_dir": "raw_pages",
+          "parse_cache": "parse_cache.sqlite",
+          "shows": [
+            {"name": "Dexter", "forum_id": 187, "output": "out/dexter.json"},
+            {"name": "Castle", "forum_id": 84, "output": "out/castle.json",
+             "name_mappings": {"RICK": "CASTLE"}}
+          ]
+        }
+
+    A show's ``name_mappings`` may also be a path to a JSON file holding the
+    table. Shows without one use the default Dexter table.
+    """
+    manifest_path = Path(path)
+    with manifest_path.open('r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    shows = manifest.get('shows')
+    if not shows:
+        raise ValueError(f"Manifest {path} lists no shows")
+    for show in shows:
+        if 'forum_id' not in show:
+            raise ValueError(f"Manifest show entry is missing 'forum_id': {show}")
+        show.setdefault('name', f"forum-{show['forum_id']}")
+        show.setdefault('output', f"{show['name'].lower().replace(' ', '_')}_transcripts.json")
+        mappings = show.get('name_mappings')
+        if isinstance(mappings, str):
+            with (manifest_path.parent / mappings).open('r', encoding='utf-8') as f:
+                show['name_mappings'] = json.load(f)
+    return manifest
+
+
+class BatchCrawler(AsyncDexterScraper):
+    """Crawls every show in a manifest through one shared, rate-limited fetcher.
+
+    All topics of all shows share one aiohttp session, one global token bucket
+    and the raw page / parse caches, while parsing runs in a process pool. The
+    crawl is therefore bounded by the site's rate limit rather than by the sum
+    of sequential per-show runs.
+    """
+
+    def __init__(self, manifest: Dict):
+        self.shows = manifest['shows']
+        self.parse_cache_path = manifest.get('parse_cache')
+        self.report_interval = manifest.get('report_interval', 30)
+        forum_url = manifest.get('forum_url', FORUM_URL)
+        base_urls = [forum_url.format(forum_id=show['forum_id']) for show in self.shows]
+        archive_dir = manifest.get('archive_dir')
+        super().__init__(
+            base_urls=base_urls,
+            fetch_concurrency=manifest.get('fetch_concurrency', 8),
+            parse_workers=manifest.get('parse_workers', 4),
+            queue_size=manifest.get('queue_size', 32),
+            archive=RawPageArchive(archive_dir) if archive_dir else None,
+            rate_limiter=RateLimiter(manifest.get('rate_limit', 1.0), manifest.get('burst', 1)),
+            name_mappings={
+                url: show['name_mappings']
+                for url, show in zip(base_urls, self.shows)
+                if show.get('name_mappings') is not None
+            },
+        )
+        self.show_names = {url: show['name'] for url, show in zip(base_urls, self.shows)}
+
+    async def parse_links(self, base_url: str, body: bytes) -> List[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _parse_links_in_worker,
+                                          base_url, self.name_mappings.get(base_url), body)
+
+    async def parse_page(self, base_url: str, url: str, body: bytes) -> Optional[Dict]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _parse_page_in_worker,
+                                          base_url, self.name_mappings.get(base_url), url, body)
+
+    def report_progress(self) -> None:
+        for url, counts in self.progress.items():
+            self.logger.info("%s: %d/%d parsed, %d fetched, %d failed", self.show_names[url],
+                             counts['parsed'], counts['discovered'], counts['fetched'], counts['failed'])
+
+    async def _report_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report_progress()
+
+    async def crawl(self) -> Dict[str, List[Dict]]:
+        """Crawl all shows, then write each one to its own output file."""
+        with ProcessPoolExecutor(max_workers=self.parse_workers, initializer=_init_worker,
+                                 initargs=(self.parse_cache_path,)) as pool:
+            self.executor = pool
+            reporter = asyncio.create_task(self._report_periodically())
+            try:
+                await self.run()
+            finally:
+                reporter.cancel()
+                self.executor = None
+                self.report_progress()
+                self.save_outputs()
+        return self.episodes_by_forum
+
+    def save_outputs(self) -> None:
+        for url, show in zip(self.base_urls, self.shows):
+            if not self.episodes_by_forum.get(url):
+                self.logger.warning("No episodes scraped for %s", show['name'])
+                continue
+            try:
+                self.to_scraper(url).save_to_json(show['output'])
+            except Exception as e:
+                self.logger.error("Could not save %s: %s", show['name'], e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl several shows from a job manifest')
+    parser.add_argument('manifest', help='Path to the JSON job manifest')
+    args = parser.parse_args()
+
+    setup_logging()
+    crawler = BatchCrawler(load_manifest(args.manifest))
+    try:
+        asyncio.run(crawler.crawl())
+    except KeyboardInterrupt:
+        logging.getLogger(__name__).warning("Batch crawl interrupted")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _numpy():
+    """numpy, imported on first use so loading the normalizer stays cheap."""
+    try:
+        import numpy
+    except ImportError:  # normalize_many returns plain lists
+        return None
+    return numpy
+
+
+VOICEOVER_MARKERS = ('voiceover', 'v.o.', '(vo)')
 
 class CharacterNormalizer:
     """Handles normalization of character names and their variants."""
     
-    def __init__(self):
+    def __init__(self, name_mappings: Optional[Dict[str, str]] = None):
         self.name_mappings = {
             "DEX": "DEXTER",
             "DEXTER MORGAN": "DEXTER",
@@ -22,6 +34,9 @@ class CharacterNormalizer:
             "HARRISON": "HARRISON",
             "MOLLY": "MOLLY"
         }
+        # Other shows bring their own table in place of the Dexter defaults
+        if name_mappings is not None:
+            self.name_mappings = dict(name_mappings)
         self.case_insensitive_mappings = {k.upper(): v for k, v in self.name_mappings.items()}
     
     def normalize(self, name: str) -> str:
@@ -35,6 +50,107 @@ class CharacterNormalizer:
         return {
             'original_name': speaker,
             'normalized_name': normalized_name,
-            'type': 'voiceover' if any(vo in speaker.lower() 
-                    for vo in ['voiceover', 'v.o.', '(vo)']) else 'spoken'
-        }
\ No newline at end of file
+            'type': 'voiceover' if self.is_voiceover(speaker) else 'spoken'
+        }
+
+    def is_voiceover(self, speaker: str) -> bool:
+        lowered = speaker.lower()
+        return any(vo in lowered for vo in VOICEOVER_MARKERS)
+
+    def normalize_many(self, raw_speakers: Sequence[str]) -> Tuple[Sequence[int], List[str], Sequence[bool]]:
+        """Normalize a batch of raw speaker strings.
+
+        Each distinct raw string is resolved once and the results are
+        broadcast back through an inverse index, so the cost is one dict
+        lookup per line plus O(unique speakers) normalization. Returns
+        ``(ids, names, voiceover)``: ``names[ids[i]]`` is the normalized
+        name of ``raw_speakers[i]`` and ``voiceover[i]`` its voiceover flag.
+        ``ids`` and ``voiceover`` are numpy arrays when numpy is installed.
+        """
+        np = _numpy()
+        if np is not None and isinstance(raw_speakers, np.ndarray):
+            raw_speakers = raw_speakers.tolist()
+        unique_index: Dict[str, int] = {}
+        inverse = [unique_index.setdefault(raw, len(unique_index)) for raw in raw_speakers]
+
+        names: List[str] = []
+        name_ids: Dict[str, int] = {}
+        unique_ids = []
+        unique_voiceover = []
+        for raw in unique_index:
+            name = self.normalize(raw)
+            if name not in name_ids:
+                name_ids[name] = len(names)
+                names.append(name)
+            unique_ids.append(name_ids[name])
+            unique_voiceover.append(self.is_voiceover(raw))
+
+        if np is None:
+            return ([unique_ids[i] for i in inverse], names, [unique_voiceover[i] for i in inverse])
+        inverse_array = np.asarray(inverse, dtype=np.intp)
+        ids = np.asarray(unique_ids, dtype=np.int32)[inverse_array]
+        voiceover = np.asarray(unique_voiceover, dtype=bool)[inverse_array]
+        return ids, names, voiceover
+
+
+def speech_tags(dialogue: List[Dict]) -> List[Tuple[Optional[str], bool]]:
+    """Raw speaker tag behind each entry, and whether the entry continues an earlier speech.
+
+    The parser records the raw tag only on the line that carries it;
+    continuation lines store the normalized name as ``original_speaker``.
+    Such a line inherits the tag of the speech it continues (the previous
+    entry by the same speaker). Context entries get ``(None, False)``. When a
+    tag stood on a line of its own, no entry recorded it and the
+    continuation's normalized name is the best available tag.
+    """
+    tags: List[Tuple[Optional[str], bool]] = []
+    previous_speaker = previous_tag = None
+    for entry in dialogue:
+        if 'speaker' not in entry:
+            tags.append((None, False))
+            continue
+        speaker = entry['speaker']
+        tag = entry.get('original_speaker', speaker)
+        continuation = tag == speaker and speaker == previous_speaker
+        if continuation:
+            tag = previous_tag
+        tags.append((tag, continuation))
+        previous_speaker, previous_tag = speaker, tag
+    return tags
+
+
+def renormalize_dataset(data: Dict, normalizer: CharacterNormalizer) -> Dict:
+    """Re-apply a (possibly edited) name mapping to a scraped dataset in place.
+
+    Speakers are recomputed from the raw tag of the speech each line belongs
+    to (see :func:`speech_tags`), continuation lines get the new name as
+    their ``original_speaker`` like a reparse would give them, and the
+    episode and dataset speaker counts are updated. Dialogue types are left
+    alone: continuation lines are always 'spoken'.
+    """
+    entries = []
+    raw_tags = []
+    for episode in data['episodes']:
+        for entry, (tag, continuation) in zip(episode['dialogue'], speech_tags(episode['dialogue'])):
+            if tag is not None:
+                entries.append((entry, continuation))
+                raw_tags.append(tag)
+    ids, names, _ = normalizer.normalize_many(raw_tags)
+    ids = ids.tolist() if _numpy() is not None else ids
+
+    position = 0
+    for episode in data['episodes']:
+        speakers = set()
+        for entry in episode['dialogue']:
+            if 'speaker' in entry:
+                speaker_id = ids[position]
+                entry['speaker'] = names[speaker_id]
+                if entries[position][1] and 'original_speaker' in entry:
+                    entry['original_speaker'] = entry['speaker']
+                speakers.add(speaker_id)
+                position += 1
+        if isinstance(episode.get('metadata'), dict) and 'unique_speakers' in episode['metadata']:
+            episode['metadata']['unique_speakers'] = len(speakers)
+    if isinstance(data.get('metadata'), dict) and 'unique_speakers' in data['metadata']:
+        data['metadata']['unique_speakers'] = len(set(ids))
+    return data
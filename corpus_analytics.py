@@ -0,0 +1,227 @@
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Keeps contractions and the transcripts' censored words ("g*dd*mn") whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[*'][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def index_path_for(output_path: str) -> Path:
+    """Where the token index of a scraper output is stored."""
+    path = Path(output_path)
+    return path.with_name(path.stem + '.tokens.npz')
+
+
+class CorpusIndex:
+    """Integer token arrays over the whole corpus, built once and stored on disk.
+
+    Every spoken line is tokenized a single time into ``tokens`` (vocabulary
+    ids). Parallel per-token arrays of line, speaker and episode ids let
+    frequency, n-gram, collocation and keyword-in-context queries run as NumPy
+    operations instead of Python loops over the JSON.
+    """
+
+    def __init__(self, vocab: Sequence[str], speakers: Sequence[str], episodes: Sequence[str],
+                 tokens: np.ndarray, line_offsets: np.ndarray,
+                 line_speaker: np.ndarray, line_episode: np.ndarray):
+        self.vocab = list(vocab)
+        self.word_ids = {word: idx for idx, word in enumerate(self.vocab)}
+        self.speakers = list(speakers)
+        self.speaker_ids = {name: idx for idx, name in enumerate(self.speakers)}
+        self.episodes = list(episodes)
+        self.tokens = tokens
+        self.line_offsets = line_offsets
+        self.line_speaker = line_speaker
+        self.line_episode = line_episode
+
+        line_lengths = np.diff(line_offsets)
+        self.token_line = np.repeat(np.arange(len(line_lengths), dtype=np.int32), line_lengths)
+        self.token_speaker = line_speaker[self.token_line]
+        self.token_episode = line_episode[self.token_line]
+
+    @classmethod
+    def build(cls, data: Dict) -> 'CorpusIndex':
+        vocab: Dict[str, int] = {}
+        speakers: Dict[str, int] = {}
+        episodes: List[str] = []
+        tokens: List[int] = []
+        offsets = [0]
+        line_speaker: List[int] = []
+        line_episode: List[int] = []
+
+        for episode_idx, episode in enumerate(data['episodes']):
+            episodes.append(episode['title'])
+            for entry in episode['dialogue']:
+                if 'speaker' not in entry or 'text' not in entry:
+                    continue
+                for word in tokenize(entry['text']):
+                    tokens.append(vocab.setdefault(word, len(vocab)))
+                offsets.append(len(tokens))
+                line_speaker.append(speakers.setdefault(entry['speaker'], len(speakers)))
+                line_episode.append(episode_idx)
+
+        return cls(
+            vocab=list(vocab), speakers=list(speakers), episodes=episodes,
+            tokens=np.array(tokens, dtype=np.int32),
+            line_offsets=np.array(offsets, dtype=np.int64),
+            line_speaker=np.array(line_speaker, dtype=np.int32),
+            line_episode=np.array(line_episode, dtype=np.int32),
+        )
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            tokens=self.tokens, line_offsets=self.line_offsets,
+            line_speaker=self.line_speaker, line_episode=self.line_episode,
+            vocab=np.array(json.dumps(self.vocab)),
+            speakers=np.array(json.dumps(self.speakers)),
+            episodes=np.array(json.dumps(self.episodes)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'CorpusIndex':
+        with np.load(path) as arrays:
+            return cls(
+                vocab=json.loads(str(arrays['vocab'])),
+                speakers=json.loads(str(arrays['speakers'])),
+                episodes=json.loads(str(arrays['episodes'])),
+                tokens=arrays['tokens'], line_offsets=arrays['line_offsets'],
+                line_speaker=arrays['line_speaker'], line_episode=arrays['line_episode'],
+            )
+
+    def _token_mask(self, speakers: Optional[Iterable[str]] = None,
+                    episodes: Optional[Iterable[int]] = None) -> Optional[np.ndarray]:
+        mask = None
+        if speakers is not None:
+            ids = [self.speaker_ids[s] for s in speakers if s in self.speaker_ids]
+            mask = np.isin(self.token_speaker, ids)
+        if episodes is not None:
+            episode_mask = np.isin(self.token_episode, list(episodes))
+            mask = episode_mask if mask is None else mask & episode_mask
+        return mask
+
+    def unigram_counts(self, speakers: Optional[Iterable[str]] = None,
+                       episodes: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Count of every vocabulary id, optionally sliced by speaker and episode."""
+        mask = self._token_mask(speakers, episodes)
+        tokens = self.tokens if mask is None else self.tokens[mask]
+        return np.bincount(tokens, minlength=len(self.vocab))
+
+    def frequency(self, word: str, speakers: Optional[Iterable[str]] = None) -> int:
+        word_id = self.word_ids.get(word.lower())
+        if word_id is None:
+            return 0
+        hits = self.tokens == word_id
+        mask = self._token_mask(speakers)
+        return int(np.count_nonzero(hits if mask is None else hits & mask))
+
+    def top_words(self, k: int = 20, speakers: Optional[Iterable[str]] = None) -> List[Tuple[str, int]]:
+        counts = self.unigram_counts(speakers)
+        top = np.argsort(counts)[::-1][:k]
+        return [(self.vocab[i], int(counts[i])) for i in top if counts[i]]
+
+    def _bigram_ids(self, speakers: Optional[Iterable[str]] = None) -> np.ndarray:
+        # Pairs must not straddle two lines
+        same_line = self.token_line[:-1] == self.token_line[1:]
+        mask = self._token_mask(speakers)
+        if mask is not None:
+            same_line &= mask[:-1]
+        vocab_size = np.int64(len(self.vocab))
+        return self.tokens[:-1][same_line].astype(np.int64) * vocab_size + self.tokens[1:][same_line]
+
+    def bigram_counts(self, speakers: Optional[Iterable[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (pair ids, counts); a pair id is ``first * len(vocab) + second``."""
+        return np.unique(self._bigram_ids(speakers), return_counts=True)
+
+    def top_bigrams(self, k: int = 20, speakers: Optional[Iterable[str]] = None
+                    ) -> List[Tuple[str, str, int]]:
+        pairs, counts = self.bigram_counts(speakers)
+        top = np.argsort(counts)[::-1][:k]
+        vocab_size = len(self.vocab)
+        return [(self.vocab[pairs[i] // vocab_size], self.vocab[pairs[i] % vocab_size], int(counts[i]))
+                for i in top]
+
+    def collocations(self, k: int = 20, min_count: int = 5,
+                     speakers: Optional[Iterable[str]] = None) -> List[Tuple[str, str, float]]:
+        """Bigrams ranked by pointwise mutual information."""
+        pairs, counts = self.bigram_counts(speakers)
+        keep = counts >= min_count
+        pairs, counts = pairs[keep], counts[keep]
+        if not len(pairs):
+            return []
+        vocab_size = len(self.vocab)
+        unigrams = self.unigram_counts(speakers).astype(np.float64)
+        total = unigrams.sum()
+        first, second = pairs // vocab_size, pairs % vocab_size
+        pmi = np.log(counts * total / (unigrams[first] * unigrams[second]))
+        top = np.argsort(pmi)[::-1][:k]
+        return [(self.vocab[first[i]], self.vocab[second[i]], float(pmi[i])) for i in top]
+
+    def kwic(self, word: str, window: int = 5, limit: int = 50,
+             speakers: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Keyword-in-context windows, clipped to the line each hit occurs in."""
+        word_id = self.word_ids.get(word.lower())
+        if word_id is None:
+            return []
+        hits = self.tokens == word_id
+        mask = self._token_mask(speakers)
+        if mask is not None:
+            hits &= mask
+        results = []
+        for pos in np.flatnonzero(hits)[:limit]:
+            line = self.token_line[pos]
+            start = max(self.line_offsets[line], pos - window)
+            end = min(self.line_offsets[line + 1], pos + window + 1)
+            results.append({
+                'left': ' '.join(self.vocab[t] for t in self.tokens[start:pos]),
+                'keyword': self.vocab[word_id],
+                'right': ' '.join(self.vocab[t] for t in self.tokens[pos + 1:end]),
+                'speaker': self.speakers[self.line_speaker[line]],
+                'episode': self.episodes[self.line_episode[line]],
+            })
+        return results
+
+
+def load_or_build(output_path: str, rebuild: bool = False) -> CorpusIndex:
+    """Load the token index stored next to a scraper output, building it if needed."""
+    index_path = index_path_for(output_path)
+    if not rebuild and index_path.exists() and \
+            index_path.stat().st_mtime >= Path(output_path).stat().st_mtime:
+        return CorpusIndex.load(str(index_path))
+    with open(output_path, 'r', encoding='utf-8') as f:
+        index = CorpusIndex.build(json.load(f))
+    index.save(str(index_path))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Word statistics over a scraped corpus')
+    parser.add_argument('input', help='Scraper JSON output')
+    parser.add_argument('--speaker', action='append', help='Restrict to this speaker (repeatable)')
+    parser.add_argument('--kwic', help='Show keyword-in-context lines for this word')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+
+    index = load_or_build(args.input, args.rebuild)
+    if args.kwic:
+        for hit in index.kwic(args.kwic, limit=args.top, speakers=args.speaker):
+            print(f"{hit['speaker']:>15}: {hit['left']:>40} [{hit['keyword']}] {hit['right']}")
+        return
+    for word, count in index.top_words(args.top, args.speaker):
+        print(f"{word:<20} {count}")
+    print()
+    for first, second, score in index.collocations(args.top, speakers=args.speaker):
+        print(f"{first} {second:<20} {score:.2f}")
+
+
+if __name__ == "__main__":
+    main()
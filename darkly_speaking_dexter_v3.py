@@ -1,41 +1,70 @@
 import requests
 from bs4 import BeautifulSoup, NavigableString, Tag
-import json
 import time
+import contextlib
 import random
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 from pathlib import Path
 import logging
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from character_name_utils import CharacterNormalizer
+from character_name_utils import CharacterNormalizer, renormalize_dataset, speech_tags
 from transcript_validator import TranscriptValidator
+from raw_page_archive import RawPageArchive
+from parse_cache import ParseCache, code_fingerprint, mapping_fingerprint, page_hash
+from html_decoding import EncodingResolver
+from log_utils import setup_logging
+from records import ContextLine, DialogueLine, get_codec
+from fetch_policy import DeadlineExceeded, DeadlineFetcher
+# Output sinks, queues, dedup and caches are imported by the methods that use
+# them, so importing the scraper does not load numpy, zstandard or orjson
+if TYPE_CHECKING:
+    from memory_profile import MemoryProfiler
+    from topic_dedup import TopicDeduplicator
+    from validation_cache import ValidationCache
+    from work_queue import WorkQueue
 
 class DexterScraper:
-    def __init__(self, base_url: str = "https://transcripts.foreverdreaming.org/viewforum.php?f=187"):
+    def __init__(self, base_url: str = "https://transcripts.foreverdreaming.org/viewforum.php?f=187",
+                 archive: Optional[RawPageArchive] = None,
+                 parse_cache: Optional[ParseCache] = None,
+                 name_normalizer: Optional[CharacterNormalizer] = None,
+                 memory_profiler: Optional['MemoryProfiler'] = None,
+                 fetcher: Optional[DeadlineFetcher] = None,
+                 validation_cache: Optional['ValidationCache'] = None,
+                 deduplicator: Optional['TopicDeduplicator'] = None):
         self.base_url = base_url
+        self.archive = archive
+        self.parse_cache = parse_cache
         self.episodes_data: List[Dict] = []
         self.current_speaker = None
-        self.name_normalizer = CharacterNormalizer()
+        self.name_normalizer = name_normalizer or CharacterNormalizer()
+        self.encoding_resolver = EncodingResolver()
+        self.memory_profiler = memory_profiler
+        self.validation_cache = validation_cache
+        # With a deduplicator, near-duplicate pages are dropped before their lines are parsed
+        self.deduplicator = deduplicator
         
         # Configure session with retries
         self.session = requests.Session()
         retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
         self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        # Total deadlines, hedging and quarantine. The fetcher copies this session's headers
+        # and cookies into its own per-thread sessions, and retries within the deadline itself
+        self.fetcher = fetcher or DeadlineFetcher(self.session)
         
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('scraper.log'),
-                logging.StreamHandler()
-            ]
-        )
+        # Logging is configured by the entry point (see log_utils.setup_logging)
         self.logger = logging.getLogger(__name__)
 
+    def close(self) -> None:
+        """Release the fetcher's threads and sessions and stop memory tracing."""
+        self.fetcher.close()
+        self.session.close()
+        if self.memory_profiler is not None:
+            self.memory_profiler.stop()
+
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content."""
         # Remove extra whitespace
@@ -50,12 +79,36 @@ class DexterScraper:
         text = re.sub(r'^\s*-\s*|\s*-\s*$', '', text)
         return text.strip()
 
+    def _profile(self, stage: str):
+        """Bracket a stage with memory snapshots when profiling is enabled."""
+        if self.memory_profiler is None:
+            return contextlib.nullcontext()
+        return self.memory_profiler.stage(stage)
+
+    def _profile_episode(self, url: str, resume: bool = False):
+        if self.memory_profiler is None:
+            return contextlib.nullcontext()
+        return self.memory_profiler.episode(url, resume)
+
     def get_episode_links(self) -> List[str]:
         """Retrieves all episode transcript links from the forum page."""
         try:
-            response = self.session.get(self.base_url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            try:
+                response = self.fetcher.get(self.base_url)
+            except DeadlineExceeded:
+                # Nothing can be scraped without the topic list, so retry it now with the longer deadline
+                self.fetcher.release(self.base_url)
+                response = self.fetcher.get(self.base_url, self.fetcher.quarantine_deadline)
+            encoding = self.encoding_resolver.resolve(self.base_url, response.headers, response.content)
+            return self.parse_episode_links(response.content, encoding)
+        except requests.RequestException as e:
+            self.logger.error("Failed to get episode links: %s", e)
+            return []
+
+    def parse_episode_links(self, html, encoding: Optional[str] = None) -> List[str]:
+        """Extract all episode transcript links from a fetched forum page."""
+        try:
+            soup = self.make_soup(html, self.base_url, encoding)
             
             # First find the "Topics" anchor
             topics_anchor = soup.find('a', {'class': 'forum-name'}, text='Topics')
@@ -90,11 +143,11 @@ class DexterScraper:
                     full_url = urljoin(self.base_url, href)
                     episode_links.append(full_url)
             
-            self.logger.info(f"Found {len(episode_links)} episode links")
+            self.logger.info("Found %d episode links", len(episode_links))
             return episode_links
             
-        except requests.RequestException as e:
-            self.logger.error(f"Failed to get episode links: {e}")
+        except Exception as e:
+            self.logger.error("Failed to parse episode links: %s", e)
             return []
 
     def process_html_content(self, content: Tag) -> List[str]:
@@ -170,10 +223,7 @@ class DexterScraper:
         # Check for context markers
         if text.startswith('[') and any(word.lower() in text.lower() 
                                       for word in ['music', 'rings', 'click', 'sound', 'phone']):
-            return {
-                "context": [text],
-                "line_number": line_number
-            }
+            return ContextLine([text], line_number).to_dict()
 
         # First check for speaker in brackets
         speaker, remaining_text = self.is_speaker_line(text)
@@ -181,13 +231,8 @@ class DexterScraper:
             speaker_info = self.name_normalizer.get_speaker_info(speaker)
             self.current_speaker = speaker_info['normalized_name']
             if remaining_text:
-                return {
-                    "speaker": speaker_info['normalized_name'],
-                    "original_speaker": speaker_info['original_name'],
-                    "text": remaining_text,
-                    "type": speaker_info['type'],
-                    "line_number": line_number
-                }
+                return DialogueLine(speaker_info['normalized_name'], remaining_text, speaker_info['type'],
+                                    line_number, speaker_info['original_name']).to_dict()
 
         # Then check for direct speaker introduction
         if not speaker:
@@ -195,85 +240,257 @@ class DexterScraper:
             if speaker:
                 speaker_info = self.name_normalizer.get_speaker_info(speaker)
                 self.current_speaker = speaker_info['normalized_name']
-                return {
-                    "speaker": speaker_info['normalized_name'],
-                    "original_speaker": speaker_info['original_name'],
-                    "text": full_text,
-                    "type": speaker_info['type'],
-                    "line_number": line_number
-                }
+                return DialogueLine(speaker_info['normalized_name'], full_text, speaker_info['type'],
+                                    line_number, speaker_info['original_name']).to_dict()
 
         # If we have a current speaker, attribute the line to them
         if self.current_speaker and text:
-            return {
-                "speaker": self.current_speaker,
-                "original_speaker": self.current_speaker,
-                "text": text,
-                "type": "spoken",
-                "line_number": line_number
-            }
+            return DialogueLine(self.current_speaker, text, 'spoken', line_number,
+                                self.current_speaker).to_dict()
 
         # Check for other context-like lines (e.g., "Population: , .")
         if ':' in text and len(text.split(':', 1)[0].strip().split()) <= 2:
-            return {
-                "context": [text],
-                "line_number": line_number
-            }
+            return ContextLine([text], line_number).to_dict()
 
         return None
 
-    def parse_episode(self, url: str) -> Optional[Dict]:
-        """Parse an individual episode transcript page."""
+    def parse_episode(self, url: str, deadline: Optional[float] = None) -> Optional[Dict]:
+        """Parse an individual episode transcript page.
+
+        ``deadline`` overrides the fetcher's total deadline for this page.
+        """
         try:
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
+            with self._profile_episode(url):
+                with self._profile('fetch'):
+                    response = self.fetcher.fetch(url, deadline)
+                # Decide the encoding ourselves; response.text may run charset detection
+                encoding = self.encoding_resolver.resolve(url, response.headers, response.content)
+                if self.archive is not None:
+                    self.archive.store(url, response.content, response.headers, encoding)
+                return self.parse_episode_html(response.content, url, page_hash(response.content), encoding)
+        except requests.RequestException as e:
+            self.logger.error("Failed to parse episode %s: %s", url, e)
+            return None
+        except Exception as e:
+            self.logger.error("Unexpected error fetching %s: %s", url, e)
+            return None
+
+    def fetch_page(self, url: str, deadline: Optional[float] = None) -> Optional[Dict]:
+        """Fetch an episode page and extract its lines without parsing them (see :meth:`extract_page`)."""
+        try:
+            with self._profile_episode(url):
+                with self._profile('fetch'):
+                    response = self.fetcher.fetch(url, deadline)
+                encoding = self.encoding_resolver.resolve(url, response.headers, response.content)
+                if self.archive is not None:
+                    self.archive.store(url, response.content, response.headers, encoding)
+                return self.extract_page(response.content, url, page_hash(response.content), encoding)
+        except requests.RequestException as e:
+            self.logger.error("Failed to fetch episode %s: %s", url, e)
+            return None
+        except Exception as e:
+            self.logger.error("Unexpected error fetching %s: %s", url, e)
+            return None
+
+    def parser_fingerprints(self) -> Tuple[str, str, str]:
+        """Fingerprint the extraction code, line parser and normalizer table in use.
+
+        The normalizer's code and the record types that shape each line are
+        part of the line parser fingerprint; the normalizer fingerprint
+        covers only its table and the code that renormalizes cached dialogue.
+        """
+        cls = type(self)
+        normalizer_cls = type(self.name_normalizer)
+        extract_fp = code_fingerprint(cls.extract_episode_lines, cls.make_soup, cls.process_html_content)
+        line_fp = code_fingerprint(cls.parse_lines, cls.parse_line, cls.clean_text,
+                                   cls.is_speaker_line, cls.is_direct_speaker_introduction,
+                                   DialogueLine, ContextLine, cls._build_episode,
+                                   normalizer_cls.normalize, normalizer_cls.get_speaker_info,
+                                   normalizer_cls.is_voiceover)
+        normalizer_fp = mapping_fingerprint(self.name_normalizer.case_insensitive_mappings,
+                                            renormalize_dataset, speech_tags, normalizer_cls.normalize_many)
+        return extract_fp, line_fp, normalizer_fp
+
+    def make_soup(self, html, url: str, encoding: Optional[str] = None) -> BeautifulSoup:
+        """Build a soup, handing raw bytes to the parser with a known encoding."""
+        if isinstance(html, str):
+            return BeautifulSoup(html, 'html.parser')
+        if encoding is None:
+            encoding = self.encoding_resolver.resolve(url, None, html)
+        return BeautifulSoup(html, 'html.parser', from_encoding=encoding)
+
+    def extract_episode_lines(self, html, url: str,
+                              encoding: Optional[str] = None) -> Optional[Tuple[str, List[str]]]:
+        """Build the soup and return the episode title and its raw transcript lines."""
+        with self._profile('soup'):
+            soup = self.make_soup(html, url, encoding)
+        
+        with self._profile('extract'):
             content = soup.find('div', class_='content')
             if not content:
                 content = soup.find('div', class_='postbody')
             
             if not content:
-                self.logger.warning(f"No content found for episode: {url}")
+                self.logger.warning("No content found for episode: %s", url)
                 return None
-                
-            # Reset speaker for new episode
-            self.current_speaker = None
-            dialogue = []
-            line_number = 0
             
             # Process HTML content preserving <br> tags
             lines = self.process_html_content(content)
             
-            for line in lines:
-                line_number += 1
-                parsed_line = self.parse_line(line, line_number)
-                if parsed_line:
-                    dialogue.append(parsed_line)
-            
             title = soup.find('h2', class_='title')
             if not title:
                 title = soup.find('h3', class_='first')
             
             episode_title = title.text.strip() if title else Path(url).stem
-            
-            return {
-                'title': episode_title,
-                'url': url,
-                'dialogue': dialogue,
-                'metadata': {
-                    'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'total_lines': len(dialogue),
-                    'unique_speakers': len(set(d['speaker'] for d in dialogue if 'speaker' in d))
-                }
-            }
-        except requests.RequestException as e:
-            self.logger.error(f"Failed to parse episode {url}: {e}")
-            return None
+        return episode_title, lines
+
+    def parse_lines(self, lines: List[str]) -> List[Dict]:
+        """Parse an episode's extracted lines into dialogue entries."""
+        # Reset speaker for new episode
+        self.current_speaker = None
+        dialogue = []
+        line_number = 0
+        
+        for line in lines:
+            line_number += 1
+            parsed_line = self.parse_line(line, line_number)
+            if parsed_line:
+                dialogue.append(parsed_line)
+        return dialogue
+
+    def parse_episode_html(self, html, url: str, content_hash: Optional[str] = None,
+                           encoding: Optional[str] = None) -> Optional[Dict]:
+        """Parse an episode transcript from already fetched HTML (str or bytes).
+
+        With a parse cache configured, unchanged pages skip the HTML parse and,
+        when only the parser or normalizer changed, just re-run line parsing.
+        """
+        try:
+            page = self.extract_page(html, url, content_hash, encoding)
+            if page is None:
+                return None
+            return self.parse_page(page)
         except Exception as e:
-            self.logger.error(f"Unexpected error parsing {url}: {e}")
+            self.logger.error("Unexpected error parsing %s: %s", url, e)
             return None
 
+    def extract_page(self, html, url: str, content_hash: Optional[str] = None,
+                     encoding: Optional[str] = None) -> Optional[Dict]:
+        """First half of parsing: the page's title and raw transcript lines.
+
+        Lines come from the parse cache when the page and the extraction code
+        are unchanged. The result is what :meth:`parse_page` consumes.
+        """
+        cache = self.parse_cache
+        if cache is not None:
+            content_hash = content_hash or page_hash(html)
+            extract_fp = self.parser_fingerprints()[0]
+            extracted = cache.get_lines(content_hash, extract_fp)
+            if extracted is not None:
+                return {'url': url, 'title': extracted[0], 'lines': extracted[1],
+                        'content_hash': content_hash, 'cached_lines': True}
+        
+        extracted = self.extract_episode_lines(html, url, encoding)
+        if extracted is None:
+            return None
+        if cache is not None:
+            cache.put_lines(content_hash, extract_fp, *extracted)
+        return {'url': url, 'title': extracted[0], 'lines': extracted[1],
+                'content_hash': content_hash, 'cached_lines': False}
+
+    def parse_page(self, page: Dict) -> Dict:
+        """Second half of parsing: turn extracted lines into an episode."""
+        cache = self.parse_cache
+        if cache is not None:
+            extract_fp, line_fp, normalizer_fp = self.parser_fingerprints()
+            if page['cached_lines']:
+                cached = cache.get_dialogue(page['content_hash'], extract_fp, line_fp, normalizer_fp)
+                if cached is not None:
+                    cached_fp, dialogue = cached
+                    episode = self._build_episode(page['title'], page['url'], dialogue)
+                    if cached_fp == normalizer_fp:
+                        cache.stats['dialogue_hits'] += 1
+                        return episode
+                    # Only the name mappings changed: rewrite the speakers, skip the line parse
+                    cache.stats['renormalized'] += 1
+                    with self._profile('renormalize'):
+                        renormalize_dataset({'episodes': [episode]}, self.name_normalizer)
+                    cache.put_dialogue(page['content_hash'], extract_fp, line_fp, normalizer_fp, dialogue)
+                    return episode
+                cache.stats['line_hits'] += 1
+            else:
+                cache.stats['misses'] += 1
+        
+        with self._profile('parse'):
+            dialogue = self.parse_lines(page['lines'])
+        if cache is not None:
+            cache.put_dialogue(page['content_hash'], extract_fp, line_fp, normalizer_fp, dialogue)
+        return self._build_episode(page['title'], page['url'], dialogue)
+
+    def parse_unique_pages(self, pages: List[Dict]) -> int:
+        """Parse extracted pages into episodes_data, skipping near-duplicates.
+
+        Every page's raw transcript text goes through the deduplicator first,
+        so only the canonical copy of each cluster is parsed. Returns the
+        number of pages dropped.
+        """
+        for page in pages:
+            self.deduplicator.add(page['url'], '\n'.join(page['lines']), len(page['lines']))
+        duplicates = self.deduplicator.duplicates()
+        dropped = 0
+        for page in pages:
+            if page['url'] in duplicates:
+                self.logger.info("Dropping near-duplicate %s (kept %s)", page['url'], duplicates[page['url']])
+                dropped += 1
+                continue
+            try:
+                # Attributed to the episode whose fetch and extraction were profiled earlier
+                with self._profile_episode(page['url'], resume=True):
+                    self.episodes_data.append(self.parse_page(page))
+            except Exception as e:
+                self.logger.error("Unexpected error parsing %s: %s", page['url'], e)
+        return dropped
+
+    def _build_episode(self, title: str, url: str, dialogue: List[Dict]) -> Dict:
+        return {
+            'title': title,
+            'url': url,
+            'dialogue': dialogue,
+            'metadata': {
+                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'total_lines': len(dialogue),
+                'unique_speakers': len(set(d['speaker'] for d in dialogue if 'speaker' in d))
+            }
+        }
+
+    def reparse_archive(self, archive: Optional[RawPageArchive] = None):
+        """Rebuild episodes_data from archived pages without touching the network."""
+        archive = archive or self.archive
+        if archive is None:
+            raise ValueError("No raw page archive configured")
+        
+        self.episodes_data = []
+        pages = []
+        for record, body in archive.iter_pages():
+            encoding = self.encoding_resolver.resolve(record['url'], record['headers'], body)
+            with self._profile_episode(record['url']):
+                if self.deduplicator is not None:
+                    try:
+                        page = self.extract_page(body, record['url'], record['sha256'], encoding)
+                    except Exception as e:
+                        self.logger.error("Unexpected error parsing %s: %s", record['url'], e)
+                        page = None
+                    if page:
+                        pages.append(page)
+                    continue
+                episode_data = self.parse_episode_html(body, record['url'], record['sha256'], encoding)
+            if episode_data:
+                self.episodes_data.append(episode_data)
+        if self.deduplicator is not None:
+            self.parse_unique_pages(pages)
+        
+        self.logger.info("Reparsed %d episodes from archive", len(self.episodes_data))
+
     def scrape_all_episodes(self, delay: float = 2.5):
         """Scrape all episodes with error handling and progress tracking."""
         episode_links = self.get_episode_links()
@@ -283,42 +500,187 @@ class DexterScraper:
             self.logger.error("No episodes found to scrape")
             return
         
-        self.logger.info(f"Beginning to scrape {total_episodes} episodes")
+        self.logger.info("Beginning to scrape %d episodes", total_episodes)
+        # With a deduplicator, pages are only fetched and extracted here and parsed once all are in
+        pages = []
         
         for idx, link in enumerate(episode_links, 1):
-            self.logger.info(f"Scraping episode {idx}/{total_episodes}: {link}")
+            self.logger.info("Scraping episode %d/%d: %s", idx, total_episodes, link)
             
             try:
+                if self.deduplicator is not None:
+                    page = self.fetch_page(link)
+                    if page:
+                        pages.append(page)
+                    time.sleep(delay + (random.random() * 0.5))
+                    continue
                 episode_data = self.parse_episode(link)
                 if episode_data:
                     self.episodes_data.append(episode_data)
-                    self.logger.info(f"Successfully scraped episode: {episode_data['title']} "
-                                   f"({len(episode_data['dialogue'])} lines)")
+                    self.logger.info("Successfully scraped episode: %s (%d lines)",
+                                     episode_data['title'], len(episode_data['dialogue']))
                 
                 time.sleep(delay + (random.random() * 0.5))
                 
             except Exception as e:
-                self.logger.error(f"Error scraping {link}: {e}")
+                self.logger.error("Error scraping %s: %s", link, e)
+                continue
+        
+        # Pages that missed their deadline were skipped above; give them one longer try now
+        quarantined = self.fetcher.drain_quarantine()
+        if quarantined:
+            self.logger.info("Retrying %d quarantined pages", len(quarantined))
+        for link in quarantined:
+            if self.deduplicator is not None:
+                page = self.fetch_page(link, self.fetcher.quarantine_deadline)
+                if page:
+                    pages.append(page)
+                else:
+                    self.logger.error("Giving up on quarantined page %s", link)
+                continue
+            episode_data = self.parse_episode(link, self.fetcher.quarantine_deadline)
+            if episode_data:
+                self.episodes_data.append(episode_data)
+                self.logger.info("Successfully scraped quarantined episode: %s (%d lines)",
+                                 episode_data['title'], len(episode_data['dialogue']))
+            else:
+                self.logger.error("Giving up on quarantined page %s", link)
+        self.logger.info("Fetch stats: %s", self.fetcher.stats)
+        
+        if self.deduplicator is not None:
+            dropped = self.parse_unique_pages(pages)
+            self.logger.info("Parsed %d episodes, dropped %d near-duplicates", len(self.episodes_data), dropped)
+
+    def enqueue_episode_links(self, queue: 'WorkQueue', requeue_done: bool = False) -> int:
+        """Publish this forum's topic links to a shared work queue.
+
+        Links already scraped in an earlier crawl are skipped unless
+        ``requeue_done`` is set.
+        """
+        added = queue.put(self.get_episode_links(), queue=self.base_url, requeue_done=requeue_done)
+        self.logger.info("Queued %d new episode links from %s", added, self.base_url)
+        return added
+
+    def work_from_queue(self, queue: 'WorkQueue', worker_id: Optional[str] = None,
+                        delay: float = 2.5, lease_seconds: float = 300, poll_interval: float = 10.0):
+        """Scrape episodes leased from a shared queue until it is drained.
+
+        Any number of workers can run this against the same queue; each
+        lease is heartbeated while the page is fetched and parsed, so a
+        worker that dies has its job reclaimed once the lease expires.
+        Each episode is stored in the queue as its job completes; use
+        :meth:`collect_from_queue` to assemble the dataset afterwards.
+        """
+        from work_queue import default_worker_id, keep_alive
+        
+        worker_id = worker_id or default_worker_id()
+        completed = 0
+        while True:
+            job = queue.lease(worker_id, lease_seconds, queue=self.base_url)
+            if job is None:
+                if queue.is_drained(self.base_url):
+                    break
+                # Remaining jobs are leased elsewhere or waiting out a retry delay
+                time.sleep(poll_interval)
                 continue
+            
+            self.logger.info("Worker %s scraping %s (attempt %d)", worker_id, job['url'], job['attempts'])
+            with keep_alive(queue, job, lease_seconds) as lease_lost:
+                episode_data = self.parse_episode(job['url'])
+            
+            if lease_lost.is_set():
+                self.logger.warning("Lease on %s was lost; discarding result", job['url'])
+            elif episode_data:
+                if queue.complete(job, episode_data):
+                    completed += 1
+                else:
+                    self.logger.warning("Lease on %s expired before completion; discarding result", job['url'])
+            else:
+                queue.fail(job, 'parse_episode returned no data')
+            time.sleep(delay + (random.random() * 0.5))
+        
+        self.logger.info("Worker %s finished with %d episodes", worker_id, completed)
+        return completed
+
+    def collect_from_queue(self, queue: 'WorkQueue') -> int:
+        """Load every episode the workers stored for this forum, ready to save as one dataset."""
+        self.episodes_data = list(queue.results(self.base_url))
+        self.logger.info("Collected %d episodes from the work queue", len(self.episodes_data))
+        return len(self.episodes_data)
 
-    def save_to_json(self, filename: str = 'dexter_transcripts.json'):
-        """Save scraped data to a JSON file."""
+    def remove_near_duplicates(self, deduplicator: Optional['TopicDeduplicator'] = None) -> int:
+        """Drop re-posted transcripts from already parsed episodes, keeping one copy per cluster.
+
+        Scrapes and reparses with a deduplicator configured skip duplicates
+        before parsing instead; this is for episodes that arrive parsed, such
+        as those collected from a work queue.
+        """
+        from topic_dedup import TopicDeduplicator, episode_text
+        
+        deduplicator = deduplicator or TopicDeduplicator()
+        for idx, episode in enumerate(self.episodes_data):
+            deduplicator.add(idx, episode_text(episode), len(episode['dialogue']))
+        
+        duplicates = deduplicator.duplicates()
+        for idx, keep in sorted(duplicates.items()):
+            self.logger.info("Dropping near-duplicate %s (kept %s)",
+                             self.episodes_data[idx]['url'], self.episodes_data[keep]['url'])
+        self.episodes_data = [ep for idx, ep in enumerate(self.episodes_data) if idx not in duplicates]
+        return len(duplicates)
+
+    def _dataset_metadata(self) -> Dict:
+        return {
+            'total_episodes': len(self.episodes_data),
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'source': self.base_url,
+            'total_dialogue_lines': sum(len(ep['dialogue']) for ep in self.episodes_data),
+            'unique_speakers': len(set(
+                d['speaker'] 
+                for ep in self.episodes_data 
+                for d in ep['dialogue']
+                if 'speaker' in d
+            ))
+        }
+
+    def _validate_dataset(self, data: Dict) -> None:
+        """Log validation problems and raise ValueError if the dataset is invalid."""
+        if self.validation_cache is not None:
+            from validation_cache import IncrementalValidator
+            # Only episodes that are new or changed since the last save are revalidated
+            validator = IncrementalValidator(self.validation_cache)
+        else:
+            validator = TranscriptValidator()
+        is_valid, validation_results = validator.validate_dataset(data)
+        
+        if not is_valid:
+            self.logger.error("Data validation failed:")
+            for error in validation_results['errors']:
+                self.logger.error("Error: %s", error)
+            # Repeats of the same warning template are summarized by the log setup
+            self.logger.warning("Validation produced %d warnings",
+                                len(validation_results['warnings']))
+            for warning in validation_results['warnings']:
+                self.logger.warning("Warning: %s", warning)
+            raise ValueError("Dataset validation failed")
+
+    def save_to_json(self, filename: str = 'dexter_transcripts.json', granularity: str = 'lines',
+                     codec: str = 'json'):
+        """Save scraped data to a JSON file.
+
+        With ``granularity='turns'`` consecutive lines by the same speaker are
+        merged into turns after validation (see turn_aggregation). ``codec``
+        picks the JSON encoder (see records.get_codec); only the default
+        ``json`` codec indents its output.
+        """
+        from turn_aggregation import aggregate_dataset
+        
+        if granularity not in ('lines', 'turns'):
+            raise ValueError(f"Unknown granularity '{granularity}'")
         try:
             output_path = Path(filename)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            metadata = {
-                'total_episodes': len(self.episodes_data),
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'source': self.base_url,
-                'total_dialogue_lines': sum(len(ep['dialogue']) for ep in self.episodes_data),
-                'unique_speakers': len(set(
-                    d['speaker'] 
-                    for ep in self.episodes_data 
-                    for d in ep['dialogue']
-                    if 'speaker' in d
-                ))
-            }
+            metadata = self._dataset_metadata()
             
             data = {
                 'metadata': metadata,
@@ -326,29 +688,88 @@ class DexterScraper:
             }
             
             # Validate data before saving
-            validator = TranscriptValidator()
-            is_valid, validation_results = validator.validate_dataset(data)
-            
-            if not is_valid:
-                self.logger.error("Data validation failed:")
-                for error in validation_results['errors']:
-                    self.logger.error(f"Error: {error}")
-                for warning in validation_results['warnings']:
-                    self.logger.warning(f"Warning: {warning}")
-                raise ValueError("Dataset validation failed")
+            self._validate_dataset(data)
             
-            with output_path.open('w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with self._profile('save'):
+                if granularity == 'turns':
+                    data = aggregate_dataset(data)
                 
-            self.logger.info(f"Successfully saved data to {filename}")
+                output_path.write_bytes(get_codec(codec).encode(data))
+                
+            self.logger.info("Successfully saved data to %s", filename)
+        except Exception as e:
+            self.logger.error("Failed to save data to %s: %s", filename, e)
+            raise
+
+    def save_compressed(self, filename: str = 'dexter_transcripts.json.zst', compression: str = 'zstd',
+                        granularity: str = 'lines', codec: str = 'json', workers: int = 4):
+        """Save as independently compressed per-episode frames with a seek table.
+
+        See framed_output.FramedOutputWriter; episodes can later be read
+        individually with FramedOutputReader.
+        """
+        from framed_output import FramedOutputWriter
+        from turn_aggregation import aggregate_dataset
+        
+        if granularity not in ('lines', 'turns'):
+            raise ValueError(f"Unknown granularity '{granularity}'")
+        try:
+            data = {'metadata': self._dataset_metadata(), 'episodes': self.episodes_data}
+            self._validate_dataset(data)
+            
+            with self._profile('save'):
+                if granularity == 'turns':
+                    data = aggregate_dataset(data)
+                # A failure part-way leaves no seek table, so the partial file is never read as complete
+                with FramedOutputWriter(filename, compression, workers=workers, codec=codec) as writer:
+                    writer.write_episodes(data['episodes'])
+                    writer.close(data['metadata'])
+            
+            self.logger.info("Successfully saved %d compressed episodes to %s",
+                             len(data['episodes']), filename)
+        except Exception as e:
+            self.logger.error("Failed to save data to %s: %s", filename, e)
+            raise
+
+    def save_partitioned(self, directory: str = 'dexter_transcripts'):
+        """Save one file per series and season plus a sorted catalog index."""
+        from episode_catalog import EpisodeCatalog
+        
+        try:
+            data = {'metadata': self._dataset_metadata(), 'episodes': self.episodes_data}
+            self._validate_dataset(data)
+            with self._profile('save'):
+                catalog_path = EpisodeCatalog().write_partitioned(data, directory)
+            self.logger.info("Successfully saved partitioned data to %s", catalog_path.parent)
+        except Exception as e:
+            self.logger.error("Failed to save data to %s: %s", directory, e)
+            raise
+
+    def save_to_sqlite(self, filename: str = 'dexter_transcripts.sqlite'):
+        """Save scraped data to a SQLite database with full-text search over lines."""
+        from sqlite_sink import SqliteSink
+        
+        try:
+            self._validate_dataset({'metadata': self._dataset_metadata(), 'episodes': self.episodes_data})
+            sink = SqliteSink(filename)
+            try:
+                with self._profile('save'):
+                    count = sink.write_episodes(self.episodes_data)
+            finally:
+                sink.close()
+            self.logger.info("Successfully saved %d episodes to %s", count, filename)
         except Exception as e:
-            self.logger.error(f"Failed to save data to {filename}: {e}")
+            self.logger.error("Failed to save data to %s: %s", filename, e)
             raise
 
 def main():
-    scraper = DexterScraper()
-    scraper.scrape_all_episodes()
-    scraper.save_to_json()
+    setup_logging()
+    scraper = DexterScraper(archive=RawPageArchive('raw_pages'))
+    try:
+        scraper.scrape_all_episodes()
+        scraper.save_to_json()
+    finally:
+        scraper.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
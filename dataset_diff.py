@@ -0,0 +1,260 @@
+import argparse
+import bisect
+import hashlib
+import json
+import sys
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Tuple
+from character_name_utils import speech_tags
+from episode_catalog import topic_id
+
+# Fields compared between aligned dialogue entries
+COMPARED_FIELDS = ('speaker', 'original_speaker', 'text', 'type', 'context')
+
+# Below this share of line numbers carrying identical text, line numbering is
+# assumed to have shifted and entries are aligned on their text instead
+LINE_NUMBER_MATCH_THRESHOLD = 0.5
+
+# Text alignment only runs the quadratic SequenceMatcher on stretches between
+# unique-line anchors whose size product is below this; larger ones are paired up
+# positionally or reported as removed and added
+MAX_FALLBACK_CELLS = 250_000
+
+
+def _digest(value) -> bytes:
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                           digest_size=8).digest()
+
+
+def entry_key(entry: Dict) -> int:
+    """Hash of what was said, independent of who it was attributed to."""
+    if 'text' in entry:
+        return hash(entry['text'])
+    return hash(tuple(entry.get('context') or ()))
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Longest chain of (i, j) pairs, given in increasing i, with j increasing too."""
+    tails: List[int] = []  # j of the last pair of the best chain of each length
+    tail_index: List[int] = []
+    previous: List[int] = []
+    for index, (_, j) in enumerate(pairs):
+        length = bisect.bisect_left(tails, j)
+        if length == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[length] = j
+            tail_index[length] = index
+        previous.append(tail_index[length - 1] if length else -1)
+    chain = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        chain.append(pairs[index])
+        index = previous[index]
+    return chain[::-1]
+
+
+class DatasetDiff:
+    """Diffs two scraper outputs episode by episode.
+
+    Episodes are aligned by topic id and skipped outright when their dialogue
+    hashes match, so unchanged episodes cost one hash each. Changed episodes
+    are aligned by line_number, falling back to a sequence alignment over
+    line content hashes when the numbering has shifted. That alignment
+    anchors on lines whose text is unique in both versions (patience diff),
+    so it stays near-linear on long episodes.
+    """
+
+    def __init__(self, old_data: Dict, new_data: Dict):
+        self.old_episodes = {topic_id(ep): ep for ep in old_data.get('episodes', [])}
+        self.new_episodes = {topic_id(ep): ep for ep in new_data.get('episodes', [])}
+        self.summary = {
+            'episodes_added': 0, 'episodes_removed': 0, 'episodes_changed': 0,
+            'episodes_unchanged': 0, 'lines_added': 0, 'lines_removed': 0,
+            'lines_changed': 0, 'lines_reattributed': 0, 'lines_renormalized': 0,
+            'lines_renumbered': 0,
+        }
+
+    @classmethod
+    def from_files(cls, old_path: str, new_path: str) -> 'DatasetDiff':
+        with open(old_path, 'r', encoding='utf-8') as f:
+            old_data = json.load(f)
+        with open(new_path, 'r', encoding='utf-8') as f:
+            new_data = json.load(f)
+        return cls(old_data, new_data)
+
+    def _compare_entries(self, old: Dict, new: Dict, old_tag: Optional[str] = None,
+                         new_tag: Optional[str] = None) -> Optional[Tuple[str, Dict]]:
+        """Classify the difference between two aligned entries, if any.
+
+        ``old_tag``/``new_tag`` are the raw speaker tags of the speeches the
+        entries belong to (see :func:`character_name_utils.speech_tags`);
+        continuation lines only record the normalized name themselves.
+        """
+        changes = {
+            field: [old.get(field), new.get(field)]
+            for field in COMPARED_FIELDS
+            if old.get(field) != new.get(field)
+        }
+        if not changes:
+            return None
+        if 'text' in changes or 'context' in changes:
+            kind = 'changed'
+        elif 'speaker' in changes and (old_tag if old_tag is not None else old.get('original_speaker')) == \
+                (new_tag if new_tag is not None else new.get('original_speaker')):
+            # Same raw tag resolved differently: a normalizer table change
+            kind = 'renormalized'
+        else:
+            kind = 'reattributed'
+        return kind, changes
+
+    def _align_by_line_number(self, old: List[Dict], new: List[Dict]
+                              ) -> Optional[List[Tuple[Optional[Dict], Optional[Dict]]]]:
+        old_by_line = {e.get('line_number'): e for e in old}
+        new_by_line = {e.get('line_number'): e for e in new}
+        shared = old_by_line.keys() & new_by_line.keys()
+        same_text = sum(1 for n in shared if entry_key(old_by_line[n]) == entry_key(new_by_line[n]))
+        if shared and same_text < LINE_NUMBER_MATCH_THRESHOLD * len(shared):
+            return None
+        line_numbers = sorted(old_by_line.keys() | new_by_line.keys(), key=lambda n: (n is None, n))
+        return [(old_by_line.get(n), new_by_line.get(n)) for n in line_numbers]
+
+    def _align_by_text(self, old: List[Dict], new: List[Dict]
+                       ) -> Iterator[Tuple[Optional[Dict], Optional[Dict]]]:
+        old_keys = [entry_key(e) for e in old]
+        new_keys = [entry_key(e) for e in new]
+        yield from self._align_range(old, new, old_keys, new_keys, 0, len(old), 0, len(new))
+
+    @staticmethod
+    def _unmatched(old: List[Dict], new: List[Dict], i1: int, i2: int, j1: int, j2: int
+                   ) -> Iterator[Tuple[Optional[Dict], Optional[Dict]]]:
+        if i2 - i1 == j2 - j1:
+            yield from zip(old[i1:i2], new[j1:j2])
+            return
+        for entry in old[i1:i2]:
+            yield entry, None
+        for entry in new[j1:j2]:
+            yield None, entry
+
+    def _align_range(self, old: List[Dict], new: List[Dict], old_keys: List[int], new_keys: List[int],
+                     i1: int, i2: int, j1: int, j2: int) -> Iterator[Tuple[Optional[Dict], Optional[Dict]]]:
+        # Common prefix and suffix
+        while i1 < i2 and j1 < j2 and old_keys[i1] == new_keys[j1]:
+            yield old[i1], new[j1]
+            i1 += 1
+            j1 += 1
+        suffix = 0
+        while i1 < i2 - suffix and j1 < j2 - suffix and old_keys[i2 - suffix - 1] == new_keys[j2 - suffix - 1]:
+            suffix += 1
+        i2, j2 = i2 - suffix, j2 - suffix
+
+        if i1 < i2 and j1 < j2:
+            old_counts = Counter(old_keys[i1:i2])
+            new_counts = Counter(new_keys[j1:j2])
+            new_positions = {new_keys[j]: j for j in range(j1, j2) if new_counts[new_keys[j]] == 1}
+            candidates = [(i, new_positions[old_keys[i]]) for i in range(i1, i2)
+                          if old_counts[old_keys[i]] == 1 and old_keys[i] in new_positions]
+            anchors = _longest_increasing(candidates)
+            if anchors:
+                for i, j in anchors:
+                    yield from self._align_range(old, new, old_keys, new_keys, i1, i, j1, j)
+                    yield old[i], new[j]
+                    i1, j1 = i + 1, j + 1
+                yield from self._align_range(old, new, old_keys, new_keys, i1, i2, j1, j2)
+            elif (i2 - i1) * (j2 - j1) <= MAX_FALLBACK_CELLS:
+                matcher = SequenceMatcher(None, old_keys[i1:i2], new_keys[j1:j2], autojunk=False)
+                for tag, a1, a2, b1, b2 in matcher.get_opcodes():
+                    if tag == 'equal':
+                        yield from zip(old[i1 + a1:i1 + a2], new[j1 + b1:j1 + b2])
+                    else:
+                        yield from self._unmatched(old, new, i1 + a1, i1 + a2, j1 + b1, j1 + b2)
+            else:
+                yield from self._unmatched(old, new, i1, i2, j1, j2)
+        else:
+            yield from self._unmatched(old, new, i1, i2, j1, j2)
+
+        yield from zip(old[i2:i2 + suffix], new[j2:j2 + suffix])
+
+    def diff_episode(self, old_ep: Dict, new_ep: Dict) -> List[List]:
+        """Return compact line operations turning old_ep's dialogue into new_ep's.
+
+        Operations are ``["+", line_number, entry]``, ``["-", line_number]`` and
+        ``[kind, old_line_number, new_line_number, {field: [old, new]}]`` where
+        kind is one of changed, reattributed or renormalized. Entries whose
+        content is unchanged but whose line number shifted are only counted.
+        """
+        old, new = old_ep.get('dialogue', []), new_ep.get('dialogue', [])
+        old_tags = {id(e): tag for e, (tag, _) in zip(old, speech_tags(old))}
+        new_tags = {id(e): tag for e, (tag, _) in zip(new, speech_tags(new))}
+        pairs = self._align_by_line_number(old, new)
+        if pairs is None:
+            pairs = self._align_by_text(old, new)
+
+        ops = []
+        for old_entry, new_entry in pairs:
+            if old_entry is None:
+                ops.append(['+', new_entry.get('line_number'), new_entry])
+                self.summary['lines_added'] += 1
+            elif new_entry is None:
+                ops.append(['-', old_entry.get('line_number')])
+                self.summary['lines_removed'] += 1
+            else:
+                if old_entry.get('line_number') != new_entry.get('line_number'):
+                    self.summary['lines_renumbered'] += 1
+                result = self._compare_entries(old_entry, new_entry, old_tags.get(id(old_entry)),
+                                               new_tags.get(id(new_entry)))
+                if result is None:
+                    continue
+                kind, changes = result
+                ops.append([kind, old_entry.get('line_number'), new_entry.get('line_number'), changes])
+                self.summary[f'lines_{kind}'] += 1
+        return ops
+
+    def diff(self) -> Dict:
+        """Build the machine-readable patch between the two datasets."""
+        episodes = {}
+        for key, new_ep in self.new_episodes.items():
+            old_ep = self.old_episodes.get(key)
+            if old_ep is None:
+                episodes[key] = {'op': 'added', 'title': new_ep.get('title'), 'episode': new_ep}
+                self.summary['episodes_added'] += 1
+                continue
+            if _digest(old_ep.get('dialogue')) == _digest(new_ep.get('dialogue')):
+                self.summary['episodes_unchanged'] += 1
+                continue
+            episodes[key] = {
+                'op': 'modified',
+                'title': new_ep.get('title'),
+                'lines': self.diff_episode(old_ep, new_ep),
+            }
+            self.summary['episodes_changed'] += 1
+
+        for key, old_ep in self.old_episodes.items():
+            if key not in self.new_episodes:
+                episodes[key] = {'op': 'removed', 'title': old_ep.get('title')}
+                self.summary['episodes_removed'] += 1
+
+        return {'summary': self.summary, 'episodes': episodes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Diff two scraped transcript datasets')
+    parser.add_argument('old', help='Earlier scraper output')
+    parser.add_argument('new', help='Later scraper output')
+    parser.add_argument('-o', '--output', help='Write the patch here instead of stdout')
+    args = parser.parse_args()
+
+    patch = DatasetDiff.from_files(args.old, args.new).diff()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(patch, f, ensure_ascii=False, separators=(',', ':'))
+    else:
+        json.dump(patch, sys.stdout, ensure_ascii=False, separators=(',', ':'))
+        sys.stdout.write('\n')
+    print(json.dumps(patch['summary']), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
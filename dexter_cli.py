@@ -0,0 +1,360 @@
+import time
+
+# Taken before any other import so --timing covers module loading.
+# Heavy dependencies (requests, bs4, aiohttp) are imported inside the
+# subcommands that need them, so validate and stats start quickly.
+_START = time.perf_counter()
+
+import argparse
+import json
+import logging
+import sys
+from collections import Counter
+from typing import Dict, List, Optional
+
+from log_utils import setup_logging
+
+DEFAULT_FORUM_URL = "https://transcripts.foreverdreaming.org/viewforum.php?f=187"
+
+
+def _load_dataset(path: str) -> Dict:
+    """Load a scraper output, expanding turn-level files back to lines."""
+    from turn_aggregation import expand_dataset
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return expand_dataset(json.load(f))
+
+
+def _make_scraper(args, archive_required: bool = False, dedupe_pages: bool = False):
+    from darkly_speaking_dexter_v3 import DexterScraper
+    from parse_cache import ParseCache
+    from raw_page_archive import RawPageArchive
+
+    if archive_required and not args.archive:
+        raise SystemExit("--archive is required")
+    archive = RawPageArchive(args.archive) if args.archive else None
+    parse_cache = ParseCache(args.parse_cache) if args.parse_cache else None
+    validation_cache = None
+    if getattr(args, 'validation_cache', None):
+        from validation_cache import ValidationCache
+        validation_cache = ValidationCache(args.validation_cache)
+    memory_profiler = None
+    if getattr(args, 'profile_memory', None):
+        from memory_profile import MemoryProfiler
+        memory_profiler = MemoryProfiler()
+    scraper = DexterScraper(args.forum_url, archive=archive, parse_cache=parse_cache,
+                            memory_profiler=memory_profiler, validation_cache=validation_cache)
+    if dedupe_pages and args.dedupe:
+        # Near-duplicates are dropped from the raw page text, before parsing
+        from topic_dedup import TopicDeduplicator
+        scraper.deduplicator = TopicDeduplicator(args.dedupe_threshold, policy=args.dedupe)
+    if getattr(args, 'deadline', None):
+        from fetch_policy import DeadlineFetcher
+        scraper.fetcher.close()
+        scraper.fetcher = DeadlineFetcher(scraper.session, deadline=args.deadline, hedge=not args.no_hedge)
+    return scraper
+
+
+def _save(scraper, args) -> None:
+    if args.dedupe and scraper.deduplicator is None:
+        from topic_dedup import TopicDeduplicator
+        scraper.remove_near_duplicates(TopicDeduplicator(args.dedupe_threshold, policy=args.dedupe))
+    if args.compress:
+        from framed_output import EXTENSIONS
+        output = args.output if args.output.endswith(EXTENSIONS[args.compress]) \
+            else args.output + EXTENSIONS[args.compress]
+        scraper.save_compressed(output, args.compress, granularity=args.granularity, codec=args.codec)
+    else:
+        scraper.save_to_json(args.output, granularity=args.granularity, codec=args.codec)
+    if args.sqlite:
+        scraper.save_to_sqlite(args.sqlite)
+    if scraper.memory_profiler is not None:
+        scraper.memory_profiler.write_report(args.profile_memory)
+
+
+def cmd_scrape(args) -> int:
+    scraper = _make_scraper(args, dedupe_pages=True)
+    try:
+        scraper.scrape_all_episodes(delay=args.delay)
+        _save(scraper, args)
+    finally:
+        scraper.close()
+    return 0
+
+
+def cmd_reparse(args) -> int:
+    scraper = _make_scraper(args, archive_required=True, dedupe_pages=True)
+    try:
+        scraper.reparse_archive()
+        _save(scraper, args)
+    finally:
+        scraper.close()
+    return 0
+
+
+def cmd_enqueue(args) -> int:
+    from work_queue import SqliteWorkQueue
+
+    queue = SqliteWorkQueue(args.queue, max_attempts=args.max_attempts)
+    scraper = _make_scraper(args)
+    try:
+        added = scraper.enqueue_episode_links(queue, requeue_done=args.requeue_done)
+        print(f"Queued {added} new links; {json.dumps(queue.stats())}")
+    finally:
+        scraper.close()
+        queue.close()
+    return 0
+
+
+def cmd_work(args) -> int:
+    from work_queue import SqliteWorkQueue
+
+    queue = SqliteWorkQueue(args.queue, max_attempts=args.max_attempts)
+    scraper = _make_scraper(args)
+    try:
+        completed = scraper.work_from_queue(queue, args.worker_id, delay=args.delay,
+                                            lease_seconds=args.lease_seconds)
+        if scraper.memory_profiler is not None:
+            scraper.memory_profiler.write_report(args.profile_memory)
+        print(f"Completed {completed} episodes; {json.dumps(queue.stats())}")
+    finally:
+        scraper.close()
+        queue.close()
+    return 0
+
+
+def cmd_collect(args) -> int:
+    from work_queue import SqliteWorkQueue
+
+    queue = SqliteWorkQueue(args.queue)
+    scraper = _make_scraper(args)
+    try:
+        if not queue.is_drained(scraper.base_url):
+            scraper.logger.warning("Queue still has pending or leased jobs; collecting a partial dataset")
+        scraper.collect_from_queue(queue)
+        _save(scraper, args)
+    finally:
+        scraper.close()
+        queue.close()
+    return 0
+
+
+def cmd_validate(args) -> int:
+    from transcript_validator import TranscriptValidator
+
+    if args.cache:
+        from validation_cache import IncrementalValidator, ValidationCache
+        validator = IncrementalValidator(ValidationCache(args.cache))
+    else:
+        validator = TranscriptValidator()
+    is_valid, results = validator.validate_dataset(_load_dataset(args.input))
+    for error in results['errors']:
+        print(f"ERROR: {error}")
+    if args.warnings:
+        for warning in results['warnings']:
+            print(f"WARNING: {warning}")
+    print(f"{'valid' if is_valid else 'INVALID'}: {len(results['errors'])} errors, "
+          f"{len(results['warnings'])} warnings")
+    return 0 if is_valid else 1
+
+
+def cmd_stats(args) -> int:
+    data = _load_dataset(args.input)
+    episodes = data.get('episodes', [])
+    speaker_lines: Counter = Counter()
+    context_lines = 0
+    for episode in episodes:
+        for entry in episode.get('dialogue', []):
+            if 'speaker' in entry:
+                speaker_lines[entry['speaker']] += 1
+            else:
+                context_lines += 1
+
+    print(f"episodes:        {len(episodes)}")
+    print(f"dialogue lines:  {sum(speaker_lines.values())}")
+    print(f"context lines:   {context_lines}")
+    print(f"unique speakers: {len(speaker_lines)}")
+    print(f"top {args.top} speakers:")
+    for speaker, count in speaker_lines.most_common(args.top):
+        print(f"  {speaker:<30} {count}")
+    return 0
+
+
+def cmd_export(args) -> int:
+    data = _load_dataset(args.input)
+    if args.format == 'partitioned':
+        from episode_catalog import EpisodeCatalog
+        EpisodeCatalog().write_partitioned(data, args.output)
+        count = len(data.get('episodes', []))
+    elif args.format == 'sqlite':
+        from sqlite_sink import SqliteSink
+        sink = SqliteSink(args.output)
+        try:
+            count = sink.write_episodes(data.get('episodes', []))
+        finally:
+            sink.close()
+    else:
+        count = 0
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for episode in data.get('episodes', []):
+                f.write(json.dumps(episode, ensure_ascii=False) + '\n')
+                count += 1
+    print(f"Exported {count} episodes to {args.output}")
+    return 0
+
+
+def cmd_renormalize(args) -> int:
+    from character_name_utils import CharacterNormalizer, renormalize_dataset
+
+    mappings = None
+    if args.mappings:
+        with open(args.mappings, 'r', encoding='utf-8') as f:
+            mappings = json.load(f)
+    data = renormalize_dataset(_load_dataset(args.input), CharacterNormalizer(mappings))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    print(f"Renormalized {len(data.get('episodes', []))} episodes to {args.output} "
+          f"({data.get('metadata', {}).get('unique_speakers')} speakers)")
+    return 0
+
+
+def cmd_serve(args) -> int:
+    from query_server import QueryServer
+
+    QueryServer(args.input, args.cache_size, args.reload_interval).run(args.host, args.port)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='dexter', description='Transcript scraper tools')
+    parser.add_argument('--log-file', default=None,
+                        help='Also log to this file (scrape and reparse default to scraper.log)')
+    parser.add_argument('--log-level', default='INFO')
+    parser.add_argument('--log-json', action='store_true', help='Write logs as JSON lines')
+    parser.add_argument('--timing', action='store_true',
+                        help='Report cold-start and total time on stderr')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_scraper_options(sub):
+        sub.add_argument('--forum-url', default=DEFAULT_FORUM_URL)
+        sub.add_argument('--archive', help='Raw page archive directory')
+        sub.add_argument('--parse-cache', help='Parse cache database')
+        sub.add_argument('--profile-memory', metavar='REPORT',
+                         help='Profile memory per stage and episode with tracemalloc and '
+                              'write a JSON report here (slow)')
+
+    def add_output_options(sub, output_default='dexter_transcripts.json'):
+        sub.add_argument('-o', '--output', default=output_default)
+        sub.add_argument('--validation-cache', help='Cache per-episode validation results here and '
+                                                    'only revalidate changed episodes')
+        sub.add_argument('--sqlite', help='Also write a SQLite database here')
+        sub.add_argument('--dedupe', choices=('first', 'latest', 'longest'),
+                         help='Drop near-duplicate transcripts, keeping one copy by this policy')
+        sub.add_argument('--dedupe-threshold', type=float, default=0.8)
+        sub.add_argument('--granularity', choices=('lines', 'turns'), default='lines',
+                         help='Write one record per line or per speaker turn')
+        sub.add_argument('--codec', choices=('json', 'orjson', 'msgspec'), default='json',
+                         help='JSON encoder for the output; orjson and msgspec write compact JSON')
+        sub.add_argument('--compress', choices=('zstd', 'gzip'),
+                         help='Write per-episode compressed frames with a seek table')
+
+    def add_fetch_options(sub):
+        sub.add_argument('--deadline', type=float, default=30.0,
+                         help='Total seconds allowed per page fetch, retries included')
+        sub.add_argument('--no-hedge', action='store_true',
+                         help='Never send a duplicate request for a fetch slower than p95')
+
+    scrape = subparsers.add_parser('scrape', help='Scrape a forum')
+    add_scraper_options(scrape)
+    add_output_options(scrape)
+    scrape.add_argument('--delay', type=float, default=2.5)
+    add_fetch_options(scrape)
+    scrape.set_defaults(func=cmd_scrape, writes_log=True)
+
+    reparse = subparsers.add_parser('reparse', help='Rebuild output from a raw page archive')
+    add_scraper_options(reparse)
+    add_output_options(reparse)
+    reparse.set_defaults(func=cmd_reparse, writes_log=True)
+
+    def add_queue_options(sub):
+        sub.add_argument('--queue', default='crawl_queue.sqlite', help='Shared work queue database')
+        sub.add_argument('--max-attempts', type=int, default=3,
+                         help='Attempts before a job is dead-lettered')
+
+    enqueue = subparsers.add_parser('enqueue', help='Queue a forum\'s topic links for workers')
+    enqueue.add_argument('--forum-url', default=DEFAULT_FORUM_URL)
+    enqueue.add_argument('--requeue-done', action='store_true',
+                         help='Queue links already scraped in an earlier crawl again')
+    enqueue.set_defaults(func=cmd_enqueue, archive=None, parse_cache=None)
+    add_queue_options(enqueue)
+
+    work = subparsers.add_parser('work', help='Scrape episodes leased from a shared work queue')
+    add_scraper_options(work)
+    add_queue_options(work)
+    work.add_argument('--worker-id', help='Defaults to host:pid')
+    work.add_argument('--lease-seconds', type=float, default=300)
+    work.add_argument('--delay', type=float, default=2.5)
+    add_fetch_options(work)
+    work.set_defaults(func=cmd_work, writes_log=True)
+
+    collect = subparsers.add_parser('collect', help='Merge the episodes stored by queue workers into one dataset')
+    collect.add_argument('--forum-url', default=DEFAULT_FORUM_URL)
+    collect.add_argument('--queue', default='crawl_queue.sqlite', help='Shared work queue database')
+    add_output_options(collect)
+    collect.set_defaults(func=cmd_collect, archive=None, parse_cache=None, writes_log=True)
+
+    validate = subparsers.add_parser('validate', help='Validate a scraped dataset')
+    validate.add_argument('input')
+    validate.add_argument('--warnings', action='store_true', help='Print warnings too')
+    validate.add_argument('--cache', help='Validation cache database; unchanged episodes are not revalidated')
+    validate.set_defaults(func=cmd_validate)
+
+    stats = subparsers.add_parser('stats', help='Summarize a scraped dataset')
+    stats.add_argument('input')
+    stats.add_argument('--top', type=int, default=10)
+    stats.set_defaults(func=cmd_stats)
+
+    export = subparsers.add_parser('export', help='Convert a scraped dataset')
+    export.add_argument('input')
+    export.add_argument('--format', choices=('sqlite', 'jsonl', 'partitioned'), default='jsonl')
+    export.add_argument('-o', '--output', required=True)
+    export.set_defaults(func=cmd_export)
+
+    renormalize = subparsers.add_parser('renormalize',
+                                        help='Re-apply a character name mapping to a scraped dataset')
+    renormalize.add_argument('input')
+    renormalize.add_argument('--mappings', help='JSON object of raw name -> canonical name '
+                                                '(defaults to the built-in Dexter table)')
+    renormalize.add_argument('-o', '--output', required=True)
+    renormalize.set_defaults(func=cmd_renormalize)
+
+    serve = subparsers.add_parser('serve', help='Serve a scraped dataset over a local HTTP API')
+    serve.add_argument('input', nargs='?', default='dexter_transcripts.json')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--cache-size', type=int, default=1024)
+    serve.add_argument('--reload-interval', type=float, default=2.0,
+                       help='Seconds between checks for a new scrape output')
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    log_file = args.log_file
+    if log_file is None and getattr(args, 'writes_log', False):
+        log_file = 'scraper.log'
+    setup_logging(log_file, getattr(logging, args.log_level.upper(), logging.INFO),
+                  json_format=args.log_json)
+
+    ready = time.perf_counter()
+    status = args.func(args)
+    if args.timing:
+        print(f"cold start {(ready - _START) * 1000:.1f} ms, "
+              f"total {(time.perf_counter() - _START) * 1000:.1f} ms", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# The season/episode marker anywhere in a topic title: "New Blood: 01x10 - Sins of the Father",
+# "08x11/12 - Remember the Monsters?", "01x01-02 - Pilot", "Dexter 01x01 - Pilot", "1x01 Pilot".
+# What precedes it is the series, what follows the name. A hyphen only joins episode
+# numbers when it is unspaced; "02x05 - 24" is episode 5, named "24".
+TITLE_PATTERN = re.compile(
+    r'(?<![0-9a-z])(?P<season>\d+)x(?P<episode>\d+)'
+    r'(?:(?:\s*[/&]\s*|-)(?P<last_episode>\d+)(?!\d))?',
+    re.IGNORECASE
+)
+# Separators between the series, the marker and the name
+_LEADING_SEPARATORS = re.compile(r'^[\s:\-\u2013\u2014]+')
+_TRAILING_SEPARATORS = re.compile(r'[\s:\-\u2013\u2014]+$')
+DEFAULT_SERIES = 'Dexter'
+# Most episodes one topic can cover; a wider "range" is not a multi-part episode
+MAX_EPISODES_PER_TOPIC = 3
+
+
+def topic_id(episode: Dict) -> str:
+    """Stable episode key: the forum topic id, ignoring session parameters."""
+    query = parse_qs(urlparse(episode.get('url', '')).query)
+    if 't' in query:
+        return query['t'][0]
+    return episode.get('url') or episode.get('title', '')
+
+
+def parse_title(title: str, default_series: str = DEFAULT_SERIES) -> Optional[Dict]:
+    """Parse series, season and episode numbers out of a forum topic title.
+
+    Returns None for titles without a season/episode marker.
+    """
+    title = title.strip()
+    match = TITLE_PATTERN.search(title)
+    if not match:
+        return None
+    episode = int(match.group('episode'))
+    last_episode = int(match.group('last_episode') or episode)
+    name_start = match.end()
+    if not episode <= last_episode < episode + MAX_EPISODES_PER_TOPIC:
+        last_episode = episode
+        if title[match.end('episode')] == '-':
+            # Not a multi-part episode; "02x05-24" is episode 5, named "24"
+            name_start = match.end('episode')
+    return {
+        'series': _TRAILING_SEPARATORS.sub('', title[:match.start()]) or default_series,
+        'season': int(match.group('season')),
+        'episode': episode,
+        'last_episode': last_episode,
+        'name': _LEADING_SEPARATORS.sub('', title[name_start:]).strip(),
+    }
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_') or 'unknown'
+
+
+class EpisodeCatalog:
+    """Sorted (series, season, episode) index over scraped episodes.
+
+    ``write_partitioned`` stores one file per series and season plus a
+    ``catalog.json`` index, so a consumer can resolve "seasons 2-4" through
+    the index and read only those partitions.
+    """
+
+    CATALOG_FILE = 'catalog.json'
+    UNSORTED = 'unsorted.json'
+
+    def __init__(self, default_series: str = DEFAULT_SERIES):
+        self.default_series = default_series
+        self.entries: List[Dict] = []
+        self.directory: Optional[Path] = None
+
+    @staticmethod
+    def sort_key(entry: Dict) -> Tuple:
+        return (entry['series'] or '', entry['season'] or 0, entry['episode'] or 0, entry['title'])
+
+    def build(self, episodes: Iterable[Dict]) -> List[Tuple[Dict, Dict]]:
+        """Index episodes and return (catalog entry, episode) pairs in sorted order."""
+        pairs = []
+        for episode in episodes:
+            parsed = parse_title(episode['title'], self.default_series)
+            entry = {
+                'series': parsed['series'] if parsed else None,
+                'season': parsed['season'] if parsed else None,
+                'episode': parsed['episode'] if parsed else None,
+                'last_episode': parsed['last_episode'] if parsed else None,
+                'name': parsed['name'] if parsed else episode['title'],
+                'title': episode['title'],
+                'url': episode['url'],
+            }
+            if parsed:
+                entry['partition'] = f"{_slug(parsed['series'])}/season_{parsed['season']:02d}.json"
+            else:
+                entry['partition'] = self.UNSORTED
+            pairs.append((entry, episode))
+
+        pairs.sort(key=lambda pair: self.sort_key(pair[0]))
+        self.entries = [entry for entry, _ in pairs]
+        return pairs
+
+    def write_partitioned(self, data: Dict, directory: str) -> Path:
+        """Write one JSON file per series/season and the catalog index.
+
+        Partitions listed by an earlier catalog in the directory that this
+        write does not produce are removed, so no stale season is left behind.
+        """
+        out_dir = self.directory = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        catalog_path = out_dir / self.CATALOG_FILE
+        previous = set()
+        if catalog_path.exists():
+            with catalog_path.open('r', encoding='utf-8') as f:
+                previous = {entry['partition'] for entry in json.load(f)['episodes']}
+
+        partitions: Dict[str, List[Dict]] = {}
+        for entry, episode in self.build(data['episodes']):
+            episodes = partitions.setdefault(entry['partition'], [])
+            entry['position'] = len(episodes)
+            episodes.append(episode)
+
+        for partition, episodes in partitions.items():
+            path = out_dir / partition
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open('w', encoding='utf-8') as f:
+                json.dump({'metadata': data.get('metadata', {}), 'episodes': episodes},
+                          f, ensure_ascii=False)
+
+        with catalog_path.open('w', encoding='utf-8') as f:
+            json.dump({'metadata': data.get('metadata', {}), 'episodes': self.entries},
+                      f, indent=2, ensure_ascii=False)
+
+        for partition in previous - set(partitions):
+            path = out_dir / partition
+            path.unlink(missing_ok=True)
+            if path.parent != out_dir and not any(path.parent.iterdir()):
+                path.parent.rmdir()
+        return catalog_path
+
+    @classmethod
+    def load(cls, directory: str) -> 'EpisodeCatalog':
+        catalog = cls()
+        with (Path(directory) / cls.CATALOG_FILE).open('r', encoding='utf-8') as f:
+            catalog.entries = json.load(f)['episodes']
+        catalog.directory = Path(directory)
+        return catalog
+
+    def select(self, series: Optional[str] = None, seasons: Optional[Iterable[int]] = None,
+               episodes: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Return catalog entries matching a series and season/episode range."""
+        seasons = set(seasons) if seasons is not None else None
+        episodes = set(episodes) if episodes is not None else None
+        return [
+            entry for entry in self.entries
+            if (series is None or (entry['series'] or '').lower() == series.lower())
+            and (seasons is None or entry['season'] in seasons)
+            and (episodes is None or entry['episode'] in episodes)
+        ]
+
+    def load_episodes(self, series: Optional[str] = None, seasons: Optional[Iterable[int]] = None,
+                      episodes: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Load only the partitions holding the selected episodes.
+
+        ``catalog.load_episodes('Dexter', range(2, 5))`` reads seasons 2-4.
+        """
+        selected = self.select(series, seasons, episodes)
+        loaded: Dict[str, List[Dict]] = {}
+        result = []
+        for entry in selected:
+            partition = entry['partition']
+            if partition not in loaded:
+                with (self.directory / partition).open('r', encoding='utf-8') as f:
+                    loaded[partition] = json.load(f)['episodes']
+            result.append(loaded[partition][entry['position']])
+        return result
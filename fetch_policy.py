@@ -0,0 +1,244 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, List, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DeadlineExceeded(requests.Timeout):
+    """A fetch did not complete within its total deadline."""
+
+
+class LatencyTracker:
+    """Rolling window of successful fetch latencies."""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self.lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self.lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class DeadlineFetcher:
+    """GET with a total deadline, hedged duplicates and a slow-page quarantine.
+
+    ``requests`` timeouts apply per socket operation, so a trickling server
+    can hold a call far past them. Here every attempt runs on a small thread
+    pool and the caller waits at most ``deadline`` seconds in total, retrying
+    failed attempts while time remains. Each pool thread has its own session,
+    copied from ``session`` but without urllib3 retries (the deadline governs
+    retrying), and each attempt's socket timeout is the time left, so an
+    abandoned attempt frees its thread soon after the deadline. Retries wait a jittered, exponentially
+    growing delay (``backoff`` seconds doubled per retry, at most
+    ``max_backoff``), cut short by the deadline. Once ``min_samples`` latencies have
+    been seen, an attempt still running after the ``hedge_quantile`` latency
+    gets one duplicate request, and whichever answers first wins.
+
+    A URL that times out ``quarantine_after`` times is quarantined;
+    :meth:`fetch` retries a page until it arrives or reaches that point.
+    Only real timeouts count: a page whose attempts got no free thread, or
+    that kept failing with 5xx or connection errors, is not slow.
+    Callers skip quarantined pages for now and call :meth:`drain_quarantine`
+    at the end of a run to retry them with ``quarantine_deadline``.
+    """
+
+    def __init__(self, session: requests.Session, deadline: float = 30.0, connect_timeout: float = 5.0,
+                 hedge: bool = True, hedge_quantile: float = 0.95, min_samples: int = 20,
+                 max_attempts: int = 3, quarantine_after: int = 2,
+                 quarantine_deadline: Optional[float] = None, workers: int = 4,
+                 backoff: float = 0.5, max_backoff: float = 8.0):
+        self.session = session
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.max_attempts = max_attempts
+        self.quarantine_after = quarantine_after
+        self.quarantine_deadline = quarantine_deadline or deadline * 3
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.latencies = LatencyTracker()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch')
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+        self.timeouts: Dict[str, int] = {}
+        self.quarantine: Set[str] = set()
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'deadline_misses': 0,
+                      'quarantined': 0, 'pool_waits': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def _thread_session(self) -> requests.Session:
+        """The calling pool thread's session; requests.Session is not thread-safe."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.session.headers)
+            session.cookies.update(self.session.cookies)
+            adapter = HTTPAdapter(max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _attempt(self, url: str, expires: float) -> requests.Response:
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            # Queued behind other attempts until the deadline passed; never sent
+            raise DeadlineExceeded(f"{url} got no fetch thread before its deadline")
+        start = time.perf_counter()
+        response = self._thread_session().get(
+            url, timeout=(min(self.connect_timeout, remaining), remaining))
+        response.raise_for_status()
+        self.latencies.record(time.perf_counter() - start)
+        return response
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.hedge or len(self.latencies) < self.min_samples:
+            return None
+        return self.latencies.quantile(self.hedge_quantile)
+
+    def _backoff(self, retry: int, remaining: float) -> None:
+        """Wait before retry number ``retry`` (from 1), never past ``remaining`` seconds."""
+        cap = min(self.max_backoff, self.backoff * 2 ** (retry - 1))
+        # Half fixed, half random, so retries are always spaced but not in lockstep
+        delay = cap / 2 + random.uniform(0, cap / 2)
+        time.sleep(max(0.0, min(delay, remaining)))
+
+    def get(self, url: str, deadline: Optional[float] = None) -> requests.Response:
+        """Fetch ``url`` within ``deadline`` seconds or raise DeadlineExceeded.
+
+        HTTP 4xx errors are raised at once; timeouts, connection errors and
+        5xx responses are retried while the deadline allows. If the deadline
+        runs out after errors rather than timeouts, the last error is raised.
+        """
+        deadline = deadline or self.deadline
+        expires = time.monotonic() + deadline
+        last_error: Optional[Exception] = None
+        timed_out = False
+
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._backoff(attempt, expires - time.monotonic())
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            self.stats['requests'] += 1
+            primary = self.executor.submit(self._attempt, url, expires)
+            futures: List[Future] = [primary]
+
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and hedge_delay < remaining:
+                done, _ = wait(futures, timeout=hedge_delay)
+                if not done:
+                    self.stats['hedged'] += 1
+                    futures.append(self.executor.submit(self._attempt, url, expires))
+
+            while futures:
+                done, _ = wait(futures, timeout=max(0.0, expires - time.monotonic()),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    futures.remove(future)
+                    try:
+                        response = future.result()
+                    except DeadlineExceeded:
+                        continue
+                    except requests.HTTPError as e:
+                        if e.response is not None and e.response.status_code < 500:
+                            raise
+                        last_error = e
+                        continue
+                    except requests.Timeout as e:
+                        timed_out = True
+                        last_error = e
+                        continue
+                    except requests.RequestException as e:
+                        last_error = e
+                        continue
+                    if future is not primary:
+                        self.stats['hedge_wins'] += 1
+                    for other in futures:
+                        other.cancel()
+                    self.timeouts.pop(url, None)
+                    return response
+            if futures:
+                # Deadline reached with attempts still in flight. Queued ones are cancelled;
+                # running ones end at their socket timeout, and they are what makes the page slow
+                for other in futures:
+                    if not other.cancel():
+                        timed_out = True
+                break
+
+        if not timed_out:
+            if last_error is not None:
+                raise last_error
+            # Every attempt waited for a thread: the pool is busy, the page is not slow
+            self.stats['pool_waits'] += 1
+            raise DeadlineExceeded(f"{url} got no fetch thread within {deadline:.1f}s")
+        self.stats['deadline_misses'] += 1
+        misses = self.timeouts[url] = self.timeouts.get(url, 0) + 1
+        if misses >= self.quarantine_after and url not in self.quarantine:
+            self.quarantine.add(url)
+            self.stats['quarantined'] += 1
+            self.logger.warning("Quarantined slow page %s after %d missed deadlines", url, misses)
+        raise DeadlineExceeded(f"{url} not fetched within {deadline:.1f}s"
+                               + (f" (last error: {last_error})" if last_error else ''))
+
+    def fetch(self, url: str, deadline: Optional[float] = None) -> requests.Response:
+        """Like :meth:`get`, but a missed deadline is retried until the URL is quarantined.
+
+        With ``quarantine_after`` above one, a single slow response gets
+        another full deadline (after a backoff) instead of being lost. At most
+        ``quarantine_after`` deadlines are spent on the page.
+        """
+        tries = max(1, self.quarantine_after)
+        for misses in range(1, tries + 1):
+            try:
+                return self.get(url, deadline)
+            except DeadlineExceeded:
+                if self.is_quarantined(url) or misses == tries:
+                    raise
+                self.logger.info("Missed deadline for %s, retrying", url)
+                self._backoff(misses, deadline or self.deadline)
+
+    def is_quarantined(self, url: str) -> bool:
+        return url in self.quarantine
+
+    def release(self, url: str) -> None:
+        """Take a URL out of quarantine, e.g. because it is being retried right away."""
+        self.quarantine.discard(url)
+
+    def drain_quarantine(self) -> List[str]:
+        """Return and clear the quarantined URLs, for a final retry pass."""
+        urls = sorted(self.quarantine)
+        self.quarantine.clear()
+        return urls
+
+    def close(self) -> None:
+        """Cancel queued attempts and close the per-thread sessions."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,190 @@
+import gzip
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard as zstd
+except ImportError:  # gzip frames are always available
+    zstd = None
+
+from episode_catalog import parse_title, topic_id
+from records import get_codec
+
+COMPRESSIONS = ('zstd', 'gzip')
+EXTENSIONS = {'zstd': '.zst', 'gzip': '.gz'}
+
+
+def seek_table_path(path: str) -> Path:
+    return Path(str(path) + '.seek.json')
+
+
+def _compressor(compression: str, level: int):
+    if compression == 'zstd':
+        if zstd is None:
+            raise RuntimeError("zstd output needs the zstandard package")
+        # One compressor per frame: ZstdCompressor instances are not thread-safe
+        return lambda data: zstd.ZstdCompressor(level=level).compress(data)
+    return lambda data: gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _decompress(compression: str, frame: bytes) -> bytes:
+    if compression == 'zstd':
+        if zstd is None:
+            raise RuntimeError("Reading zstd output needs the zstandard package")
+        return zstd.ZstdDecompressor().decompress(frame)
+    return gzip.decompress(frame)
+
+
+class FramedOutputWriter:
+    """Writes a dataset as independently compressed frames, one per episode.
+
+    The frames hold consecutive pieces of one JSON document, so the whole
+    file still decompresses with plain ``zstd -d`` or ``gunzip`` (both accept
+    concatenated frames). A sidecar seek table records every episode frame's
+    offset, length, topic id and parsed title, which lets
+    :class:`FramedOutputReader` fetch single episodes. Compression runs on a
+    thread pool (zstd and zlib release the GIL). At most ``max_pending``
+    frames are in flight, and they are written in submission order.
+
+    The seek table is only written by :meth:`close`. A writer that is
+    aborted, or whose ``with`` block raises, leaves a file without its
+    closing frame and without a seek table, which readers refuse.
+    """
+
+    def __init__(self, path: str, compression: str = 'zstd', level: int = 3,
+                 workers: int = 4, max_pending: int = 32, codec: str = 'json'):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.compress = _compressor(compression, level)
+        self.codec = get_codec(codec)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compress')
+        self.max_pending = max_pending
+        self.pending: Deque[Tuple[Dict, Future]] = deque()
+        self.frames: List[Dict] = []
+        self.episode_count = 0
+        # A seek table from an earlier run would describe frames this run overwrites
+        seek_table_path(self.path).unlink(missing_ok=True)
+        self.file = self.path.open('wb')
+        self._submit({'kind': 'header'}, b'{"episodes": [')
+
+    def _submit(self, entry: Dict, data: bytes) -> None:
+        entry['raw_length'] = len(data)
+        self.pending.append((entry, self.executor.submit(self.compress, data)))
+        while len(self.pending) > self.max_pending:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        entry, future = self.pending.popleft()
+        frame = future.result()
+        entry['offset'] = self.file.tell()
+        entry['length'] = len(frame)
+        self.file.write(frame)
+        self.frames.append(entry)
+
+    def write_episode(self, episode: Dict) -> None:
+        # Encoding happens here, serialized on the caller's thread; only compression is parallel
+        data = (b',' if self.episode_count else b'') + self.codec.encode(episode)
+        entry = {'kind': 'episode', 'index': self.episode_count, 'topic_id': topic_id(episode),
+                 'title': episode.get('title'), 'parsed_title': parse_title(episode.get('title') or '')}
+        self.episode_count += 1
+        self._submit(entry, data)
+
+    def write_episodes(self, episodes: Iterable[Dict]) -> int:
+        for episode in episodes:
+            self.write_episode(episode)
+        return self.episode_count
+
+    def close(self, metadata: Optional[Dict] = None) -> Path:
+        """Write the closing frame and the seek table; returns the seek table path."""
+        self._submit({'kind': 'trailer'},
+                     b'], "metadata": ' + self.codec.encode(metadata or {}) + b'}')
+        while self.pending:
+            self._write_next()
+        self.file.close()
+        self.executor.shutdown()
+
+        table_path = seek_table_path(self.path)
+        with table_path.open('w', encoding='utf-8') as f:
+            json.dump({'compression': self.compression, 'metadata': metadata or {},
+                       'frames': self.frames}, f, ensure_ascii=False)
+        return table_path
+
+    def abort(self) -> None:
+        """Stop writing without the closing frame or seek table."""
+        for _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.file.close()
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> 'FramedOutputWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.file.closed:
+            return
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class FramedOutputReader:
+    """Random access to episodes in a file written by :class:`FramedOutputWriter`."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with seek_table_path(path).open('r', encoding='utf-8') as f:
+            table = json.load(f)
+        self.compression = table['compression']
+        self.metadata = table['metadata']
+        self.frames = [frame for frame in table['frames'] if frame['kind'] == 'episode']
+        self.by_topic = {frame['topic_id']: frame for frame in self.frames}
+
+    def select(self, series: Optional[str] = None, seasons: Optional[Iterable[int]] = None,
+               episodes: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Seek table entries matching a series / season / episode filter.
+
+        Series names match case-insensitively, as in the episode catalog.
+        """
+        seasons = set(seasons) if seasons is not None else None
+        episodes = set(episodes) if episodes is not None else None
+        selected = []
+        for frame in self.frames:
+            parsed = frame['parsed_title']
+            if parsed is None:
+                if series is None and seasons is None and episodes is None:
+                    selected.append(frame)
+                continue
+            if series is not None and parsed['series'].lower() != series.lower():
+                continue
+            if seasons is not None and parsed['season'] not in seasons:
+                continue
+            if episodes is not None and parsed['episode'] not in episodes:
+                continue
+            selected.append(frame)
+        return selected
+
+    def iter_episodes(self, frames: Optional[Iterable[Dict]] = None) -> Iterator[Dict]:
+        """Decompress only the given frames (all by default), in file order."""
+        frames = sorted(self.frames if frames is None else frames, key=lambda frame: frame['offset'])
+        with self.path.open('rb') as f:
+            for frame in frames:
+                f.seek(frame['offset'])
+                data = _decompress(self.compression, f.read(frame['length']))
+                yield json.loads(data[1:] if data.startswith(b',') else data)
+
+    def read_episode(self, key: str) -> Optional[Dict]:
+        frame = self.by_topic.get(key)
+        if frame is None:
+            return None
+        return next(self.iter_episodes([frame]))
+
+    def read_all(self) -> Dict:
+        return {'metadata': self.metadata, 'episodes': list(self.iter_episodes())}
@@ -0,0 +1,121 @@
+import argparse
+import codecs
+import re
+import time
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE
+)
+# A charset declared in <meta> has to appear near the top of the document
+META_SNIFF_BYTES = 4096
+
+
+def normalize_encoding(name: str) -> Optional[str]:
+    """Return Python's canonical codec name, or None if it is unknown."""
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+
+class EncodingResolver:
+    """Determines page encodings without statistical charset detection.
+
+    The charset is taken from the Content-Type header, then from a ``<meta>``
+    tag in the first few KB of the page. Decisions taken from ``<meta>`` are
+    cached per host, since every page of a forum is served the same way, so
+    later pages of that host skip the sniff too.
+    """
+
+    def __init__(self, default: str = 'utf-8'):
+        self.default = default
+        self.host_encodings: Dict[str, str] = {}
+
+    def from_headers(self, headers: Optional[Mapping[str, str]]) -> Optional[str]:
+        if not headers:
+            return None
+        content_type = headers.get('Content-Type') or headers.get('content-type') or ''
+        match = HEADER_CHARSET_PATTERN.search(content_type)
+        return normalize_encoding(match.group(1)) if match else None
+
+    def from_meta(self, body: bytes) -> Optional[str]:
+        match = META_CHARSET_PATTERN.search(body[:META_SNIFF_BYTES])
+        return normalize_encoding(match.group(1).decode('ascii', 'ignore')) if match else None
+
+    def resolve(self, url: str, headers: Optional[Mapping[str, str]], body: bytes) -> str:
+        """Return the encoding to decode ``body`` with."""
+        encoding = self.from_headers(headers)
+        if encoding:
+            return encoding
+
+        host = urlparse(url).netloc
+        encoding = self.host_encodings.get(host)
+        if encoding:
+            return encoding
+
+        encoding = self.from_meta(body)
+        if encoding:
+            self.host_encodings[host] = encoding
+            return encoding
+        return self.default
+
+
+def _requests_text_encoding(headers: Mapping[str, str], body: bytes) -> str:
+    """Pick the encoding the way ``response.text`` does, for comparison."""
+    from requests.utils import get_encoding_from_headers
+    encoding = get_encoding_from_headers(headers)
+    if encoding is None:
+        import charset_normalizer
+        best = charset_normalizer.from_bytes(body).best()
+        encoding = best.encoding if best else 'utf-8'
+    return encoding
+
+
+def benchmark_decoding(archive_dir: str, repeat: int = 3) -> Dict[str, float]:
+    """Time the response.text path against EncodingResolver on archived pages."""
+    from bs4 import BeautifulSoup
+    from raw_page_archive import RawPageArchive
+
+    pages = [(record, body) for record, body in RawPageArchive(archive_dir).iter_pages()]
+    if not pages:
+        raise ValueError(f"No archived pages found in {archive_dir}")
+
+    def run_text_path():
+        for record, body in pages:
+            encoding = _requests_text_encoding(record['headers'], body)
+            BeautifulSoup(body.decode(encoding, errors='replace'), 'html.parser')
+
+    def run_resolver_path():
+        resolver = EncodingResolver()
+        for record, body in pages:
+            encoding = resolver.resolve(record['url'], record['headers'], body)
+            BeautifulSoup(body, 'html.parser', from_encoding=encoding)
+
+    results = {'pages': len(pages)}
+    for name, func in (('response_text', run_text_path), ('resolver', run_resolver_path)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        results[f'{name}_seconds'] = best
+    results['speedup'] = results['response_text_seconds'] / results['resolver_seconds']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page decoding on archived pages')
+    parser.add_argument('archive_dir', nargs='?', default='raw_pages')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = benchmark_decoding(args.archive_dir, args.repeat)
+    print(f"{results['pages']} pages: response.text path {results['response_text_seconds']:.3f}s, "
+          f"resolver path {results['resolver_seconds']:.3f}s ({results['speedup']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
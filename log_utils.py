@@ -0,0 +1,151 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_repeat_filter: Optional['RepeatedMessageFilter'] = None
+
+# Arguments of these types cannot change before the listener formats the record
+_IMMUTABLE_ARGS = (str, int, float, bool, bytes, type(None))
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RepeatedMessageFilter(logging.Filter):
+    """Lets through the first few records per message template, counts the rest.
+
+    Templates are the un-interpolated ``%``-style message, so thousands of
+    validation warnings that differ only in their line number collapse into
+    one counter instead of thousands of writes.
+    """
+
+    def __init__(self, limit: int = 5, level: int = logging.WARNING):
+        super().__init__()
+        self.limit = limit
+        self.level = level
+        self.counts: Dict[Tuple[str, int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != self.level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        with self._lock:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        return count <= self.limit
+
+    def summary_records(self):
+        """Yield one record per template that had messages suppressed."""
+        for (name, level, template), count in self.counts.items():
+            if count > self.limit:
+                yield logging.LogRecord(
+                    name, level, __file__, 0,
+                    'Suppressed %d more messages like: %s', (count - self.limit, template), None
+                )
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Defers formatting to the listener thread where that is safe.
+
+    Records whose arguments are all immutable scalars are enqueued as they
+    are. Anything else (a stats dict the scraper keeps updating, say) is
+    interpolated now, so the log shows the value at the time of the call.
+    Tracebacks are always rendered here, while the frames still exist.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        deferrable = not args or (isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARGS)
+                                                                    for arg in args))
+        if deferrable and not record.exc_info:
+            return record
+        record = copy.copy(record)
+        if not deferrable:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def stop_logging() -> None:
+    """Flush queued records, report suppressed repeats and close the handlers."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    _listener.stop()
+    if _repeat_filter is not None:
+        for record in _repeat_filter.summary_records():
+            for handler in _listener.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def setup_logging(log_file: Optional[str] = 'scraper.log', level: int = logging.INFO,
+                  json_format: bool = False, repeat_limit: Optional[int] = 5) -> None:
+    """Configure root logging once, at a program's entry point.
+
+    Records are put on a queue and written by a background QueueListener, so
+    neither the file nor the terminal can stall the scrape loop. Library
+    classes only ask for their logger; opening scraper.log is left to the
+    commands that actually scrape.
+    """
+    global _listener, _queue_handler, _repeat_filter
+    stop_logging()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.insert(0, logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    _repeat_filter = RepeatedMessageFilter(repeat_limit) if repeat_limit else None
+    if _repeat_filter is not None:
+        _queue_handler.addFilter(_repeat_filter)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+STAGES = ('fetch', 'soup', 'extract', 'parse', 'save')
+PARSE_STAGES = ('soup', 'extract', 'parse')
+
+# Robust z-score (median absolute deviation) above which an episode is flagged
+OUTLIER_THRESHOLD = 3.5
+
+_IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>',
+                  '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+def current_rss_kb() -> int:
+    """Resident set size of this process in KiB."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        # Not Linux; the lifetime maximum is the best available figure
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class MemoryProfiler:
+    """Per-stage tracemalloc profiling of a scrape.
+
+    Every stage (fetch, soup, extract, parse, save) is bracketed by
+    tracemalloc snapshots. What a stage left allocated is attributed to
+    source lines and summed over the run. Each episode records the traced
+    peak of every stage and the RSS sampled at stage boundaries. Episodes
+    whose soup+extract+parse peak is a robust outlier are flagged. Profiling
+    slows scraping considerably, so it is only enabled on request.
+    """
+
+    def __init__(self, top_lines: int = 15, nframes: int = 1):
+        self.top_lines = top_lines
+        self.logger = logging.getLogger(__name__)
+        self.line_growth: Dict[str, Counter] = {stage: Counter() for stage in STAGES}
+        self.line_blocks: Dict[str, Counter] = {stage: Counter() for stage in STAGES}
+        self.stage_totals: Dict[str, Dict[str, float]] = {}
+        self.episodes: List[Dict] = []
+        # Last record of each URL, for blocks that resume it
+        self._latest: Dict[str, Dict] = {}
+        self._episode: Optional[Dict] = None
+        self._filters = [tracemalloc.Filter(False, name) for name in _IGNORED_FILES]
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(nframes)
+        self.started_rss_kb = current_rss_kb()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    @contextmanager
+    def episode(self, url: str, resume: bool = False) -> Iterator[Dict]:
+        """Group the stages run inside the block under one episode.
+
+        With ``resume`` the stages are added to the URL's last episode
+        record instead, e.g. when a page extracted earlier is parsed later.
+        """
+        record = self._latest.get(url) if resume else None
+        resumed = record is not None
+        if not resumed:
+            record = {'url': url, 'stages': {}, 'rss_before_kb': current_rss_kb()}
+            record['rss_peak_kb'] = record['rss_before_kb']
+        self._episode = record
+        try:
+            yield record
+        finally:
+            self._episode = None
+            record['rss_after_kb'] = current_rss_kb()
+            record['rss_peak_kb'] = max(record['rss_peak_kb'], record['rss_after_kb'])
+            record['traced_after_bytes'] = tracemalloc.get_traced_memory()[0]
+            if not resumed:
+                self.episodes.append(record)
+                self._latest[url] = record
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        before = self._snapshot()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            traced_after, traced_peak = tracemalloc.get_traced_memory()
+            after = self._snapshot()
+            for stat in after.compare_to(before, 'lineno'):
+                if stat.size_diff:
+                    frame = stat.traceback[0]
+                    key = f'{frame.filename}:{frame.lineno}'
+                    self.line_growth[name][key] += stat.size_diff
+                    self.line_blocks[name][key] += stat.count_diff
+
+            totals = self.stage_totals.setdefault(name, {
+                'calls': 0, 'seconds': 0.0, 'retained_bytes': 0, 'max_peak_bytes': 0})
+            totals['calls'] += 1
+            totals['seconds'] += seconds
+            totals['retained_bytes'] += traced_after - traced_before
+            totals['max_peak_bytes'] = max(totals['max_peak_bytes'], traced_peak - traced_before)
+
+            if self._episode is not None:
+                rss = current_rss_kb()
+                self._episode['stages'][name] = {
+                    'seconds': seconds,
+                    'peak_bytes': traced_peak - traced_before,
+                    'retained_bytes': traced_after - traced_before,
+                    'rss_kb': rss,
+                }
+                self._episode['rss_peak_kb'] = max(self._episode['rss_peak_kb'], rss)
+
+    def outliers(self) -> List[Dict]:
+        """Episodes whose parse-side peak memory is far above the median.
+
+        Episodes are compared only with others that ran the same parse-side
+        stages. Parse cache hits skip some or all of them: a dialogue hit runs
+        none and is left out, and a line hit, which runs only ``parse``, is
+        compared with other line hits rather than with full parses.
+        """
+        groups: Dict[tuple, List[tuple]] = {}
+        for record in self.episodes:
+            ran = tuple(stage for stage in PARSE_STAGES if stage in record['stages'])
+            if ran:
+                cost = sum(record['stages'][stage]['peak_bytes'] for stage in ran)
+                groups.setdefault(ran, []).append((record, cost))
+
+        flagged = []
+        for ran, members in groups.items():
+            if len(members) < 3:
+                continue
+            costs = [cost for _, cost in members]
+            median = statistics.median(costs)
+            mad = statistics.median(abs(cost - median) for cost in costs) or 1
+            for record, cost in members:
+                score = 0.6745 * (cost - median) / mad
+                if score > OUTLIER_THRESHOLD:
+                    flagged.append({'url': record['url'], 'parse_peak_bytes': cost,
+                                    'stages': list(ran), 'robust_z': round(score, 2)})
+        return flagged
+
+    def report(self) -> Dict:
+        top = {}
+        for stage in STAGES:
+            top[stage] = [
+                {'line': key, 'retained_bytes': size, 'blocks': self.line_blocks[stage][key]}
+                for key, size in self.line_growth[stage].most_common(self.top_lines) if size > 0
+            ]
+        return {
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'rss_start_kb': self.started_rss_kb,
+            'rss_end_kb': current_rss_kb(),
+            'rss_max_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'stages': self.stage_totals,
+            'top_lines': top,
+            'episodes': self.episodes,
+            'outliers': self.outliers(),
+        }
+
+    def write_report(self, path: str) -> Dict:
+        report = self.report()
+        output_path = Path(path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open('w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        for outlier in report['outliers']:
+            self.logger.warning("Memory outlier %s: parse peak %d bytes (z=%.1f)",
+                                outlier['url'], outlier['parse_peak_bytes'], outlier['robust_z'])
+        self.logger.info("Memory profile written to %s (RSS %d -> %d KiB)",
+                         path, report['rss_start_kb'], report['rss_end_kb'])
+        return report
+
+    def stop(self) -> None:
+        """Stop tracing, if this profiler started it."""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
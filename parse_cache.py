@@ -0,0 +1,123 @@
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+@lru_cache(maxsize=None)
+def _function_source_hash(func: Callable) -> str:
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def code_fingerprint(*funcs: Callable) -> str:
+    """Fingerprint a group of functions by their source code."""
+    digest = hashlib.sha256()
+    for func in funcs:
+        func = getattr(func, '__func__', func)
+        digest.update(_function_source_hash(func).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def mapping_fingerprint(mappings: Dict[str, str], *funcs: Callable) -> str:
+    """Fingerprint a lookup table together with the code that applies it."""
+    digest = hashlib.sha256(json.dumps(mappings, sort_keys=True).encode('utf-8'))
+    digest.update(code_fingerprint(*funcs).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+
+def page_hash(html) -> str:
+    """Hash raw page content the same way the raw page archive does."""
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    return hashlib.sha256(html).hexdigest()
+
+
+class ParseCache:
+    """Memoizes episode parsing across reparse runs.
+
+    Two levels are kept, so a change only invalidates the work it affects:
+
+    * extracted lines, keyed on (page hash, extraction code fingerprint) --
+      the expensive HTML parse;
+    * dialogue, keyed additionally on the line parser and normalizer table
+      fingerprints -- recomputed from cached lines when ``parse_line`` or the
+      record types change, and only renormalized when just
+      ``CharacterNormalizer.name_mappings`` changed.
+    """
+
+    def __init__(self, path: str = 'parse_cache.sqlite'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by parser threads, so access is serialized through a lock
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS extracted (
+                page_hash TEXT NOT NULL,
+                extract_fp TEXT NOT NULL,
+                title TEXT NOT NULL,
+                lines TEXT NOT NULL,
+                PRIMARY KEY (page_hash, extract_fp)
+            );
+            CREATE TABLE IF NOT EXISTS dialogue (
+                page_hash TEXT NOT NULL,
+                extract_fp TEXT NOT NULL,
+                line_fp TEXT NOT NULL,
+                normalizer_fp TEXT NOT NULL,
+                dialogue TEXT NOT NULL,
+                PRIMARY KEY (page_hash, extract_fp, line_fp, normalizer_fp)
+            );
+        """)
+        self.stats = {'dialogue_hits': 0, 'renormalized': 0, 'line_hits': 0, 'misses': 0}
+
+    def get_lines(self, page: str, extract_fp: str) -> Optional[Tuple[str, List[str]]]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT title, lines FROM extracted WHERE page_hash = ? AND extract_fp = ?',
+                (page, extract_fp)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def put_lines(self, page: str, extract_fp: str, title: str, lines: List[str]) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO extracted VALUES (?, ?, ?, ?)',
+                (page, extract_fp, title, json.dumps(lines, ensure_ascii=False))
+            )
+
+    def get_dialogue(self, page: str, extract_fp: str, line_fp: str,
+                     normalizer_fp: str) -> Optional[Tuple[str, List[Dict]]]:
+        """Cached dialogue for a page parsed by the same line parser.
+
+        Returns ``(normalizer_fp, dialogue)``, preferring the entry for the
+        given normalizer table. An entry for another table only needs its
+        speakers renormalized.
+        """
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT normalizer_fp, dialogue FROM dialogue WHERE page_hash = ? AND extract_fp = ? '
+                'AND line_fp = ? ORDER BY normalizer_fp = ? DESC LIMIT 1',
+                (page, extract_fp, line_fp, normalizer_fp)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put_dialogue(self, page: str, extract_fp: str, line_fp: str,
+                     normalizer_fp: str, dialogue: List[Dict]) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO dialogue VALUES (?, ?, ?, ?, ?)',
+                (page, extract_fp, line_fp, normalizer_fp, json.dumps(dialogue, ensure_ascii=False))
+            )
+
+    def close(self) -> None:
+        self.conn.close()
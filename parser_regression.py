@@ -0,0 +1,255 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
+
+from log_utils import setup_logging
+
+VERSIONS = ('v1', 'v2', 'v3', 'old_parse_line')
+DEFAULT_RESULTS = 'parser_benchmarks.json'
+
+logger = logging.getLogger(__name__)
+
+
+def _load_old_parse_line():
+    """Load the free ``parse_line`` function kept in old_parse_line.py.
+
+    The file has no imports of its own, so it is executed with the names its
+    annotations need.
+    """
+    from typing import Dict, Optional
+
+    path = Path(__file__).with_name('old_parse_line.py')
+    namespace = {'Dict': Dict, 'Optional': Optional}
+    exec(compile(path.read_text(encoding='utf-8'), str(path), 'exec'), namespace)
+    return namespace['parse_line']
+
+
+def _make_parser(version: str):
+    """Build a scraper for one version plus its (extract, parse) callables.
+
+    v1 and v2 have no separate extraction step, so their ``parse_episode``
+    soup handling is reproduced on decoded text, as they would have seen it
+    from ``response.text``.
+    """
+    from bs4 import BeautifulSoup
+
+    if version in ('v1', 'v2'):
+        module = __import__(f'darkly_speaking_dexter_{version}')
+        # Their constructors configure logging with a FileHandler on scraper.log, which
+        # opens the file even when basicConfig then does nothing; logging is already set up here
+        with mock.patch.object(logging, 'basicConfig'), mock.patch.object(logging, 'FileHandler'):
+            scraper = module.DexterScraper()
+
+        def extract(body: bytes, url: str, encoding: str) -> Optional[List[str]]:
+            soup = BeautifulSoup(body.decode(encoding, errors='replace'), 'html.parser')
+            content = soup.find('div', class_='content') or soup.find('div', class_='postbody')
+            return scraper.process_html_content(content) if content else None
+    else:
+        from darkly_speaking_dexter_v3 import DexterScraper
+
+        scraper = DexterScraper()
+        if version == 'old_parse_line':
+            scraper.parse_line = _load_old_parse_line().__get__(scraper)
+            # Word lists the old parser expects; the tree never defined them
+            scraper.action_words, scraper.sound_effect_words = [], []
+
+        def extract(body: bytes, url: str, encoding: str) -> Optional[List[str]]:
+            extracted = scraper.extract_episode_lines(body, url, encoding)
+            return extracted[1] if extracted else None
+
+    def parse(lines: List[str]) -> List[Dict]:
+        scraper.current_speaker = None
+        scraper.context_buffer = []
+        dialogue = []
+        for line_number, line in enumerate(lines, 1):
+            parsed = scraper.parse_line(line, line_number)
+            if parsed:
+                dialogue.append(parsed)
+        return dialogue
+
+    return extract, parse
+
+
+def _load_pages(archive_dir: str, limit: Optional[int] = None) -> List[Tuple[str, bytes, str]]:
+    from html_decoding import EncodingResolver
+    from raw_page_archive import RawPageArchive
+
+    resolver = EncodingResolver()
+    pages = []
+    for record, body in RawPageArchive(archive_dir).iter_pages():
+        encoding = record.get('encoding') or resolver.resolve(record['url'], record['headers'], body)
+        pages.append((record['url'], body, encoding))
+        if limit is not None and len(pages) >= limit:
+            break
+    return pages
+
+
+def run_version(version: str, archive_dir: str, repeat: int = 3,
+                limit: Optional[int] = None) -> Dict:
+    """Benchmark one parser version; meant to run in a fresh process.
+
+    Returns timings (best of ``repeat``), tracemalloc allocation figures from
+    a separate traced pass, the process's peak RSS and the dialogue produced
+    for every page.
+    """
+    pages = _load_pages(archive_dir, limit)
+    extract, parse = _make_parser(version)
+
+    # old_parse_line prints every line it handles
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        best = float('inf')
+        outputs: Dict[str, List[Dict]] = {}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for url, body, encoding in pages:
+                lines = extract(body, url, encoding)
+                outputs[url] = parse(lines) if lines is not None else []
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        page_peaks = []
+        allocated_blocks = 0
+        try:
+            for url, body, encoding in pages:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                snapshot_start = tracemalloc.take_snapshot()
+                lines = extract(body, url, encoding)
+                if lines is not None:
+                    parse(lines)
+                page_peaks.append(tracemalloc.get_traced_memory()[1] - before)
+                stats = tracemalloc.take_snapshot().compare_to(snapshot_start, 'filename')
+                allocated_blocks += sum(max(stat.count_diff, 0) for stat in stats)
+        finally:
+            tracemalloc.stop()
+
+    total_lines = sum(len(dialogue) for dialogue in outputs.values())
+    return {
+        'version': version,
+        'pages': len(pages),
+        'seconds': best,
+        'pages_per_second': len(pages) / best if best else 0.0,
+        'lines_per_second': total_lines / best if best else 0.0,
+        'dialogue_lines': total_lines,
+        'peak_traced_bytes': max(page_peaks, default=0),
+        'mean_traced_bytes': sum(page_peaks) / len(page_peaks) if page_peaks else 0,
+        'retained_blocks': allocated_blocks,
+        # ru_maxrss is KiB on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'output_digest': hashlib.sha256(json.dumps(outputs, sort_keys=True).encode('utf-8')).hexdigest(),
+        'outputs': outputs,
+    }
+
+
+def _diff_outputs(reference: Dict[str, List[Dict]], other: Dict[str, List[Dict]]) -> Dict:
+    from dataset_diff import DatasetDiff
+
+    def as_dataset(outputs):
+        return {'episodes': [{'title': url, 'url': url, 'dialogue': dialogue}
+                             for url, dialogue in outputs.items()]}
+
+    result = DatasetDiff(as_dataset(reference), as_dataset(other)).diff()
+    return {'summary': result['summary'],
+            'changed_pages': sorted(tid for tid, ep in result['episodes'].items() if ep['op'] == 'modified')}
+
+
+def compare_versions(archive_dir: str, versions=VERSIONS, reference: str = 'v3',
+                     repeat: int = 3, limit: Optional[int] = None) -> Dict:
+    """Run every version in its own process and diff each output against ``reference``."""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for version in versions:
+        # One process per version keeps peak RSS and import state separate
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[version] = executor.submit(run_version, version, archive_dir, repeat, limit).result()
+        logger.info("%s: %.1f pages/s, %.0f lines/s, peak traced %.1f KiB",
+                    version, results[version]['pages_per_second'],
+                    results[version]['lines_per_second'],
+                    results[version]['peak_traced_bytes'] / 1024)
+
+    if reference not in results:
+        reference = versions[0]
+    for version, result in results.items():
+        if version != reference:
+            result['diff_vs_reference'] = _diff_outputs(results[reference]['outputs'], result['outputs'])
+    for result in results.values():
+        del result['outputs']
+
+    page_set = hashlib.sha256('\n'.join(sorted(
+        url for url, _, _ in _load_pages(archive_dir, limit))).encode('utf-8')).hexdigest()
+    return {'created_at': time.strftime('%Y-%m-%d %H:%M:%S'), 'reference': reference,
+            'page_set': page_set, 'repeat': repeat, 'versions': results}
+
+
+def find_regressions(run: Dict, baseline: Dict, tolerance: float = 0.25) -> List[str]:
+    """Compare a run against a stored one; returns human-readable regressions.
+
+    Throughput drops beyond ``tolerance`` and allocation growth beyond it are
+    reported; changed output is reported whenever both runs saw the same pages.
+    """
+    problems = []
+    same_pages = run['page_set'] == baseline.get('page_set')
+    for version, result in run['versions'].items():
+        previous = baseline.get('versions', {}).get(version)
+        if previous is None:
+            continue
+        if result['pages_per_second'] < previous['pages_per_second'] * (1 - tolerance):
+            problems.append(f"{version}: throughput {result['pages_per_second']:.1f} pages/s, "
+                            f"was {previous['pages_per_second']:.1f}")
+        if result['peak_traced_bytes'] > previous['peak_traced_bytes'] * (1 + tolerance):
+            problems.append(f"{version}: peak traced memory {result['peak_traced_bytes']} bytes, "
+                            f"was {previous['peak_traced_bytes']}")
+        if same_pages and result['output_digest'] != previous['output_digest']:
+            problems.append(f"{version}: output changed on the same pages")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare scraper versions on archived pages')
+    parser.add_argument('archive_dir', nargs='?', default='raw_pages')
+    parser.add_argument('--versions', nargs='+', choices=VERSIONS, default=list(VERSIONS))
+    parser.add_argument('--reference', default='v3', help='Version other outputs are diffed against')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=int, help='Only use the first N archived pages')
+    parser.add_argument('--results', default=DEFAULT_RESULTS,
+                        help='JSON file holding the run history; the last run is the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed throughput drop and memory growth before failing')
+    parser.add_argument('--no-save', action='store_true', help='Do not append this run to the history')
+    args = parser.parse_args()
+
+    setup_logging(None)
+    run = compare_versions(args.archive_dir, args.versions, args.reference, args.repeat, args.limit)
+
+    for version, result in run['versions'].items():
+        diff = result.get('diff_vs_reference')
+        changed = f", {len(diff['changed_pages'])} pages differ from {run['reference']}" if diff else ''
+        print(f"{version:<15} {result['pages_per_second']:8.1f} pages/s {result['lines_per_second']:10.0f} lines/s "
+              f"peak {result['peak_traced_bytes'] / 1024:8.1f} KiB rss {result['peak_rss_kb']} KiB{changed}")
+
+    results_path = Path(args.results)
+    history = json.loads(results_path.read_text(encoding='utf-8')) if results_path.exists() else []
+    problems = find_regressions(run, history[-1], args.tolerance) if history else []
+    for problem in problems:
+        logger.error("Regression: %s", problem)
+
+    if not args.no_save and not problems:
+        history.append(run)
+        results_path.write_text(json.dumps(history, indent=2), encoding='utf-8')
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from episode_catalog import topic_id
+from log_utils import setup_logging
+from turn_aggregation import expand_dataset
+
+
+class LRUCache:
+    """Small ordered-dict LRU for rendered responses."""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self.entries: 'OrderedDict[Tuple, Tuple[bytes, str]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Tuple[bytes, str]]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Tuple, value: Tuple[bytes, str]) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+class Corpus:
+    """One loaded scraper output with the lookups the server answers from."""
+
+    def __init__(self, data: Dict, version: str):
+        self.version = version
+        self.metadata = data.get('metadata', {})
+        self.episodes: Dict[str, Dict] = {}
+        self.speaker_lines: Dict[str, List[Tuple[str, Dict]]] = {}
+        # (lowercased text, topic id, entry) for substring search
+        self.search_lines: List[Tuple[str, str, Dict]] = []
+        context_lines = 0
+
+        for episode in data.get('episodes', []):
+            key = topic_id(episode)
+            self.episodes[key] = episode
+            for entry in episode.get('dialogue', []):
+                if 'speaker' not in entry:
+                    context_lines += 1
+                    continue
+                self.speaker_lines.setdefault(entry['speaker'], []).append((key, entry))
+                self.search_lines.append((entry['text'].lower(), key, entry))
+
+        speaker_counts = Counter({name: len(lines) for name, lines in self.speaker_lines.items()})
+        self.stats = {
+            'episodes': len(self.episodes),
+            'dialogue_lines': len(self.search_lines),
+            'context_lines': context_lines,
+            'unique_speakers': len(self.speaker_lines),
+            'top_speakers': speaker_counts.most_common(20),
+            'scraped_at': self.metadata.get('scraped_at'),
+        }
+
+    @classmethod
+    def load(cls, path: str) -> 'Corpus':
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = expand_dataset(json.load(f))
+        return cls(data, f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+class QueryServer:
+    """Read-only HTTP API over a scraper output.
+
+    The corpus is loaded once and swapped atomically when the file's mtime
+    changes, so a finished scrape is picked up without a restart. Rendered
+    responses are kept in an LRU keyed on the request path and query; every
+    response carries an ETag derived from the corpus version, and matching
+    ``If-None-Match`` requests get a bodiless 304.
+    """
+
+    def __init__(self, path: str, cache_size: int = 1024, reload_interval: float = 2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.cache = LRUCache(cache_size)
+        self.logger = logging.getLogger(__name__)
+        self.corpus = Corpus.load(path)
+        self.logger.info("Loaded %s (%d episodes)", path, self.corpus.stats['episodes'])
+        self._watcher: Optional[asyncio.Task] = None
+
+    def _current_version(self) -> Optional[str]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+    async def _watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            version = self._current_version()
+            if version is None or version == self.corpus.version:
+                continue
+            try:
+                corpus = await loop.run_in_executor(None, Corpus.load, self.path)
+            except (OSError, ValueError) as e:
+                # Most likely caught mid-write; the next poll retries
+                self.logger.warning("Could not reload %s: %s", self.path, e)
+                continue
+            self.corpus = corpus
+            self.cache.clear()
+            self.logger.info("Reloaded %s (%d episodes)", self.path, corpus.stats['episodes'])
+
+    async def _start_watcher(self, app: web.Application) -> None:
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def _stop_watcher(self, app: web.Application) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+    def _respond(self, request: web.Request, build) -> web.Response:
+        corpus = self.corpus
+        key = (request.path, request.query_string)
+        cached = self.cache.get(key)
+        if cached is None or not cached[1].startswith(f'"{corpus.version}'):
+            payload = build(corpus)
+            if payload is None:
+                raise web.HTTPNotFound()
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            etag = f'"{corpus.version}-{hashlib.blake2b(body, digest_size=6).hexdigest()}"'
+            cached = (body, etag)
+            self.cache.put(key, cached)
+
+        body, etag = cached
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    @staticmethod
+    def _int_param(request: web.Request, name: str, default: int) -> int:
+        try:
+            return max(0, int(request.query.get(name, default)))
+        except ValueError:
+            raise web.HTTPBadRequest(text=f"'{name}' must be an integer")
+
+    async def episode_list(self, request: web.Request) -> web.Response:
+        return self._respond(request, lambda corpus: [
+            {'id': key, 'title': ep['title'], 'url': ep['url']} for key, ep in corpus.episodes.items()
+        ])
+
+    async def episode(self, request: web.Request) -> web.Response:
+        return self._respond(request, lambda corpus: corpus.episodes.get(request.match_info['id']))
+
+    async def speaker_lines(self, request: web.Request) -> web.Response:
+        offset = self._int_param(request, 'offset', 0)
+        limit = self._int_param(request, 'limit', 100)
+
+        def build(corpus: Corpus):
+            lines = corpus.speaker_lines.get(request.match_info['name'])
+            if lines is None:
+                return None
+            return {'total': len(lines), 'lines': [
+                dict(entry, episode=key) for key, entry in lines[offset:offset + limit]
+            ]}
+        return self._respond(request, build)
+
+    async def search(self, request: web.Request) -> web.Response:
+        phrase = request.query.get('q', '').lower()
+        if not phrase:
+            raise web.HTTPBadRequest(text="'q' is required")
+        speaker = request.query.get('speaker')
+        limit = self._int_param(request, 'limit', 100)
+
+        def build(corpus: Corpus):
+            results = []
+            for text, key, entry in corpus.search_lines:
+                if phrase in text and (speaker is None or entry['speaker'] == speaker):
+                    results.append(dict(entry, episode=key))
+                    if len(results) >= limit:
+                        break
+            return results
+        return self._respond(request, build)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        # Live counters: built on every request, never cached and without an ETag
+        body = json.dumps(dict(
+            self.corpus.stats, cache={'size': len(self.cache.entries), 'hits': self.cache.hits,
+                                      'misses': self.cache.misses}
+        ), ensure_ascii=False).encode('utf-8')
+        return web.Response(body=body, content_type='application/json',
+                            headers={'Cache-Control': 'no-store'})
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes([
+            web.get('/episodes', self.episode_list),
+            web.get('/episodes/{id}', self.episode),
+            web.get('/speakers/{name}/lines', self.speaker_lines),
+            web.get('/search', self.search),
+            web.get('/stats', self.stats),
+        ])
+        app.on_startup.append(self._start_watcher)
+        app.on_cleanup.append(self._stop_watcher)
+        return app
+
+    def run(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        # Per-request access logging costs more than most of these handlers
+        web.run_app(self.make_app(), host=host, port=port, access_log=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a scraped corpus over HTTP')
+    parser.add_argument('input', nargs='?', default='dexter_transcripts.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--reload-interval', type=float, default=2.0)
+    args = parser.parse_args()
+
+    setup_logging(None)
+    QueryServer(args.input, args.cache_size, args.reload_interval).run(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
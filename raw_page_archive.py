@@ -0,0 +1,149 @@
+import hashlib
+import importlib.util
+import json
+import mmap
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+
+def _zstd():
+    """zstandard, imported on the first zstd frame; None when it is not installed."""
+    try:
+        import zstandard
+    except ImportError:  # zstd is optional, zlib frames are always readable
+        return None
+    return zstandard
+
+
+class RawPageArchive:
+    """Content-addressed, compressed store of raw fetched pages.
+
+    Page bodies are written once per unique SHA-256 into an append-only
+    segment file of independently compressed frames. A JSON-lines index
+    records url, fetch time, headers and the frame location of each capture.
+    A capture is only appended when a url's content actually changes, so
+    re-scraping an unchanged forum leaves the archive untouched.
+    """
+
+    FRAME_MAGIC = b'DXPG'
+    FRAME_HEADER = struct.Struct('<4sBI')  # magic, codec, payload length
+    CODEC_ZLIB = 0
+    CODEC_ZSTD = 1
+
+    def __init__(self, directory: str = 'raw_pages', compression_level: int = 6):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_path = self.directory / 'pages.seg'
+        self.index_path = self.directory / 'index.jsonl'
+        self.compression_level = compression_level
+        self.codec = self.CODEC_ZSTD if importlib.util.find_spec('zstandard') else self.CODEC_ZLIB
+
+        # sha256 -> (offset, length) of its frame in the segment file
+        self.blobs: Dict[str, Tuple[int, int]] = {}
+        # url -> most recent capture record
+        self.latest: Dict[str, Dict] = {}
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Rebuild the in-memory blob and url maps from the index file."""
+        if not self.index_path.exists():
+            return
+        with self.index_path.open('r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self.blobs.setdefault(record['sha256'], (record['offset'], record['length']))
+                self.latest[record['url']] = record
+
+    @staticmethod
+    def content_hash(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == self.CODEC_ZSTD:
+            return _zstd().ZstdCompressor(level=self.compression_level).compress(body)
+        return zlib.compress(body, self.compression_level)
+
+    def _decompress(self, codec: int, payload: bytes) -> bytes:
+        if codec == self.CODEC_ZSTD:
+            zstd = _zstd()
+            if zstd is None:
+                raise RuntimeError("Archive contains zstd frames but zstandard is not installed")
+            return zstd.ZstdDecompressor().decompress(payload)
+        return zlib.decompress(payload)
+
+    def _append_frame(self, body: bytes) -> Tuple[int, int]:
+        """Append a compressed frame and return its (offset, total length)."""
+        payload = self._compress(body)
+        header = self.FRAME_HEADER.pack(self.FRAME_MAGIC, self.codec, len(payload))
+        with self.segment_path.open('ab') as f:
+            offset = f.tell()
+            f.write(header)
+            f.write(payload)
+        return offset, len(header) + len(payload)
+
+    def store(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None,
+              encoding: Optional[str] = None) -> bool:
+        """Archive a fetched page. Returns True if anything new was written."""
+        sha = self.content_hash(body)
+        previous = self.latest.get(url)
+        if previous and previous['sha256'] == sha:
+            return False
+
+        if sha not in self.blobs:
+            self.blobs[sha] = self._append_frame(body)
+        offset, length = self.blobs[sha]
+
+        record = {
+            'url': url,
+            'fetched_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'headers': dict(headers or {}),
+            'encoding': encoding,
+            'sha256': sha,
+            'offset': offset,
+            'length': length,
+        }
+        with self.index_path.open('a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.latest[url] = record
+        return True
+
+    def _read_frame(self, buffer, offset: int) -> bytes:
+        magic, codec, size = self.FRAME_HEADER.unpack_from(buffer, offset)
+        if magic != self.FRAME_MAGIC:
+            raise ValueError(f"Corrupt archive frame at offset {offset}")
+        start = offset + self.FRAME_HEADER.size
+        return self._decompress(codec, bytes(buffer[start:start + size]))
+
+    def load(self, url: str) -> Optional[bytes]:
+        """Return the most recently archived body for a url, if any."""
+        record = self.latest.get(url)
+        if not record:
+            return None
+        with self.segment_path.open('rb') as f:
+            f.seek(record['offset'])
+            return self._read_frame(f.read(record['length']), 0)
+
+    def iter_pages(self) -> Iterator[Tuple[Dict, bytes]]:
+        """Yield (capture record, body) for the latest capture of every url.
+
+        The segment file is memory-mapped once so reparsing the whole archive
+        does not issue a read per page.
+        """
+        if not self.latest or not self.segment_path.exists():
+            return
+        with self.segment_path.open('rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for record in self.latest.values():
+                yield record, self._read_frame(buffer, record['offset'])
+
+    def __len__(self) -> int:
+        return len(self.latest)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.latest
@@ -0,0 +1,246 @@
+import argparse
+import importlib.util
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+DIALOGUE_TYPES = {'spoken', 'voiceover'}
+EPISODE_FIELDS = ('title', 'url', 'dialogue', 'metadata')
+METADATA_FIELDS = ('scraped_at', 'total_lines', 'unique_speakers')
+
+
+class RecordError(ValueError):
+    """Raised when a record is built from structurally invalid data."""
+
+
+def _is_count(value) -> bool:
+    # bool is an int subclass and has always passed this check
+    return isinstance(value, int) and value >= 0
+
+
+def _check(problems: List[str]) -> None:
+    if problems:
+        raise RecordError('; '.join(problems))
+
+
+def line_problems(entry: Dict) -> List[str]:
+    """Structural problems of one dialogue or context entry.
+
+    Messages match the ones TranscriptValidator has always reported, so the
+    validator and the record constructors share a single set of rules.
+    """
+    if 'line_number' not in entry:
+        return ["Missing line number"]
+    # Any entry with a context key is checked as a context entry, speaker or not
+    if 'context' in entry:
+        if not _valid_context(entry['context']):
+            return [f"Invalid context at line {entry['line_number']}"]
+        return []
+    return _dialogue_problems(entry)
+
+
+def _valid_context(context) -> bool:
+    return isinstance(context, list) and bool(context)
+
+
+def _dialogue_problems(entry: Dict) -> List[str]:
+    line_number = entry['line_number']
+    if 'speaker' not in entry or 'text' not in entry or 'type' not in entry:
+        return [f"Missing required dialogue fields at line {line_number}"]
+    if entry['type'] not in DIALOGUE_TYPES:
+        return [f"Invalid dialogue type '{entry['type']}' at line {line_number}"]
+    return []
+
+
+def _record_problems(entry: Dict) -> List[str]:
+    # The validator accepts a spoken line with context on its context alone;
+    # a typed DialogueLine also needs its dialogue fields
+    problems = line_problems(entry)
+    if not problems and 'context' in entry and 'speaker' in entry:
+        problems = _dialogue_problems(entry)
+    return problems
+
+
+def metadata_problems(metadata: Dict) -> List[str]:
+    for name in METADATA_FIELDS:
+        if name not in metadata:
+            return [f"Missing metadata field '{name}'"]
+    problems = []
+    if not _is_count(metadata['total_lines']):
+        problems.append("Invalid total_lines count")
+    if not _is_count(metadata['unique_speakers']):
+        problems.append("Invalid unique_speakers count")
+    return problems
+
+
+def episode_problems(episode: Dict) -> List[str]:
+    """Problems with an episode's own fields and metadata; entries are checked separately.
+
+    Every missing field is reported; the other checks only run once all are present.
+    """
+    problems = [f"Missing required field '{name}'" for name in EPISODE_FIELDS if name not in episode]
+    if problems:
+        return problems
+    if not episode['title'] or not isinstance(episode['title'], str):
+        problems.append("Invalid or empty title")
+    return problems + metadata_problems(episode['metadata'])
+
+
+@dataclass
+class DialogueLine:
+    speaker: str
+    text: str
+    type: str
+    line_number: int
+    original_speaker: Optional[str] = None
+    context: Optional[List[str]] = None
+
+    def __post_init__(self):
+        # The checks of _record_problems, on the fields; every field is present
+        if self.context is not None and not _valid_context(self.context):
+            raise RecordError(f"Invalid context at line {self.line_number}")
+        if self.type not in DIALOGUE_TYPES:
+            raise RecordError(f"Invalid dialogue type '{self.type}' at line {self.line_number}")
+
+    def to_dict(self) -> Dict:
+        entry = {'speaker': self.speaker}
+        if self.original_speaker is not None:
+            entry['original_speaker'] = self.original_speaker
+        entry['text'] = self.text
+        entry['type'] = self.type
+        entry['line_number'] = self.line_number
+        if self.context is not None:
+            entry['context'] = self.context
+        return entry
+
+
+@dataclass
+class ContextLine:
+    context: List[str]
+    line_number: int
+
+    def __post_init__(self):
+        if not _valid_context(self.context):
+            raise RecordError(f"Invalid context at line {self.line_number}")
+
+    def to_dict(self) -> Dict:
+        return {'context': self.context, 'line_number': self.line_number}
+
+
+Line = Union[DialogueLine, ContextLine]
+
+
+def line_from_dict(entry: Dict) -> Line:
+    if 'context' in entry and 'speaker' not in entry:
+        return ContextLine(entry['context'], entry['line_number'])
+    _check(_record_problems(entry))
+    return DialogueLine(entry['speaker'], entry['text'], entry['type'], entry['line_number'],
+                        entry.get('original_speaker'), entry.get('context'))
+
+
+class JsonCodec:
+    """Standard library json, indented like the scraper has always written."""
+    name = 'json'
+    extension = '.json'
+
+    def __init__(self, indent: Optional[int] = 2):
+        self.indent = indent
+
+    def encode(self, data: Dict) -> bytes:
+        return json.dumps(data, indent=self.indent, ensure_ascii=False).encode('utf-8')
+
+    def decode(self, raw: bytes) -> Dict:
+        return json.loads(raw)
+
+
+class OrjsonCodec:
+    name = 'orjson'
+    extension = '.json'
+
+    def __init__(self):
+        import orjson
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+    def encode(self, data: Dict) -> bytes:
+        return self.dumps(data)
+
+    def decode(self, raw: bytes) -> Dict:
+        return self.loads(raw)
+
+
+class MsgspecCodec:
+    name = 'msgspec'
+    extension = '.json'
+
+    def __init__(self):
+        import msgspec
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+
+    def encode(self, data: Dict) -> bytes:
+        return self.encoder.encode(data)
+
+    def decode(self, raw: bytes) -> Dict:
+        return self.decoder.decode(raw)
+
+
+CODECS = {'json': JsonCodec, 'orjson': OrjsonCodec, 'msgspec': MsgspecCodec}
+
+
+def available_codecs() -> List[str]:
+    """Codecs whose package is installed; the packages are only imported when a codec is made."""
+    return [name for name in CODECS if name == 'json' or importlib.util.find_spec(name) is not None]
+
+
+def get_codec(name: str = 'json'):
+    """Return a codec instance by name; all of them read and write plain JSON."""
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec '{name}', expected one of {tuple(CODECS)}")
+    if name not in available_codecs():
+        raise ValueError(f"Codec '{name}' needs the {name} package, which is not installed")
+    return CODECS[name]()
+
+
+def benchmark_codecs(path: str, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """Encode/decode time and output size of every available codec on a dataset."""
+    data = json.loads(Path(path).read_bytes())
+    results = {}
+    for name in available_codecs():
+        codec = get_codec(name)
+        encode_best = decode_best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            raw = codec.encode(data)
+            encode_best = min(encode_best, time.perf_counter() - start)
+            start = time.perf_counter()
+            codec.decode(raw)
+            decode_best = min(decode_best, time.perf_counter() - start)
+        results[name] = {'encode_seconds': encode_best, 'decode_seconds': decode_best, 'bytes': len(raw)}
+
+    start = time.perf_counter()
+    for episode in data['episodes']:
+        for entry in episode['dialogue']:
+            line_from_dict(entry)
+    results['typed_construction'] = {'seconds': time.perf_counter() - start}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serialization backends on a scraper output')
+    parser.add_argument('input', nargs='?', default='dexter_transcripts.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = benchmark_codecs(args.input, args.repeat)
+    typed = results.pop('typed_construction')
+    for name, result in results.items():
+        print(f"{name:<8} encode {result['encode_seconds'] * 1000:8.1f} ms  "
+              f"decode {result['decode_seconds'] * 1000:8.1f} ms  {result['bytes'] / 1024:10.1f} KiB")
+    print(f"typed record construction {typed['seconds'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
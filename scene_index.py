@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from episode_catalog import topic_id
+
+# Why a scene started: first scene of an episode, context cue, gap in line numbers, new speakers
+BOUNDARIES = ('start', 'context', 'gap', 'speakers')
+
+ARRAYS = ('episode', 'start', 'end', 'start_line', 'end_line', 'boundary',
+          'speaker_indptr', 'speaker_ids')
+
+
+class SceneSegmenter:
+    """Splits an episode's dialogue into scenes in one streaming pass.
+
+    A scene ends at a context cue ("[PHONE RINGS]", "[SLOW, DRAMATIC
+    MUSIC]"), at a jump of more than ``max_line_gap`` in line numbers, or
+    when the conversation moves to a new set of speakers: a speaker who is
+    not among the last ``speaker_window`` speakers opens a candidate scene,
+    which is confirmed once ``speaker_window`` further lines pass without
+    any of those earlier speakers. At most ``speaker_window`` entries are
+    held back while a candidate is open.
+
+    Consecutive cues, and cues before the first spoken line, stay in the
+    scene they open, so no scene consists of cues alone.
+    """
+
+    def __init__(self, max_line_gap: int = 5, speaker_window: int = 6):
+        self.max_line_gap = max_line_gap
+        self.speaker_window = speaker_window
+
+    def segment(self, dialogue: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield scenes as ``{'start', 'end', 'start_line', 'end_line', 'speakers', 'boundary'}``.
+
+        ``start``/``end`` are positions in ``dialogue`` (end exclusive);
+        ``speakers`` are listed in order of first appearance.
+        """
+        scene: Optional[Dict] = None
+        recent: Deque[str] = deque(maxlen=self.speaker_window)
+        pending: List[Tuple[int, Dict]] = []  # entries of a candidate scene, with their positions
+        pending_before: set = set()  # recent speakers when the candidate opened
+        previous_line: Optional[int] = None
+
+        def open_scene(position: int, entry: Dict, boundary: str) -> Dict:
+            return {'start': position, 'end': position, 'start_line': entry['line_number'],
+                    'end_line': entry['line_number'], 'speakers': [], 'boundary': boundary}
+
+        def extend(target: Dict, position: int, entry: Dict) -> None:
+            target['end'] = position + 1
+            target['end_line'] = entry['line_number']
+            speaker = entry.get('speaker')
+            if speaker is not None and speaker not in target['speakers']:
+                target['speakers'].append(speaker)
+
+        def flush_pending(target: Dict) -> None:
+            for position, entry in pending:
+                extend(target, position, entry)
+            pending.clear()
+
+        for position, entry in enumerate(dialogue):
+            line_number = entry.get('line_number')
+            speaker = entry.get('speaker')
+            boundary = None
+            if scene is None:
+                scene = open_scene(position, entry, 'start')
+            elif speaker is None:
+                if scene['speakers'] or pending:
+                    boundary = 'context'
+            elif ((scene['speakers'] or pending) and previous_line is not None and line_number is not None
+                  and line_number - previous_line > self.max_line_gap):
+                boundary = 'gap'
+            if line_number is not None:
+                previous_line = line_number
+
+            if boundary is not None:
+                flush_pending(scene)
+                yield scene
+                scene = open_scene(position, entry, boundary)
+                recent.clear()
+
+            if speaker is None:
+                extend(scene, position, entry)
+                continue
+
+            if pending:
+                pending.append((position, entry))
+                if speaker in pending_before:
+                    # The earlier speakers are still talking: same scene after all
+                    flush_pending(scene)
+                elif len(pending) >= self.speaker_window:
+                    start_position, start_entry = pending[0]
+                    yield scene
+                    scene = open_scene(start_position, start_entry, 'speakers')
+                    flush_pending(scene)
+            elif recent and speaker not in recent and scene['speakers']:
+                pending_before = set(recent)
+                pending.append((position, entry))
+            else:
+                extend(scene, position, entry)
+            recent.append(speaker)
+
+        if scene is not None:
+            flush_pending(scene)
+            yield scene
+
+
+class SceneIndex:
+    """Scene table over a dataset, persisted as flat arrays.
+
+    Scene ids are row numbers, so :meth:`scene` is a constant-time array
+    lookup and :meth:`scene_lines` a single slice of the episode's dialogue;
+    neither scans the episode. Each episode's scenes are contiguous, with
+    their id range in ``episode_scenes``. Saved indexes are opened with the
+    arrays memory-mapped; an index describes one dataset and is rebuilt
+    (a single pass) when the dataset changes.
+    """
+
+    def __init__(self, segmenter: Optional[SceneSegmenter] = None):
+        self.segmenter = segmenter or SceneSegmenter()
+        self.speakers: List[str] = []
+        self.speaker_lookup: Dict[str, int] = {}
+        self.episodes: List[Dict] = []
+        self.episode_scenes: Dict[str, List[int]] = {}
+        self._columns: Dict[str, List[int]] = {name: [] for name in ARRAYS}
+        self._columns['speaker_indptr'].append(0)
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self.array('episode'))
+
+    def _intern(self, name: str) -> int:
+        speaker_id = self.speaker_lookup.get(name)
+        if speaker_id is None:
+            speaker_id = self.speaker_lookup[name] = len(self.speakers)
+            self.speakers.append(name)
+        return speaker_id
+
+    def add_episode(self, episode: Dict) -> int:
+        """Segment one episode and append its scenes; returns how many were added."""
+        if self.read_only:
+            raise RuntimeError("A loaded scene index is read-only; rebuild it from the dataset")
+        columns = self._columns
+        episode_idx = len(self.episodes)
+        key = topic_id(episode)
+        self.episodes.append({'topic_id': key, 'title': episode.get('title')})
+        first = len(columns['episode'])
+        for scene in self.segmenter.segment(episode.get('dialogue', [])):
+            columns['episode'].append(episode_idx)
+            for name in ('start', 'end', 'start_line', 'end_line'):
+                columns[name].append(scene[name])
+            columns['boundary'].append(BOUNDARIES.index(scene['boundary']))
+            columns['speaker_ids'].extend(self._intern(name) for name in scene['speakers'])
+            columns['speaker_indptr'].append(len(columns['speaker_ids']))
+        self.episode_scenes[key] = [first, len(columns['episode'])]
+        self._arrays = None
+        return len(columns['episode']) - first
+
+    def add_dataset(self, data: Dict) -> 'SceneIndex':
+        for episode in data['episodes']:
+            self.add_episode(episode)
+        return self
+
+    def array(self, name: str) -> np.ndarray:
+        if self._arrays is None:
+            self._arrays = {name: np.asarray(values, dtype=np.int8 if name == 'boundary' else np.int32)
+                            for name, values in self._columns.items()}
+        return self._arrays[name]
+
+    def scene(self, scene_id: int) -> Dict:
+        """Scene record by id."""
+        if not 0 <= scene_id < len(self):
+            raise IndexError(f"No scene {scene_id}")
+        indptr = self.array('speaker_indptr')
+        speaker_ids = self.array('speaker_ids')[indptr[scene_id]:indptr[scene_id + 1]]
+        episode = self.episodes[int(self.array('episode')[scene_id])]
+        return {
+            'scene_id': scene_id,
+            'episode': int(self.array('episode')[scene_id]),
+            'topic_id': episode['topic_id'],
+            'title': episode['title'],
+            'start': int(self.array('start')[scene_id]),
+            'end': int(self.array('end')[scene_id]),
+            'start_line': int(self.array('start_line')[scene_id]),
+            'end_line': int(self.array('end_line')[scene_id]),
+            'speakers': [self.speakers[i] for i in speaker_ids.tolist()],
+            'boundary': BOUNDARIES[int(self.array('boundary')[scene_id])],
+        }
+
+    def scene_lines(self, data: Dict, scene_id: int) -> List[Dict]:
+        """The dialogue entries of a scene, sliced from the dataset the index was built on."""
+        record = self.scene(scene_id)
+        return data['episodes'][record['episode']]['dialogue'][record['start']:record['end']]
+
+    def scenes_for(self, key: str) -> List[int]:
+        """Scene ids of an episode, by topic id."""
+        first, last = self.episode_scenes.get(key, (0, 0))
+        return list(range(first, last))
+
+    def scenes_with(self, name: str) -> List[int]:
+        """Scene ids in which a speaker appears."""
+        speaker_id = self.speaker_lookup.get(name)
+        if speaker_id is None:
+            return []
+        indptr = self.array('speaker_indptr')
+        positions = np.flatnonzero(self.array('speaker_ids') == speaker_id)
+        return (np.searchsorted(indptr, positions, side='right') - 1).tolist()
+
+    def save(self, directory: str) -> None:
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            # Write beside and swap in, as the current files may be mapped by this index
+            tmp_path = out_dir / f'{name}.npy.tmp'
+            with tmp_path.open('wb') as f:
+                np.save(f, self.array(name))
+            os.replace(tmp_path, out_dir / f'{name}.npy')
+        with (out_dir / 'scenes.json').open('w', encoding='utf-8') as f:
+            json.dump({'speakers': self.speakers, 'episodes': self.episodes,
+                       'episode_scenes': self.episode_scenes,
+                       'max_line_gap': self.segmenter.max_line_gap,
+                       'speaker_window': self.segmenter.speaker_window}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> 'SceneIndex':
+        """Open a saved index with its arrays memory-mapped read-only."""
+        in_dir = Path(directory)
+        with (in_dir / 'scenes.json').open('r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(SceneSegmenter(meta['max_line_gap'], meta['speaker_window']))
+        for name in meta['speakers']:
+            index._intern(name)
+        index.episodes = meta['episodes']
+        index.episode_scenes = meta['episode_scenes']
+        index.read_only = True
+        index._arrays = {name: np.load(in_dir / f'{name}.npy', mmap_mode='r') for name in ARRAYS}
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Segment episodes into scenes and index them')
+    parser.add_argument('input', help='Scraper JSON output')
+    parser.add_argument('-o', '--output', default='scene_index', help='Directory for the index')
+    parser.add_argument('--max-line-gap', type=int, default=5)
+    parser.add_argument('--speaker-window', type=int, default=6)
+    parser.add_argument('--show', type=int, help='Print this scene')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    index = SceneIndex(SceneSegmenter(args.max_line_gap, args.speaker_window)).add_dataset(data)
+    index.save(args.output)
+    counts = np.bincount(index.array('boundary'), minlength=len(BOUNDARIES))
+    print(f"{len(index)} scenes in {len(index.episodes)} episodes ("
+          + ', '.join(f"{name}: {count}" for name, count in zip(BOUNDARIES, counts.tolist())) + ")")
+    if args.show is not None:
+        print(json.dumps(index.scene(args.show), ensure_ascii=False, indent=2))
+        for entry in index.scene_lines(data, args.show):
+            print(f"  {entry['line_number']:>5} {entry.get('speaker', '--'):<20} "
+                  f"{entry.get('text') or ' '.join(entry.get('context', []))}")
+
+
+if __name__ == "__main__":
+    main()
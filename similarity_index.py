@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from corpus_analytics import tokenize
+from episode_catalog import topic_id
+
+# Hashed feature space; collisions are rare at the corpus's vocabulary size
+N_FEATURES = 1 << 18
+ARRAYS = ('indptr', 'indices', 'tf', 'weights', 'doc_freq', 'live')
+
+
+def _features(text: str, n_features: int) -> Dict[int, float]:
+    """Hashed, sublinear term frequencies of a line of text."""
+    counts = Counter(zlib.crc32(word.encode('utf-8')) % n_features for word in tokenize(text))
+    return {feature: 1.0 + np.log(count) for feature, count in counts.items()}
+
+
+def _episode_digest(episode: Dict) -> str:
+    texts = [entry['text'] for entry in episode['dialogue'] if 'text' in entry and 'speaker' in entry]
+    return hashlib.blake2b(json.dumps(texts, ensure_ascii=False).encode('utf-8'),
+                           digest_size=8).hexdigest()
+
+
+class SimilarityIndex:
+    """TF-IDF index of spoken lines answering top-k cosine queries.
+
+    Lines are hashed into ``n_features`` columns, so no vocabulary has to be
+    kept and episodes can be added one at a time. Raw term frequencies and
+    document frequencies are stored; the IDF-weighted, L2-normalized matrix is
+    recomputed in one vectorized pass when queried after a change. New rows
+    are buffered and joined onto the arrays in one concatenation when the
+    matrix is next needed. A changed episode has its old rows masked out
+    rather than rewritten; :meth:`save` drops masked rows.
+
+    Saved indexes are plain ``.npy`` files opened with ``mmap_mode='r'``, so
+    loading is near instant and pages are read only as queries touch them.
+    """
+
+    def __init__(self, n_features: int = N_FEATURES):
+        self.n_features = n_features
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.tf = np.zeros(0, dtype=np.float32)
+        self.weights: Optional[np.ndarray] = None
+        self.doc_freq = np.zeros(n_features, dtype=np.int32)
+        self.live = np.zeros(0, dtype=bool)
+        self.lines: List[Tuple[int, int, str, str]] = []
+        self.episodes: List[str] = []
+        self.episode_rows: Dict[str, Dict] = {}
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._idf_values: Optional[np.ndarray] = None
+        # (indices, tf, row lengths) of episodes added since the arrays were last joined,
+        # with the position of each chunk by its first row
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_starts: Dict[int, int] = {}
+        # Row ranges to mask out when the arrays are next joined
+        self._dead: List[Tuple[int, int]] = []
+        self._live_rows = 0
+
+    def __len__(self) -> int:
+        return self._live_rows
+
+    def add_episode(self, episode: Dict) -> bool:
+        """Index an episode's spoken lines; returns False if it was already current."""
+        key = topic_id(episode)
+        digest = _episode_digest(episode)
+        previous = self.episode_rows.get(key)
+        if previous is not None:
+            if previous['digest'] == digest:
+                return False
+            self._remove_rows(previous['start'], previous['end'])
+
+        episode_idx = len(self.episodes)
+        self.episodes.append(episode['title'])
+        start = len(self.lines)
+        indices: List[int] = []
+        tf: List[float] = []
+        lengths: List[int] = []
+        for entry in episode['dialogue']:
+            if 'text' not in entry or 'speaker' not in entry:
+                continue
+            features = _features(entry['text'], self.n_features)
+            indices.extend(features)
+            tf.extend(features.values())
+            lengths.append(len(features))
+            self.lines.append((episode_idx, entry['line_number'], entry['speaker'], entry['text']))
+
+        new_indices = np.array(indices, dtype=np.int32)
+        self._pending_starts[start] = len(self._pending)
+        self._pending.append((new_indices, np.array(tf, dtype=np.float32), np.array(lengths, dtype=np.int64)))
+        self._writable_doc_freq()
+        np.add.at(self.doc_freq, new_indices, 1)
+        self._live_rows += len(lengths)
+        self.episode_rows[key] = {'digest': digest, 'start': start, 'end': len(self.lines)}
+        self.weights = None
+        self._matrix = None
+        self._idf_values = None
+        return True
+
+    def add_dataset(self, data: Dict) -> int:
+        """Add every episode of a scraper output; returns how many were (re)indexed."""
+        return sum(self.add_episode(episode) for episode in data['episodes'])
+
+    def _writable_doc_freq(self) -> None:
+        # A loaded index maps its arrays read-only
+        if not self.doc_freq.flags.writeable:
+            self.doc_freq = np.array(self.doc_freq)
+
+    def _remove_rows(self, start: int, end: int) -> None:
+        if start == end:
+            return
+        # An episode's rows are always added as one chunk
+        chunk = self._pending_starts.pop(start, None)
+        if chunk is not None:
+            removed = self._pending[chunk][0]
+        else:
+            removed = self.indices[self.indptr[start]:self.indptr[end]]
+        self._writable_doc_freq()
+        np.subtract.at(self.doc_freq, removed, 1)
+        self._dead.append((start, end))
+        self._live_rows -= end - start
+
+    def _flush(self) -> None:
+        """Join buffered rows onto the arrays and apply pending row masks."""
+        if not self._pending and not self._dead:
+            return
+        if self._pending:
+            lengths = np.concatenate([chunk[2] for chunk in self._pending])
+            self.indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths, dtype=np.int64)])
+            self.indices = np.concatenate([self.indices] + [chunk[0] for chunk in self._pending])
+            self.tf = np.concatenate([self.tf] + [chunk[1] for chunk in self._pending])
+            self.live = np.concatenate([self.live, np.ones(len(lengths), dtype=bool)])
+            self._pending = []
+            self._pending_starts = {}
+        else:
+            self.live = np.array(self.live)
+        for start, end in self._dead:
+            self.live[start:end] = False
+        self._dead = []
+
+    def _compact(self) -> None:
+        """Drop masked rows, and the titles of episodes left without rows."""
+        self._flush()
+        if self.live.all():
+            return
+        row_lengths = np.diff(self.indptr)
+        kept_entries = np.repeat(self.live, row_lengths)
+        self.indices = self.indices[kept_entries]
+        self.tf = self.tf[kept_entries]
+        self.indptr = np.concatenate([[0], np.cumsum(row_lengths[self.live], dtype=np.int64)])
+        # New position of each old row boundary
+        rows_before = np.concatenate([[0], np.cumsum(self.live)])
+        for rows in self.episode_rows.values():
+            rows['start'], rows['end'] = int(rows_before[rows['start']]), int(rows_before[rows['end']])
+        lines = [line for line, live in zip(self.lines, self.live.tolist()) if live]
+        used = sorted({line[0] for line in lines})
+        new_episode = {old: new for new, old in enumerate(used)}
+        self.episodes = [self.episodes[old] for old in used]
+        self.lines = [(new_episode[line[0]],) + tuple(line[1:]) for line in lines]
+        self.live = np.ones(len(self.lines), dtype=bool)
+        self.weights = None
+        self._matrix = None
+
+    def _idf(self) -> np.ndarray:
+        if self._idf_values is None:
+            self._idf_values = (np.log((1.0 + len(self)) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+        return self._idf_values
+
+    def _compute_weights(self) -> np.ndarray:
+        weights = self.tf * self._idf()[self.indices]
+        row_lengths = np.diff(self.indptr)
+        nonempty = row_lengths > 0
+        norms = np.ones(len(row_lengths), dtype=np.float32)
+        if nonempty.any():
+            # Empty rows hold no entries, so reduceat over the non-empty starts sums each row
+            norms[nonempty] = np.sqrt(np.add.reduceat(weights ** 2, self.indptr[:-1][nonempty]))
+        return (weights / np.repeat(norms, row_lengths)).astype(np.float32)
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        if self._matrix is None:
+            self._flush()
+            if self.weights is None:
+                self.weights = self._compute_weights()
+            self._matrix = sparse.csr_matrix((self.weights, self.indices, self.indptr),
+                                             shape=(len(self.lines), self.n_features))
+        return self._matrix
+
+    def query(self, text: str, k: int = 10) -> List[Dict]:
+        """Lines most similar to ``text`` by cosine similarity, best first."""
+        features = _features(text, self.n_features)
+        if not features or not self.lines:
+            return []
+        columns = np.fromiter(features, dtype=np.int32, count=len(features))
+        values = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        values *= self._idf()[columns]
+        values /= np.linalg.norm(values)
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        vector[columns] = values
+
+        scores = self.matrix @ vector
+        scores[~self.live] = 0.0
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        results = []
+        for row in top:
+            if scores[row] <= 0:
+                break
+            episode_idx, line_number, speaker, line_text = self.lines[row]
+            results.append({'score': float(scores[row]), 'episode': self.episodes[episode_idx],
+                            'line_number': line_number, 'speaker': speaker, 'text': line_text})
+        return results
+
+    def save(self, directory: str) -> None:
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._compact()
+        self.matrix  # make sure the weights are current
+        for name in ARRAYS:
+            # Write beside and swap in, as the current files may be mapped by this index
+            tmp_path = out_dir / f'{name}.npy.tmp'
+            with tmp_path.open('wb') as f:
+                np.save(f, getattr(self, name))
+            os.replace(tmp_path, out_dir / f'{name}.npy')
+        with (out_dir / 'lines.json').open('w', encoding='utf-8') as f:
+            json.dump({'n_features': self.n_features, 'episodes': self.episodes,
+                       'episode_rows': self.episode_rows, 'lines': self.lines}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> 'SimilarityIndex':
+        """Open a saved index with its arrays memory-mapped read-only.
+
+        Adding episodes afterwards copies the arrays into memory.
+        """
+        in_dir = Path(directory)
+        with (in_dir / 'lines.json').open('r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(meta['n_features'])
+        for name in ARRAYS:
+            setattr(index, name, np.load(in_dir / f'{name}.npy', mmap_mode='r'))
+        index.episodes = meta['episodes']
+        index.episode_rows = meta['episode_rows']
+        index.lines = [tuple(line) for line in meta['lines']]
+        index._live_rows = int(index.live.sum())
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Find dialogue lines similar to a quote')
+    parser.add_argument('quote', help='Text to search for')
+    parser.add_argument('--input', action='append', default=[],
+                        help='Scraper JSON output to add to the index (repeatable)')
+    parser.add_argument('--index', default='similarity_index', help='Index directory')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    index_dir = Path(args.index)
+    index = SimilarityIndex.load(str(index_dir)) if (index_dir / 'lines.json').exists() else SimilarityIndex()
+    added = 0
+    for path in args.input:
+        with open(path, 'r', encoding='utf-8') as f:
+            added += index.add_dataset(json.load(f))
+    if added:
+        index.save(str(index_dir))
+        print(f"Indexed {added} new or changed episodes ({len(index)} lines)")
+
+    for hit in index.query(args.quote, args.k):
+        print(f"{hit['score']:.3f} {hit['episode']} #{hit['line_number']} {hit['speaker']}: {hit['text']}")
+
+
+if __name__ == "__main__":
+    main()
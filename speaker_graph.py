@@ -0,0 +1,163 @@
+import argparse
+import json
+from collections import deque
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+KINDS = ('transitions', 'copresence')
+
+
+class SpeakerGraph:
+    """Speaker interaction graph built incrementally from episode dialogue.
+
+    Speakers are interned to integer ids as they appear. Two weighted
+    adjacency matrices are kept:
+
+    * ``transitions`` -- directed, A -> B each time B speaks right after A;
+    * ``copresence`` -- symmetric, counting scenes (runs of dialogue between
+      context cues) or sliding windows in which both speak.
+
+    Counts accumulate in COO form as episodes arrive and are turned into
+    CSR matrices on demand, so adding an episode costs one pass over its
+    dialogue regardless of how many speakers the corpus has.
+    """
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window
+        self.speaker_ids: Dict[str, int] = {}
+        self.speakers: List[str] = []
+        self._rows: Dict[str, List[int]] = {kind: [] for kind in KINDS}
+        self._cols: Dict[str, List[int]] = {kind: [] for kind in KINDS}
+        self._weights: Dict[str, List[int]] = {kind: [] for kind in KINDS}
+        self._matrices: Dict[str, sparse.csr_matrix] = {}
+        self.episodes = 0
+
+    def intern(self, name: str) -> int:
+        speaker_id = self.speaker_ids.get(name)
+        if speaker_id is None:
+            speaker_id = self.speaker_ids[name] = len(self.speakers)
+            self.speakers.append(name)
+        return speaker_id
+
+    def _add_edge(self, kind: str, a: int, b: int) -> None:
+        self._rows[kind].append(a)
+        self._cols[kind].append(b)
+        self._weights[kind].append(1)
+
+    def _add_group(self, present: Iterable[int]) -> None:
+        for a, b in combinations(sorted(present), 2):
+            self._add_edge('copresence', a, b)
+
+    def add_episode(self, dialogue: Iterable[Dict]) -> None:
+        """Fold one episode's dialogue into the graph in a single pass."""
+        previous: Optional[int] = None
+        scene: set = set()
+        recent: deque = deque(maxlen=self.window or 1)
+
+        for entry in dialogue:
+            if 'speaker' not in entry:
+                # A context cue closes the current scene
+                if self.window is None and scene:
+                    self._add_group(scene)
+                    scene = set()
+                continue
+
+            speaker = self.intern(entry['speaker'])
+            if previous is not None and previous != speaker:
+                self._add_edge('transitions', previous, speaker)
+            previous = speaker
+
+            if self.window is None:
+                scene.add(speaker)
+            else:
+                for other in set(recent):
+                    if other != speaker:
+                        self._add_edge('copresence', min(speaker, other), max(speaker, other))
+                recent.append(speaker)
+
+        if self.window is None and scene:
+            self._add_group(scene)
+        self._matrices.clear()
+        self.episodes += 1
+
+    def add_dataset(self, data: Dict) -> 'SpeakerGraph':
+        for episode in data['episodes']:
+            self.add_episode(episode['dialogue'])
+        return self
+
+    def matrix(self, kind: str = 'transitions') -> sparse.csr_matrix:
+        """Weighted adjacency as CSR; copresence is returned symmetric."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown graph kind '{kind}', expected one of {KINDS}")
+        if kind not in self._matrices:
+            n = len(self.speakers)
+            rows = np.array(self._rows[kind], dtype=np.int32)
+            cols = np.array(self._cols[kind], dtype=np.int32)
+            data = np.array(self._weights[kind], dtype=np.int32)
+            matrix = sparse.coo_matrix((data, (rows, cols)), shape=(n, n)).tocsr()
+            if kind == 'copresence':
+                matrix = matrix + matrix.T
+            self._matrices[kind] = matrix
+        return self._matrices[kind]
+
+    def neighbors(self, name: str, k: int = 10, kind: str = 'transitions') -> List[Tuple[str, int]]:
+        """Speakers most connected to ``name``, strongest first."""
+        speaker_id = self.speaker_ids.get(name)
+        if speaker_id is None:
+            return []
+        row = self.matrix(kind).getrow(speaker_id)
+        order = np.argsort(row.data)[::-1][:k]
+        return [(self.speakers[row.indices[i]], int(row.data[i])) for i in order]
+
+    def save(self, directory: str) -> None:
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for kind in KINDS:
+            sparse.save_npz(out_dir / f'{kind}.npz', self.matrix(kind))
+        with (out_dir / 'speakers.json').open('w', encoding='utf-8') as f:
+            json.dump({'speakers': self.speakers, 'episodes': self.episodes, 'window': self.window},
+                      f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str) -> 'SpeakerGraph':
+        """Load a saved graph; further episodes can be added to it."""
+        in_dir = Path(directory)
+        with (in_dir / 'speakers.json').open('r', encoding='utf-8') as f:
+            meta = json.load(f)
+        graph = cls(meta['window'])
+        for name in meta['speakers']:
+            graph.intern(name)
+        graph.episodes = meta['episodes']
+        for kind in KINDS:
+            matrix = sparse.load_npz(in_dir / f'{kind}.npz').tocoo()
+            if kind == 'copresence':
+                matrix = sparse.triu(matrix, k=1).tocoo()
+            graph._rows[kind] = matrix.row.tolist()
+            graph._cols[kind] = matrix.col.tolist()
+            graph._weights[kind] = matrix.data.tolist()
+        return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the speaker interaction graph')
+    parser.add_argument('input', help='Scraper JSON output')
+    parser.add_argument('-o', '--output', default='speaker_graph', help='Directory for the matrices')
+    parser.add_argument('--window', type=int, help='Co-presence window in lines instead of scenes')
+    parser.add_argument('--speaker', default='DEXTER', help='Print this speaker\'s neighbours')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        graph = SpeakerGraph(args.window).add_dataset(json.load(f))
+    graph.save(args.output)
+    print(f"{len(graph.speakers)} speakers, {graph.matrix('transitions').nnz} transition edges, "
+          f"{graph.matrix('copresence').nnz} co-presence edges")
+    for kind in KINDS:
+        print(f"{kind}: {graph.neighbors(args.speaker, kind=kind)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from episode_catalog import parse_title, topic_id
+
+# Bare season/episode marker, for titles parse_title cannot read
+EPISODE_NUMBER = re.compile(r'(\d+)x(\d+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    id INTEGER PRIMARY KEY,
+    topic_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    series TEXT,
+    season INTEGER,
+    episode INTEGER,
+    scraped_at TEXT,
+    total_lines INTEGER,
+    unique_speakers INTEGER
+);
+CREATE TABLE IF NOT EXISTS speakers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lines (
+    id INTEGER PRIMARY KEY,
+    episode_id INTEGER NOT NULL REFERENCES episodes(id),
+    line_number INTEGER NOT NULL,
+    speaker_id INTEGER REFERENCES speakers(id),
+    original_speaker TEXT,
+    type TEXT,
+    text TEXT NOT NULL,
+    is_context INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_lines_speaker_episode ON lines(speaker_id, episode_id);
+CREATE INDEX IF NOT EXISTS idx_lines_episode ON lines(episode_id, line_number);
+"""
+
+# Created once the series column is known to exist (see SqliteSink._migrate)
+SERIES_INDEX = """
+DROP INDEX IF EXISTS idx_episodes_season;
+CREATE INDEX IF NOT EXISTS idx_episodes_series_season
+    ON episodes(series COLLATE NOCASE, season, episode);
+"""
+
+
+class SqliteSink:
+    """Normalized SQLite store for scraped episodes with full-text search.
+
+    Each episode is written in a single transaction with batched
+    ``executemany`` inserts; re-writing an episode replaces its lines. The
+    database runs in WAL mode so readers are not blocked while a scrape writes.
+    Speaker ids and line ids are assigned in memory; if an episode's
+    transaction rolls back, the ids it assigned are forgotten with it.
+    """
+
+    def __init__(self, path: str = 'dexter_transcripts.sqlite'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        try:
+            self.conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text)')
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            self.logger.warning("SQLite was built without FTS5; text search falls back to LIKE")
+            self.fts_enabled = False
+        self.conn.commit()
+
+        self.speaker_ids: Dict[str, int] = dict(self.conn.execute('SELECT name, id FROM speakers'))
+        self.next_line_id = (self.conn.execute('SELECT MAX(id) FROM lines').fetchone()[0] or 0) + 1
+
+    def _migrate(self) -> None:
+        """Add the series column to databases written before it existed."""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(episodes)')}
+        if 'series' not in columns:
+            self.conn.execute('ALTER TABLE episodes ADD COLUMN series TEXT')
+            # Backfill from the stored titles, as a fresh write would
+            updates = []
+            for episode_id, title in self.conn.execute('SELECT id, title FROM episodes').fetchall():
+                parsed = parse_title(title)
+                if parsed:
+                    updates.append((parsed['series'], episode_id))
+            self.conn.executemany('UPDATE episodes SET series = ? WHERE id = ?', updates)
+        self.conn.executescript(SERIES_INDEX)
+
+    def _speaker_id(self, name: Optional[str]) -> Optional[int]:
+        if name is None:
+            return None
+        speaker_id = self.speaker_ids.get(name)
+        if speaker_id is None:
+            cursor = self.conn.execute('INSERT INTO speakers (name) VALUES (?)', (name,))
+            speaker_id = self.speaker_ids[name] = cursor.lastrowid
+        return speaker_id
+
+    def _upsert_episode(self, episode: Dict) -> int:
+        metadata = episode.get('metadata', {})
+        parsed = parse_title(episode['title'])
+        if parsed:
+            series, season, number = parsed['series'], parsed['season'], parsed['episode']
+        else:
+            match = EPISODE_NUMBER.search(episode['title'])
+            series = None
+            season, number = (int(match.group(1)), int(match.group(2))) if match else (None, None)
+        key = topic_id(episode)
+        self.conn.execute(
+            'INSERT INTO episodes (topic_id, title, url, series, season, episode, scraped_at, '
+            'total_lines, unique_speakers) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(topic_id) DO UPDATE SET title = excluded.title, url = excluded.url, '
+            'series = excluded.series, season = excluded.season, episode = excluded.episode, '
+            'scraped_at = excluded.scraped_at, total_lines = excluded.total_lines, '
+            'unique_speakers = excluded.unique_speakers',
+            (key, episode['title'], episode['url'], series, season, number, metadata.get('scraped_at'),
+             metadata.get('total_lines'), metadata.get('unique_speakers'))
+        )
+        return self.conn.execute('SELECT id FROM episodes WHERE topic_id = ?', (key,)).fetchone()[0]
+
+    def write_episode(self, episode: Dict) -> None:
+        """Write one episode and all its lines in a single transaction."""
+        next_line_id = self.next_line_id
+        known_speakers = len(self.speaker_ids)
+        try:
+            self._write_episode(episode)
+        except Exception:
+            # Rolled back: drop the speakers and line ids this episode assigned
+            self.next_line_id = next_line_id
+            for name in list(self.speaker_ids)[known_speakers:]:
+                del self.speaker_ids[name]
+            raise
+
+    def _write_episode(self, episode: Dict) -> None:
+        with self.conn:
+            episode_id = self._upsert_episode(episode)
+            if self.fts_enabled:
+                self.conn.execute(
+                    'DELETE FROM lines_fts WHERE rowid IN (SELECT id FROM lines WHERE episode_id = ?)',
+                    (episode_id,)
+                )
+            self.conn.execute('DELETE FROM lines WHERE episode_id = ?', (episode_id,))
+
+            rows = []
+            for entry in episode['dialogue']:
+                if 'context' in entry and 'text' not in entry:
+                    text, is_context, speaker_id = ' '.join(entry['context']), 1, None
+                else:
+                    text, is_context = entry['text'], 0
+                    speaker_id = self._speaker_id(entry.get('speaker'))
+                rows.append((self.next_line_id, episode_id, entry['line_number'], speaker_id,
+                             entry.get('original_speaker'), entry.get('type'), text, is_context))
+                self.next_line_id += 1
+
+            self.conn.executemany('INSERT INTO lines VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            if self.fts_enabled:
+                self.conn.executemany('INSERT INTO lines_fts (rowid, text) VALUES (?, ?)',
+                                      ((row[0], row[6]) for row in rows))
+
+    def write_episodes(self, episodes: Iterable[Dict]) -> int:
+        count = 0
+        for episode in episodes:
+            self.write_episode(episode)
+            count += 1
+        return count
+
+    def search(self, phrase: str, speaker: Optional[str] = None, season: Optional[int] = None,
+               series: Optional[str] = None, limit: int = 100) -> List[Tuple[str, int, Optional[str], str]]:
+        """Find lines containing a phrase, optionally by speaker, series and season.
+
+        Series names match case-insensitively; a season on its own spans every series.
+
+        Returns (episode title, line number, speaker, text) tuples in episode order.
+        """
+        params: List = []
+        if self.fts_enabled:
+            source = 'lines_fts JOIN lines ON lines.id = lines_fts.rowid'
+            clauses = ['lines_fts MATCH ?']
+            params.append('"' + phrase.replace('"', '""') + '"')
+        else:
+            source = 'lines'
+            clauses = ['lines.text LIKE ?']
+            params.append(f'%{phrase}%')
+        if speaker is not None:
+            clauses.append('lines.speaker_id = (SELECT id FROM speakers WHERE name = ?)')
+            params.append(speaker)
+        if series is not None:
+            clauses.append('episodes.series = ? COLLATE NOCASE')
+            params.append(series)
+        if season is not None:
+            clauses.append('episodes.season = ?')
+            params.append(season)
+        params.append(limit)
+
+        query = (
+            f'SELECT episodes.title, lines.line_number, speakers.name, lines.text FROM {source} '
+            'JOIN episodes ON episodes.id = lines.episode_id '
+            'LEFT JOIN speakers ON speakers.id = lines.speaker_id '
+            f'WHERE {" AND ".join(clauses)} '
+            'ORDER BY episodes.series COLLATE NOCASE, episodes.season, episodes.episode, '
+            'lines.line_number LIMIT ?'
+        )
+        return self.conn.execute(query, params).fetchall()
+
+    def close(self) -> None:
+        self.conn.close()
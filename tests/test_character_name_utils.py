@@ -0,0 +1,52 @@
+import copy
+
+from character_name_utils import CharacterNormalizer, renormalize_dataset, speech_tags
+from darkly_speaking_dexter_v3 import DexterScraper
+
+LINES = [
+    "[DEX] Morning.",
+    "Did you sleep at all?",
+    "[SLOW, DRAMATIC MUSIC]",
+    "Me neither.",
+    "[DEB] Not a wink.",
+    "[DEX] Coffee, then.",
+    "Lots of it.",
+]
+
+
+def _dataset(normalizer):
+    dialogue = DexterScraper(name_normalizer=normalizer).parse_lines(LINES)
+    speakers = {entry['speaker'] for entry in dialogue if 'speaker' in entry}
+    metadata = {'scraped_at': 'x', 'total_lines': len(dialogue), 'unique_speakers': len(speakers)}
+    return {'metadata': {'unique_speakers': len(speakers)},
+            'episodes': [{'title': 'Dexter: 01x01 - Pilot', 'url': 'u', 'dialogue': dialogue,
+                          'metadata': metadata}]}
+
+
+def test_normalize_many_matches_normalize():
+    normalizer = CharacterNormalizer()
+    raw = ['Dex', 'DEXTER (V.O.)', ' deb ', 'Rita', 'Dex']
+    ids, names, voiceover = normalizer.normalize_many(raw)
+    assert [names[i] for i in ids] == [normalizer.normalize(name) for name in raw]
+    assert list(voiceover) == [normalizer.is_voiceover(name) for name in raw]
+    assert len(names) == 4
+
+
+def test_speech_tags_follow_multi_line_speech():
+    dialogue = _dataset(CharacterNormalizer())['episodes'][0]['dialogue']
+    tags = [tag for tag, _ in speech_tags(dialogue)]
+    assert tags == ['DEX', 'DEX', None, 'DEX', 'DEB', 'DEX', 'DEX']
+
+
+def test_renormalize_matches_reparse_for_continuation_lines():
+    edited = dict(CharacterNormalizer().name_mappings, DEX='DEXTER MORGAN')
+    before = _dataset(CharacterNormalizer())
+    renormalized = renormalize_dataset(copy.deepcopy(before), CharacterNormalizer(edited))
+    assert renormalized == _dataset(CharacterNormalizer(edited))
+    assert [entry.get('speaker') for entry in renormalized['episodes'][0]['dialogue']] == [
+        'DEXTER MORGAN', 'DEXTER MORGAN', None, 'DEXTER MORGAN', 'DEBRA', 'DEXTER MORGAN', 'DEXTER MORGAN']
+
+
+def test_renormalize_with_unchanged_table_is_identity():
+    before = _dataset(CharacterNormalizer())
+    assert renormalize_dataset(copy.deepcopy(before), CharacterNormalizer()) == before
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from episode_catalog import EpisodeCatalog, parse_title
+
+
+@pytest.mark.parametrize('title, episode, last_episode, name', [
+    ('04x12 - The Getaway', 12, 12, 'The Getaway'),
+    ('08x11/12 - Remember the Monsters?', 11, 12, 'Remember the Monsters?'),
+    ('01x01-02 - Pilot', 1, 2, 'Pilot'),
+    ('03x04 & 05 - Finding Freebo', 4, 5, 'Finding Freebo'),
+    # A spaced hyphen separates the name, even when the name is a number
+    ('02x05 - 24', 5, 5, '24'),
+    ('01x01 - 02', 1, 1, '02'),
+    # Too wide to be one multi-part topic; the number is kept as the name
+    ('02x05-24', 5, 5, '24'),
+    ('02x05/04 - Backwards', 5, 5, 'Backwards'),
+    # No name, or no separator before it
+    ('Dexter 2x5', 5, 5, ''),
+    ('1x01 Pilot', 1, 1, 'Pilot'),
+])
+def test_parse_title_episode_ranges(title, episode, last_episode, name):
+    parsed = parse_title(title)
+    assert (parsed['episode'], parsed['last_episode'], parsed['name']) == (episode, last_episode, name)
+
+
+def test_parse_title_series_prefix():
+    parsed = parse_title('New Blood: 01x10 - Sins of the Father')
+    assert (parsed['series'], parsed['season'], parsed['episode']) == ('New Blood', 1, 10)
+
+
+def test_parse_title_series_before_marker():
+    parsed = parse_title('Dexter 01x01 - Pilot')
+    assert (parsed['series'], parsed['season'], parsed['episode'], parsed['name']) == ('Dexter', 1, 1, 'Pilot')
+    assert parse_title('Episode discussion') is None
+
+
+def test_write_partitioned_removes_stale_partitions(tmp_path):
+    def dataset(*titles):
+        return {'metadata': {}, 'episodes': [
+            {'title': title, 'url': f'https://example.com/t{i}', 'dialogue': []}
+            for i, title in enumerate(titles)]}
+
+    EpisodeCatalog().write_partitioned(dataset('01x01 - Pilot', 'New Blood: 01x01 - Cold Snap'), tmp_path)
+    assert (tmp_path / 'new_blood' / 'season_01.json').exists()
+
+    EpisodeCatalog().write_partitioned(dataset('02x01 - It\'s Alive!'), tmp_path)
+    assert not (tmp_path / 'dexter' / 'season_01.json').exists()
+    assert not (tmp_path / 'new_blood').exists()
+    catalog = json.loads((tmp_path / 'catalog.json').read_text())
+    assert [entry['partition'] for entry in catalog['episodes']] == ['dexter/season_02.json']
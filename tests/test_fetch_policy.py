@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from fetch_policy import DeadlineExceeded, DeadlineFetcher
+
+
+class FakeSession:
+    """Answers each GET from a script of ``(status, delay)`` steps, repeating the last one.
+
+    A delay longer than the read timeout raises ReadTimeout at the timeout, like a real socket.
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.calls.append(time.monotonic())
+            status, delay = self.script[min(len(self.calls), len(self.script)) - 1]
+        read_timeout = timeout[1]
+        if delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout(f'{url} read timed out')
+        time.sleep(delay)
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.reason = 'test'
+        return response
+
+
+def fetcher_for(session, **options):
+    fetcher = DeadlineFetcher(requests.Session(), hedge=False, **options)
+    fetcher._thread_session = lambda: session
+    return fetcher
+
+
+def test_retries_back_off_within_the_deadline():
+    session = FakeSession([(503, 0)])
+    fetcher = fetcher_for(session, deadline=5.0, max_attempts=4, backoff=0.1)
+    with pytest.raises(requests.HTTPError):
+        fetcher.get('http://example.org/t=1')
+    gaps = [later - earlier for earlier, later in zip(session.calls, session.calls[1:])]
+    assert len(session.calls) == 4
+    # Each wait is at least half of the doubling backoff: 0.05, 0.1, 0.2
+    assert all(gap >= 0.05 * 2 ** i for i, gap in enumerate(gaps))
+
+
+def test_errors_that_outlast_the_deadline_are_not_timeouts():
+    url = 'http://example.org/t=1'
+    fetcher = fetcher_for(FakeSession([(503, 0)]), deadline=0.3, max_attempts=5, backoff=10.0, max_backoff=10.0)
+    start = time.monotonic()
+    with pytest.raises(requests.HTTPError):
+        fetcher.get(url)
+    assert time.monotonic() - start < 1.0
+    assert fetcher.stats['deadline_misses'] == 0
+    assert url not in fetcher.timeouts
+
+
+def test_single_timeout_is_retried_not_quarantined():
+    url = 'http://example.org/t=2'
+    session = FakeSession([(200, 0.5), (200, 0)])
+    fetcher = fetcher_for(session, deadline=0.2, max_attempts=1, backoff=0.01)
+    assert fetcher.fetch(url).status_code == 200
+    assert not fetcher.is_quarantined(url)
+    assert fetcher.stats['deadline_misses'] == 1
+
+
+def test_repeated_timeouts_quarantine_the_page():
+    url = 'http://example.org/t=3'
+    fetcher = fetcher_for(FakeSession([(200, 0.5)]), deadline=0.1, backoff=0.01)
+    with pytest.raises(DeadlineExceeded):
+        fetcher.fetch(url)
+    assert fetcher.is_quarantined(url)
+    assert fetcher.timeouts[url] == 2
+    assert fetcher.drain_quarantine() == [url]
+
+
+def test_waiting_for_a_busy_pool_is_not_a_timeout():
+    release = threading.Event()
+
+    class Blocking:
+        def get(self, url, timeout=None):
+            release.wait()
+            raise requests.ConnectionError('closed')
+
+    fetcher = fetcher_for(Blocking(), deadline=0.1, workers=1, backoff=0.01)
+    fetcher.executor.submit(fetcher._attempt, 'http://example.org/stuck', time.monotonic() + 60)
+    url = 'http://example.org/t=4'
+    with pytest.raises(DeadlineExceeded):
+        fetcher.get(url)
+    release.set()
+    assert fetcher.stats['pool_waits'] == 1
+    assert fetcher.stats['deadline_misses'] == 0
+    assert not fetcher.is_quarantined(url)
+    fetcher.close()
+
+
+def test_each_thread_gets_its_own_session_without_retries():
+    template = requests.Session()
+    template.headers['User-Agent'] = 'dexter-test'
+    fetcher = DeadlineFetcher(template, workers=2)
+    sessions = [fetcher.executor.submit(fetcher._thread_session) for _ in range(2)]
+    main_session = fetcher._thread_session()
+    assert main_session is not template
+    assert main_session.headers['User-Agent'] == 'dexter-test'
+    assert main_session.get_adapter('https://example.org').max_retries.total == 0
+    assert all(future.result() is not main_session for future in sessions)
+    fetcher.close()
+    assert fetcher.executor._shutdown
+    assert fetcher._sessions == []
@@ -0,0 +1,43 @@
+import gzip
+import json
+
+import pytest
+
+from framed_output import FramedOutputReader, FramedOutputWriter, seek_table_path
+
+
+def episode(title, topic):
+    return {'title': title, 'url': f'https://example.org/viewtopic.php?t={topic}',
+            'dialogue': [], 'metadata': {}}
+
+
+EPISODES = [episode('01x01 - Pilot', 1), episode('New Blood: 01x01 - Cold Snap', 2),
+            episode('New Blood: 01x02 - Storm', 3)]
+
+
+def test_select_matches_series_case_insensitively(tmp_path):
+    path = tmp_path / 'out.json.gz'
+    with FramedOutputWriter(str(path), 'gzip') as writer:
+        writer.write_episodes(EPISODES)
+    reader = FramedOutputReader(str(path))
+    assert [frame['title'] for frame in reader.select(series='new blood', seasons=[1])] == \
+        ['New Blood: 01x01 - Cold Snap', 'New Blood: 01x02 - Storm']
+    assert [frame['title'] for frame in reader.select(series='DEXTER')] == ['01x01 - Pilot']
+    assert json.loads(gzip.decompress(path.read_bytes()))['episodes'] == EPISODES
+
+
+def test_failed_write_leaves_no_seek_table(tmp_path):
+    path = tmp_path / 'out.json.gz'
+    with FramedOutputWriter(str(path), 'gzip') as writer:
+        writer.write_episodes(EPISODES)
+    assert seek_table_path(path).exists()
+
+    with pytest.raises(RuntimeError):
+        with FramedOutputWriter(str(path), 'gzip') as writer:
+            writer.write_episode(EPISODES[0])
+            raise RuntimeError('scrape interrupted')
+    assert not seek_table_path(path).exists()
+    with pytest.raises(FileNotFoundError):
+        FramedOutputReader(str(path))
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(gzip.decompress(path.read_bytes()))
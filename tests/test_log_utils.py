@@ -0,0 +1,41 @@
+import logging
+
+import log_utils
+from log_utils import setup_logging, stop_logging
+
+
+def test_mutable_arguments_are_logged_as_of_the_call(tmp_path):
+    log_file = tmp_path / 'scraper.log'
+    setup_logging(str(log_file))
+    stats = {'requests': 1}
+    logging.getLogger('dexter.test').info("Fetch stats: %s (%d)", stats, 7)
+    stats['requests'] = 99
+    stop_logging()
+    assert "Fetch stats: {'requests': 1} (7)" in log_file.read_text()
+
+
+def test_exception_text_survives_the_frame(tmp_path):
+    log_file = tmp_path / 'scraper.log'
+    setup_logging(str(log_file), json_format=True)
+
+    def fail():
+        try:
+            raise ValueError('bad page')
+        except ValueError:
+            logging.getLogger('dexter.test').exception("Parsing %s failed", 'u')
+
+    fail()
+    stop_logging()
+    text = log_file.read_text()
+    assert 'Parsing u failed' in text and 'ValueError: bad page' in text
+
+
+def test_stop_logging_closes_the_log_file(tmp_path):
+    setup_logging(str(tmp_path / 'scraper.log'))
+    root = logging.getLogger()
+    queue_handler = root.handlers[0]
+    file_handler = next(handler for handler in log_utils._listener.handlers
+                        if isinstance(handler, logging.FileHandler))
+    stop_logging()
+    assert file_handler.stream is None
+    assert queue_handler not in root.handlers
@@ -0,0 +1,55 @@
+from memory_profile import MemoryProfiler
+
+
+def record(url, **peaks):
+    return {'url': url, 'stages': {stage: {'peak_bytes': peak} for stage, peak in peaks.items()}}
+
+
+def profiler_with(records):
+    profiler = MemoryProfiler()
+    profiler.stop()
+    profiler.episodes = records
+    return profiler
+
+
+def full_parse(url, peak):
+    return record(url, fetch=50, soup=peak, extract=peak // 4, parse=peak // 2)
+
+
+def test_cache_hits_do_not_skew_outliers():
+    parsed = [full_parse(f'p{i}', 100_000 + i * 1_000) for i in range(5)]
+    # Dialogue cache hits run no parse-side stage; line hits run only parse
+    dialogue_hits = [record(f'd{i}', fetch=50) for i in range(20)]
+    line_hits = [record(f'l{i}', fetch=50, parse=2_000 + i) for i in range(5)]
+    assert profiler_with(parsed + dialogue_hits + line_hits).outliers() == []
+
+
+def test_outlier_is_flagged_among_full_parses():
+    parsed = [full_parse(f'p{i}', 100_000 + i * 1_000) for i in range(5)] + [full_parse('big', 1_000_000)]
+    hits = [record(f'd{i}', fetch=50) for i in range(20)]
+    outliers = profiler_with(parsed + hits).outliers()
+    assert [outlier['url'] for outlier in outliers] == ['big']
+    assert outliers[0]['stages'] == ['soup', 'extract', 'parse']
+
+
+def test_deduplicated_reparse_attributes_parsing_to_episodes(tmp_path):
+    import tracemalloc
+
+    from darkly_speaking_dexter_v3 import DexterScraper
+    from raw_page_archive import RawPageArchive
+    from topic_dedup import TopicDeduplicator
+
+    archive = RawPageArchive(str(tmp_path / 'archive'))
+    for topic in (1, 2):
+        lines = '<br>'.join(f'[DEX] Episode {topic} line {i}, {"night " * topic * i}' for i in range(30))
+        page = f'<h2 class="title">01x0{topic} - Title</h2><div class="content">{lines}</div>'
+        archive.store(f'https://example.org/viewtopic.php?t={topic}', page.encode('utf-8'), {}, 'utf-8')
+
+    profiler = MemoryProfiler()
+    scraper = DexterScraper(archive=archive, memory_profiler=profiler,
+                            deduplicator=TopicDeduplicator(0.8, policy='first'))
+    scraper.reparse_archive()
+    assert len(scraper.episodes_data) == 2
+    assert [sorted(episode['stages']) for episode in profiler.episodes] == [['extract', 'parse', 'soup']] * 2
+    scraper.close()
+    assert not tracemalloc.is_tracing()
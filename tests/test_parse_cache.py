@@ -0,0 +1,24 @@
+from character_name_utils import CharacterNormalizer
+from darkly_speaking_dexter_v3 import DexterScraper
+from parse_cache import ParseCache
+
+PAGE = ('<h2 class="title">01x01 - Pilot</h2><div class="content">'
+        '[DEX] Morning.<br>Did you sleep at all?<br>[DEB] Not a wink.<br>[DEX] Coffee, then.</div>')
+
+
+def _parse(cache, normalizer):
+    episode = DexterScraper(parse_cache=cache, name_normalizer=normalizer).parse_episode_html(PAGE, 'u')
+    return [(entry.get('speaker'), entry.get('original_speaker')) for entry in episode['dialogue']], \
+        episode['metadata']['unique_speakers']
+
+
+def test_mapping_change_only_renormalizes_cached_dialogue(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache.sqlite'))
+    _parse(cache, CharacterNormalizer())
+
+    edited = CharacterNormalizer(dict(CharacterNormalizer().name_mappings, DEX='DEXTER MORGAN'))
+    expected = _parse(None, edited)
+    assert _parse(cache, edited) == expected
+    assert _parse(cache, edited) == expected
+    assert cache.stats == {'dialogue_hits': 1, 'renormalized': 1, 'line_hits': 0, 'misses': 1}
+    cache.close()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from similarity_index import SimilarityIndex
+
+
+def episode(topic, *texts):
+    return {'title': f'01x{topic:02d} - Episode', 'url': f'https://example.org/viewtopic.php?t={topic}',
+            'dialogue': [{'speaker': 'DEXTER', 'text': text, 'line_number': i} for i, text in enumerate(texts, 1)]}
+
+
+def snapshot(index):
+    return [(hit['episode'], hit['line_number'], round(hit['score'], 5))
+            for hit in index.query('the night is dark', k=10)], len(index), index.doc_freq.sum()
+
+
+def test_changed_episodes_match_a_fresh_index_after_save(tmp_path):
+    index = SimilarityIndex(n_features=1 << 10)
+    index.add_episode(episode(1, 'The night is calling.', 'Tonight is the night.'))
+    index.add_episode(episode(2))
+    index.add_episode(episode(3, 'Dark passenger.', 'It was a dark night.'))
+    # Changed before and after the rows were joined onto the arrays
+    index.add_episode(episode(3, 'Dark dark night.'))
+    index.query('night')
+    index.add_episode(episode(1, 'The night is dark.'))
+
+    fresh = SimilarityIndex(n_features=1 << 10)
+    for topic_episode in (episode(2), episode(3, 'Dark dark night.'), episode(1, 'The night is dark.')):
+        fresh.add_episode(topic_episode)
+
+    assert snapshot(index) == snapshot(fresh)
+    index.save(str(tmp_path))
+    assert len(index.lines) == 2 and index.live.all()
+    loaded = SimilarityIndex.load(str(tmp_path))
+    assert snapshot(loaded) == snapshot(fresh)
+    assert np.array_equal(loaded.doc_freq, fresh.doc_freq)
+
+    assert not loaded.add_episode(episode(3, 'Dark dark night.'))
+    loaded.add_episode(episode(3, 'Rita.'))
+    assert len(loaded) == 2
+    assert [hit['line_number'] for hit in loaded.query('night')] == [1]
@@ -0,0 +1,82 @@
+import sqlite3
+
+import pytest
+
+from sqlite_sink import SqliteSink
+
+
+def episode(title, topic, lines):
+    return {
+        'title': title,
+        'url': f'https://example.org/viewtopic.php?t={topic}',
+        'dialogue': [dict(line, line_number=i) for i, line in enumerate(lines, 1)],
+        'metadata': {},
+    }
+
+
+def spoken(speaker, text):
+    return {'speaker': speaker, 'text': text, 'type': 'spoken'}
+
+
+def test_failed_episode_does_not_leak_ids(tmp_path):
+    sink = SqliteSink(str(tmp_path / 'db.sqlite'))
+    sink.write_episode(episode('01x01 - Pilot', 1, [spoken('DEXTER', 'Tonight is the night.')]))
+    # The second line has no text, so the episode fails after RITA was assigned an id
+    broken = episode('01x02 - Crocodile', 2, [spoken('RITA', 'Hi.'), {'speaker': 'RITA', 'type': 'spoken'}])
+    with pytest.raises(KeyError):
+        sink.write_episode(broken)
+
+    sink.write_episode(episode('01x03 - Popping Cherry', 3,
+                               [spoken('RITA', 'Hello.'), spoken('DEXTER', 'Hi.')]))
+    assert sink.conn.execute('PRAGMA foreign_key_check').fetchall() == []
+    assert sink.conn.execute('SELECT COUNT(*) FROM lines').fetchone()[0] == 3
+    assert [row[2] for row in sink.search('Hello')] == ['RITA']
+    sink.close()
+
+
+def test_search_filters_by_series(tmp_path):
+    sink = SqliteSink(str(tmp_path / 'db.sqlite'))
+    sink.write_episode(episode('01x01 - Pilot', 1, [spoken('DEXTER', 'The night is calling.')]))
+    sink.write_episode(episode('New Blood: 01x01 - Cold Snap', 2, [spoken('DEXTER', 'The night is cold.')]))
+
+    assert len(sink.search('night', season=1)) == 2
+    assert [row[0] for row in sink.search('night', season=1, series='new blood')] == \
+        ['New Blood: 01x01 - Cold Snap']
+    assert [row[0] for row in sink.search('night', series='Dexter')] == ['01x01 - Pilot']
+    sink.close()
+
+
+def test_existing_database_gets_series_column(tmp_path):
+    path = str(tmp_path / 'db.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE episodes (id INTEGER PRIMARY KEY, topic_id TEXT NOT NULL UNIQUE, '
+                 'title TEXT NOT NULL, url TEXT NOT NULL, season INTEGER, episode INTEGER, '
+                 'scraped_at TEXT, total_lines INTEGER, unique_speakers INTEGER)')
+    conn.execute("INSERT INTO episodes (topic_id, title, url, season, episode) "
+                 "VALUES ('7', 'New Blood: 01x02 - Storm', 'u', 1, 2)")
+    conn.commit()
+    conn.close()
+
+    sink = SqliteSink(path)
+    assert sink.conn.execute('SELECT series FROM episodes').fetchall() == [('New Blood',)]
+    sink.close()
+
+
+def test_unparsed_title_keeps_season_and_episode(tmp_path):
+    sink = SqliteSink(str(tmp_path / 'db.sqlite'))
+    sink.write_episode(episode('Dexter S02x05', 1, [spoken('DEXTER', 'Hello.')]))
+    assert sink.conn.execute('SELECT series, season, episode FROM episodes').fetchone() == (None, 2, 5)
+    sink.close()
+
+
+@pytest.mark.parametrize('save, target', [('save_to_sqlite', 'db.sqlite'), ('save_partitioned', 'parts')])
+def test_scraper_validates_before_writing(tmp_path, save, target):
+    from darkly_speaking_dexter_v3 import DexterScraper
+
+    scraper = DexterScraper()
+    scraper.episodes_data = [dict(episode('01x01 - Pilot', 1, [spoken('DEXTER', 'Hi.')]),
+                                  metadata={'scraped_at': 'x', 'total_lines': -1, 'unique_speakers': 1})]
+    with pytest.raises(ValueError):
+        getattr(scraper, save)(str(tmp_path / target))
+    assert not (tmp_path / target).exists()
+    scraper.close()
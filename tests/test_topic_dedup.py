@@ -0,0 +1,19 @@
+from topic_dedup import TopicDeduplicator
+
+TRANSCRIPT = ' '.join(f'line {i} of the dark passenger speaking at night' for i in range(40))
+
+
+def test_near_duplicates_cluster():
+    dedup = TopicDeduplicator(0.8, policy='first')
+    dedup.add('a', TRANSCRIPT)
+    dedup.add('b', TRANSCRIPT + ' one more line')
+    assert dedup.duplicates() == {'b': 'a'}
+
+
+def test_short_texts_do_not_collapse():
+    dedup = TopicDeduplicator(0.8, policy='first')
+    for key, text in [('empty1', ''), ('empty2', ''), ('short1', 'coming soon'),
+                      ('short2', 'removed by moderator'), ('short3', 'coming soon')]:
+        dedup.add(key, text)
+    assert dedup.duplicates() == {'short3': 'short1'}
+    assert dedup.clusters() == [['short1', 'short3']]
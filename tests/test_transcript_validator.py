@@ -0,0 +1,67 @@
+import copy
+
+import pytest
+
+from records import ContextLine, DialogueLine, RecordError
+from transcript_validator import TranscriptValidator
+
+EPISODE = {
+    'title': 'Dexter: 01x01 - Pilot',
+    'url': 'https://example.org/viewtopic.php?t=1',
+    'dialogue': [
+        {'context': ['[PHONE RINGS]'], 'line_number': 1},
+        {'speaker': 'DEXTER', 'original_speaker': 'DEX', 'text': 'Hello.', 'type': 'spoken', 'line_number': 2},
+        {'speaker': 'DEBRA', 'original_speaker': 'DEB', 'text': 'Hi.', 'type': 'voiceover', 'line_number': 3},
+    ],
+    'metadata': {'scraped_at': '2024-12-08 18:01:47', 'total_lines': 3, 'unique_speakers': 2},
+}
+
+
+def _errors(episode):
+    return TranscriptValidator().validate_episode(episode, 0)[1]
+
+
+def test_valid_episode():
+    assert _errors(copy.deepcopy(EPISODE)) == []
+
+
+def test_every_missing_field_is_reported():
+    episode = copy.deepcopy(EPISODE)
+    del episode['title'], episode['url']
+    assert _errors(episode) == ["Episode 0: Missing required field 'title'",
+                                "Episode 0: Missing required field 'url'"]
+
+
+def test_bool_counts_are_accepted():
+    episode = copy.deepcopy(EPISODE)
+    episode['metadata']['total_lines'] = True
+    assert _errors(episode) == []
+
+
+def test_context_entry_with_speaker_is_checked_as_context():
+    episode = copy.deepcopy(EPISODE)
+    episode['dialogue'][0]['speaker'] = 'DEXTER'
+    assert _errors(episode) == []
+    episode['dialogue'][0]['context'] = []
+    assert _errors(episode) == ["Episode 0: Invalid context at line 1"]
+
+
+def test_invalid_type_is_reported():
+    episode = copy.deepcopy(EPISODE)
+    episode['dialogue'][1]['type'] = 'sung'
+    assert _errors(episode) == ["Episode 0: Invalid dialogue type 'sung' at line 2"]
+
+
+def test_dialogue_record_with_context_still_needs_dialogue_fields():
+    with pytest.raises(RecordError):
+        DialogueLine('DEXTER', 'Hello.', 'sung', 2, context=['[MUSIC]'])
+
+
+@pytest.mark.parametrize('make, message', [
+    (lambda: DialogueLine('DEXTER', 'Hello.', 'spoken', 3, context=[]), "Invalid context at line 3"),
+    (lambda: ContextLine([], 4), "Invalid context at line 4"),
+    (lambda: ContextLine('[MUSIC]', 5), "Invalid context at line 5"),
+])
+def test_records_report_the_validator_messages(make, message):
+    with pytest.raises(RecordError, match=message):
+        make()
@@ -0,0 +1,41 @@
+import copy
+import json
+from pathlib import Path
+
+from turn_aggregation import aggregate_dataset, expand_dataset
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample_output.json'
+
+
+def dataset(dialogue):
+    lines = [dict(entry, line_number=i) for i, entry in enumerate(dialogue, 1)]
+    return {'metadata': {'total_episodes': 1},
+            'episodes': [{'title': '01x01 - Pilot', 'url': 'u', 'dialogue': lines,
+                          'metadata': {'total_lines': len(lines)}}]}
+
+
+def round_trip(data):
+    original = copy.deepcopy(data)
+    aggregated = aggregate_dataset(data)
+    assert data == original
+    # Through JSON, as the files are written
+    return expand_dataset(json.loads(json.dumps(aggregated)))
+
+
+def test_sample_output_round_trips_exactly():
+    with SAMPLE.open('r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert round_trip(data) == data
+
+
+def test_lines_without_original_speaker_round_trip_exactly():
+    data = dataset([
+        {'speaker': 'DEXTER', 'text': 'Tonight is the night.', 'type': 'voiceover'},
+        {'speaker': 'DEXTER', 'text': 'And it is going to happen.', 'type': 'voiceover'},
+        {'context': ['PHONE RINGS']},
+        {'speaker': 'DEBRA', 'text': 'Dex!', 'type': 'spoken'},
+        {'speaker': 'DEBRA', 'original_speaker': 'DEB', 'text': 'Pick up.', 'type': 'spoken'},
+        {'speaker': 'DEBRA', 'original_speaker': 'DEBRA', 'text': 'Now.', 'type': 'spoken'},
+        {'speaker': 'DEBRA', 'text': 'Please.', 'type': 'spoken'},
+    ])
+    assert round_trip(data) == data
@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+import records
+import validation_cache
+from validation_cache import IncrementalValidator, ValidationCache, rules_version
+
+SAMPLE = Path(__file__).resolve().parent.parent / 'sample_output.json'
+
+
+def test_rules_version_covers_the_rule_tables(monkeypatch):
+    version = rules_version()
+    monkeypatch.setattr(records, 'DIALOGUE_TYPES', records.DIALOGUE_TYPES | {'whisper'})
+    assert rules_version() != version
+    monkeypatch.undo()
+    monkeypatch.setattr(records, 'METADATA_FIELDS', records.METADATA_FIELDS + ('source',))
+    assert rules_version() != version
+
+
+def test_a_run_prunes_results_from_older_rules(tmp_path, monkeypatch):
+    with SAMPLE.open('r', encoding='utf-8') as f:
+        data = json.load(f)
+    cache = ValidationCache(str(tmp_path / 'vc.sqlite'))
+    monkeypatch.setattr(validation_cache, 'rules_version', lambda: 'old-rules')
+    IncrementalValidator(cache).validate_dataset(data)
+    monkeypatch.undo()
+
+    validator = IncrementalValidator(cache)
+    validator.validate_dataset(data)
+    versions = {row[0] for row in cache.conn.execute('SELECT DISTINCT rules_version FROM results')}
+    assert versions == {validator.version}
+    cache.close()
@@ -0,0 +1,39 @@
+import pytest
+
+from work_queue import SqliteWorkQueue, WorkQueue
+
+
+def test_partial_backend_cannot_be_instantiated():
+    class PutOnly(WorkQueue):
+        def put(self, urls, queue='default', requeue_done=False):
+            return 0
+
+    with pytest.raises(TypeError):
+        PutOnly()
+
+
+def test_failed_put_releases_the_write_lock(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / 'queue.sqlite'))
+
+    # The second URL cannot be bound, so the insert fails inside the transaction
+    with pytest.raises(Exception):
+        queue.put(['https://example.org/t1', object()])
+    assert not queue.conn.in_transaction
+    assert queue.put(['https://example.org/t1']) == 1
+    queue.close()
+
+
+def test_done_jobs_are_requeued_only_on_request(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / 'queue.sqlite'))
+    assert queue.put(['https://example.org/t1', 'https://example.org/t2']) == 2
+    job = queue.lease('worker')
+    assert queue.complete(job, {'url': job['url']})
+
+    assert queue.put(['https://example.org/t1', 'https://example.org/t3']) == 1
+    assert queue.stats()['default'] == {'done': 1, 'pending': 2}
+
+    assert queue.put(['https://example.org/t1'], requeue_done=True) == 1
+    assert queue.stats()['default'] == {'pending': 3}
+    assert list(queue.results()) == []
+    assert queue.lease('worker')['attempts'] == 1
+    queue.close()
@@ -0,0 +1,181 @@
+import hashlib
+import random
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # signatures fall back to pure Python
+    np = None
+
+from raw_page_archive import RawPageArchive
+
+# Largest prime below 2**32; permutations are (a * x + b) mod HASH_PRIME
+HASH_PRIME = 4294967291
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+POLICIES = ('first', 'latest', 'longest')
+
+
+def shingles(text: str, size: int = 5) -> List[int]:
+    """Hash every ``size``-word window of the lowercased text to 32 bits.
+
+    Texts shorter than one window have no shingles.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    return list({
+        int.from_bytes(hashlib.blake2b(' '.join(words[i:i + size]).encode('utf-8'),
+                                       digest_size=4).digest(), 'little')
+        for i in range(len(words) - size + 1)
+    })
+
+
+class MinHasher:
+    """MinHash signatures over word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, 1 << 31) for _ in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature, or None for a text too short to shingle."""
+        hashes = shingles(text, self.shingle_size)
+        if not hashes:
+            return None
+        if np is not None:
+            values = np.array(hashes, dtype=np.uint64)[None, :]
+            permuted = (self._a * values + self._b) % HASH_PRIME
+            return tuple(int(v) for v in permuted.min(axis=1))
+        return tuple(
+            min((a * h + b) % HASH_PRIME for h in hashes)
+            for a, b in zip(self.a, self.b)
+        )
+
+    @staticmethod
+    def similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class TopicDeduplicator:
+    """Clusters near-duplicate transcripts with MinHash and LSH banding.
+
+    Documents only become comparison candidates when one of their signature
+    bands collides, so clustering is sub-quadratic. Candidates are confirmed
+    against ``threshold`` and merged with union-find. Texts shorter than one
+    shingle only match exact copies of their words, and empty texts match
+    nothing, so stub pages do not collapse into one cluster. Keys can be anything
+    hashable, e.g. ``(forum, url)``, so one instance can span a whole
+    multi-show archive.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 5, policy: str = 'longest'):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}', expected one of {POLICIES}")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.policy = policy
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.signatures: Dict[Hashable, Tuple[int, ...]] = {}
+        self.info: Dict[Hashable, Dict] = {}
+        self.buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(bands)]
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.short_texts: Dict[Tuple[str, ...], List[Hashable]] = {}
+
+    def _find(self, key: Hashable) -> Hashable:
+        while self.parent[key] != key:
+            self.parent[key] = self.parent[self.parent[key]]
+            key = self.parent[key]
+        return key
+
+    def _union(self, a: Hashable, b: Hashable) -> None:
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+    def add(self, key: Hashable, text: str, length: Optional[int] = None) -> List[Hashable]:
+        """Index a document and return the keys it was found to duplicate."""
+        signature = self.hasher.signature(text)
+        self.info[key] = {'order': len(self.info), 'length': length if length is not None else len(text)}
+        self.parent[key] = key
+        if signature is None:
+            words = tuple(WORD_PATTERN.findall(text.lower()))
+            if not words:
+                return []
+            bucket = self.short_texts.setdefault(words, [])
+            duplicates = list(bucket)
+            bucket.append(key)
+            for other in duplicates:
+                self._union(other, key)
+            return duplicates
+        self.signatures[key] = signature
+
+        candidates = set()
+        for band in range(self.bands):
+            band_key = signature[band * self.rows:(band + 1) * self.rows]
+            bucket = self.buckets[band].setdefault(band_key, [])
+            candidates.update(bucket)
+            bucket.append(key)
+
+        duplicates = []
+        for other in candidates:
+            if MinHasher.similarity(signature, self.signatures[other]) >= self.threshold:
+                self._union(other, key)
+                duplicates.append(other)
+        return duplicates
+
+    def clusters(self) -> List[List[Hashable]]:
+        """Groups of keys that are near-duplicates of each other (size >= 2)."""
+        groups: Dict[Hashable, List[Hashable]] = {}
+        for key in self.parent:
+            groups.setdefault(self._find(key), []).append(key)
+        return [keys for keys in groups.values() if len(keys) > 1]
+
+    def canonical(self, keys: Iterable[Hashable]) -> Hashable:
+        keys = list(keys)
+        if self.policy == 'first':
+            return min(keys, key=lambda k: self.info[k]['order'])
+        if self.policy == 'latest':
+            return max(keys, key=lambda k: self.info[k]['order'])
+        return max(keys, key=lambda k: (self.info[k]['length'], -self.info[k]['order']))
+
+    def duplicates(self) -> Dict[Hashable, Hashable]:
+        """Map every non-canonical key to the canonical key of its cluster."""
+        mapping = {}
+        for keys in self.clusters():
+            keep = self.canonical(keys)
+            for key in keys:
+                if key != keep:
+                    mapping[key] = keep
+        return mapping
+
+
+def episode_text(episode: Dict) -> str:
+    return '\n'.join(entry['text'] for entry in episode['dialogue'] if 'text' in entry)
+
+
+def find_archive_duplicates(archives: Dict[str, RawPageArchive], scraper,
+                            deduplicator: Optional[TopicDeduplicator] = None) -> Dict:
+    """Find near-duplicate topics across several show archives without parsing dialogue.
+
+    Only the transcript lines are extracted from each page, with
+    ``scraper.extract_episode_lines``. Keys in the result are (show, url).
+    """
+    deduplicator = deduplicator or TopicDeduplicator()
+    for show, archive in archives.items():
+        for record, body in archive.iter_pages():
+            extracted = scraper.extract_episode_lines(body, record['url'], record.get('encoding'))
+            if extracted:
+                _, lines = extracted
+                deduplicator.add((show, record['url']), '\n'.join(lines), len(lines))
+    return deduplicator.duplicates()
@@ -1,57 +1,39 @@
 from typing import Dict, List, Tuple
 from datetime import datetime
+from records import EPISODE_FIELDS, episode_problems, line_problems
 
 class TranscriptValidator:
     def __init__(self):
         self.validation_errors: List[str] = []
         self.validation_warnings: List[str] = []
         
-        # Define expected fields and types
-        self.episode_required_fields = {'title', 'url', 'dialogue', 'metadata'}
-        self.dialogue_required_fields = {'line_number'}
-        self.metadata_required_fields = {'scraped_at', 'total_lines', 'unique_speakers'}
+        # Structural rules live in records, shared with the typed record classes
     
-    def validate_episode(self, episode_data: Dict, episode_index: int) -> Tuple[bool, List[str], List[str]]:
-        """Validate a single episode's data structure and content."""
+    def check_episode(self, episode_data: Dict) -> Tuple[List[str], List[str]]:
+        """Errors and warnings for one episode, not yet prefixed with its position."""
         self.validation_errors = []
         self.validation_warnings = []
         
-        # Check required fields
-        for field in self.episode_required_fields:
-            if field not in episode_data:
-                self.validation_errors.append(f"Episode {episode_index}: Missing required field '{field}'")
+        # Check required fields, title and metadata
+        self.validation_errors.extend(episode_problems(episode_data))
         
-        if not self.validation_errors:
-            # Validate title
-            if not episode_data['title'] or not isinstance(episode_data['title'], str):
-                self.validation_errors.append(f"Episode {episode_index}: Invalid or empty title")
-            
-            # Validate metadata
-            self._validate_metadata(episode_data['metadata'], episode_index)
-            
+        if all(field in episode_data for field in EPISODE_FIELDS):
             # Validate dialogue
-            self._validate_dialogue(episode_data['dialogue'], episode_index)
+            self._validate_dialogue(episode_data['dialogue'])
         
-        return not bool(self.validation_errors), self.validation_errors, self.validation_warnings
+        return self.validation_errors, self.validation_warnings
     
-    def _validate_metadata(self, metadata: Dict, episode_index: int) -> None:
-        """Validate episode metadata."""
-        for field in self.metadata_required_fields:
-            if field not in metadata:
-                self.validation_errors.append(f"Episode {episode_index}: Missing metadata field '{field}'")
-                return
-        
-        # Validate numerical fields
-        if not isinstance(metadata['total_lines'], int) or metadata['total_lines'] < 0:
-            self.validation_errors.append(f"Episode {episode_index}: Invalid total_lines count")
-        
-        if not isinstance(metadata['unique_speakers'], int) or metadata['unique_speakers'] < 0:
-            self.validation_errors.append(f"Episode {episode_index}: Invalid unique_speakers count")
+    def validate_episode(self, episode_data: Dict, episode_index: int) -> Tuple[bool, List[str], List[str]]:
+        """Validate a single episode's data structure and content."""
+        errors, warnings = self.check_episode(episode_data)
+        self.validation_errors = [f"Episode {episode_index}: {error}" for error in errors]
+        self.validation_warnings = [f"Episode {episode_index}: {warning}" for warning in warnings]
+        return not bool(self.validation_errors), self.validation_errors, self.validation_warnings
     
-    def _validate_dialogue(self, dialogue: List[Dict], episode_index: int) -> None:
+    def _validate_dialogue(self, dialogue: List[Dict]) -> None:
         """Validate dialogue entries."""
         if not dialogue:
-            self.validation_warnings.append(f"Episode {episode_index}: Empty dialogue list")
+            self.validation_warnings.append("Empty dialogue list")
             return
         
         line_numbers = set()
@@ -61,39 +43,26 @@ class TranscriptValidator:
         for i, entry in enumerate(dialogue):
             # Check line number sequence
             if 'line_number' not in entry:
-                self.validation_errors.append(f"Episode {episode_index}: Missing line number at position {i}")
-            else:
-                if entry['line_number'] in line_numbers:
-                    self.validation_errors.append(f"Episode {episode_index}: Duplicate line number {entry['line_number']}")
-                line_numbers.add(entry['line_number'])
-            
+                self.validation_errors.append(f"Missing line number at position {i}")
+                continue
+            if entry['line_number'] in line_numbers:
+                self.validation_errors.append(f"Duplicate line number {entry['line_number']}")
+            line_numbers.add(entry['line_number'])
+
             # Validate dialogue entry structure
-            if 'context' in entry:
-                if not isinstance(entry['context'], list) or not entry['context']:
-                    self.validation_errors.append(f"Episode {episode_index}: Invalid context at line {entry['line_number']}")
-            else:
-                if 'speaker' not in entry or 'text' not in entry or 'type' not in entry:
-                    self.validation_errors.append(
-                        f"Episode {episode_index}: Missing required dialogue fields at line {entry['line_number']}"
-                    )
+            self.validation_errors.extend(line_problems(entry))
+            
+            if 'context' not in entry and all(name in entry for name in ('speaker', 'text', 'type')):
+                # Track speaker consistency
+                if entry['speaker'] != current_speaker:
+                    consecutive_empty_speakers = 0
+                    current_speaker = entry['speaker']
                 else:
-                    # Track speaker consistency
-                    if entry['speaker'] != current_speaker:
-                        consecutive_empty_speakers = 0
-                        current_speaker = entry['speaker']
-                    else:
-                        consecutive_empty_speakers += 1
-                        if consecutive_empty_speakers > 5:
-                            self.validation_warnings.append(
-                                f"Episode {episode_index}: Possible missing speaker attribution "
-                                f"around line {entry['line_number']}"
-                            )
-                    
-                    # Validate dialogue type
-                    if entry['type'] not in {'spoken', 'voiceover'}:
-                        self.validation_errors.append(
-                            f"Episode {episode_index}: Invalid dialogue type '{entry['type']}' "
-                            f"at line {entry['line_number']}"
+                    consecutive_empty_speakers += 1
+                    if consecutive_empty_speakers > 5:
+                        self.validation_warnings.append(
+                            f"Possible missing speaker attribution "
+                            f"around line {entry['line_number']}"
                         )
     
     def validate_dataset(self, data: Dict) -> Tuple[bool, Dict[str, List[str]]]:
@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def _can_continue(turn: Dict, entry: Dict) -> bool:
+    """Whether a dialogue entry extends the current turn.
+
+    Continuation lines are the ones parse_line attributes to the running
+    speaker (original_speaker equal to the normalized name). An explicit
+    re-tag with a different raw name starts a new turn, which keeps every
+    line's original_speaker recoverable. So does a line that differs from the
+    turn in whether it records an original_speaker at all.
+    """
+    return (
+        'text' in entry
+        and 'context' not in entry
+        and entry.get('speaker') == turn['speaker']
+        and entry.get('type') == turn['type']
+        and ('original_speaker' in entry) == ('original_speaker' in turn)
+        and entry.get('original_speaker', entry.get('speaker')) == entry.get('speaker')
+    )
+
+
+def _start_turn(entry: Dict) -> Dict:
+    turn = {'speaker': entry['speaker']}
+    if 'original_speaker' in entry:
+        turn['original_speaker'] = entry['original_speaker']
+    turn.update({
+        'type': entry['type'],
+        'text': entry['text'],
+        'line_start': entry['line_number'],
+        'line_end': entry['line_number'],
+        'line_numbers': [entry['line_number']],
+        'offsets': [0],
+    })
+    return turn
+
+
+def aggregate_turns(dialogue: Iterable[Dict]) -> Iterator[Dict]:
+    """Merge consecutive same-speaker lines into speaker turns in one pass.
+
+    Only the turn being built is held, so the stage streams. Each turn keeps
+    ``line_numbers`` and the character ``offsets`` of each original line
+    within ``text``, so :func:`expand_turns` can restore the line records.
+    Context entries are passed through unchanged and always end a turn.
+    """
+    turn: Optional[Dict] = None
+    for entry in dialogue:
+        if turn is not None and _can_continue(turn, entry):
+            turn['offsets'].append(len(turn['text']) + 1)
+            turn['text'] = f"{turn['text']} {entry['text']}"
+            turn['line_numbers'].append(entry['line_number'])
+            turn['line_end'] = entry['line_number']
+            continue
+
+        if turn is not None:
+            yield turn
+            turn = None
+        if 'text' in entry and 'speaker' in entry and 'context' not in entry:
+            turn = _start_turn(entry)
+        else:
+            yield entry
+
+    if turn is not None:
+        yield turn
+
+
+def expand_turns(turns: Iterable[Dict]) -> Iterator[Dict]:
+    """Restore per-line dialogue records from aggregated turns."""
+    for turn in turns:
+        if 'line_numbers' not in turn:
+            yield turn
+            continue
+        offsets: List[int] = turn['offsets'] + [len(turn['text']) + 1]
+        for idx, line_number in enumerate(turn['line_numbers']):
+            line = {'speaker': turn['speaker']}
+            if 'original_speaker' in turn:
+                line['original_speaker'] = turn['original_speaker'] if idx == 0 else turn['speaker']
+            line['text'] = turn['text'][offsets[idx]:offsets[idx + 1] - 1]
+            line['type'] = turn['type']
+            line['line_number'] = line_number
+            yield line
+
+
+def aggregate_dataset(data: Dict) -> Dict:
+    """Return a turn-level copy of a scraper dataset; the input is left as is."""
+    episodes = []
+    for episode in data['episodes']:
+        turns = list(aggregate_turns(episode['dialogue']))
+        episodes.append(dict(episode, dialogue=turns,
+                             metadata=dict(episode['metadata'], total_turns=len(turns))))
+    metadata = dict(data['metadata'], granularity='turns',
+                    total_turns=sum(len(ep['dialogue']) for ep in episodes))
+    return {'metadata': metadata, 'episodes': episodes}
+
+
+def expand_dataset(data: Dict) -> Dict:
+    """Inverse of :func:`aggregate_dataset`: the result equals the dataset that was aggregated."""
+    if data.get('metadata', {}).get('granularity') != 'turns':
+        return data
+    episodes = []
+    for episode in data['episodes']:
+        metadata = {k: v for k, v in episode['metadata'].items() if k != 'total_turns'}
+        episodes.append(dict(episode, dialogue=list(expand_turns(episode['dialogue'])), metadata=metadata))
+    metadata = {k: v for k, v in data['metadata'].items() if k not in ('granularity', 'total_turns')}
+    return {'metadata': metadata, 'episodes': episodes}
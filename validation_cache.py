@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # content hashes fall back to the json module
+    orjson = None
+
+import records
+from parse_cache import code_fingerprint
+from transcript_validator import TranscriptValidator
+
+
+def rules_version() -> str:
+    """Fingerprint of every rule that contributes to an episode's validation result.
+
+    Covers the rule functions' source and the field and type tables they
+    check against, so editing either invalidates cached verdicts.
+    """
+    code = code_fingerprint(
+        TranscriptValidator.check_episode,
+        TranscriptValidator._validate_dialogue,
+        records.line_problems,
+        records._dialogue_problems,
+        records.metadata_problems,
+        records.episode_problems,
+        records._is_count,
+    )
+    tables = repr((sorted(records.DIALOGUE_TYPES), records.EPISODE_FIELDS, records.METADATA_FIELDS))
+    return hashlib.sha256(f'{code}:{tables}'.encode('utf-8')).hexdigest()[:16]
+
+
+def episode_content_hash(episode: Dict) -> str:
+    """Hash an episode's content for the validation cache.
+
+    ``scraped_at`` changes on every run without changing what the rules can
+    say about an episode, so only its presence is hashed.
+    """
+    content = dict(episode)
+    metadata = content.get('metadata')
+    if isinstance(metadata, dict) and 'scraped_at' in metadata:
+        content['metadata'] = dict(metadata, scraped_at=True)
+    # Hashing has to stay well below the cost of validating, hence orjson when available
+    if orjson is not None:
+        encoded = orjson.dumps(content, option=orjson.OPT_SORT_KEYS, default=str)
+    else:
+        encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class ValidationCache:
+    """Per-episode validation results, keyed on (content hash, rules version)."""
+
+    def __init__(self, path: str = 'validation_cache.sqlite'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                content_hash TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                errors TEXT NOT NULL,
+                warnings TEXT NOT NULL,
+                PRIMARY KEY (content_hash, rules_version)
+            );
+        """)
+
+    def get_many(self, hashes: List[str], version: str) -> Dict[str, Tuple[List[str], List[str]]]:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self.lock:
+            # Chunked to stay below SQLite's bound parameter limit
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self.conn.execute(
+                    'SELECT content_hash, errors, warnings FROM results WHERE rules_version = ? '
+                    f'AND content_hash IN ({", ".join("?" * len(chunk))})',
+                    (version, *chunk)
+                ).fetchall()
+                for content_hash, errors, warnings in rows:
+                    found[content_hash] = (json.loads(errors), json.loads(warnings))
+        return found
+
+    def put_many(self, results: Dict[str, Tuple[List[str], List[str]]], version: str) -> None:
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)',
+                [(content_hash, version, json.dumps(errors, ensure_ascii=False),
+                  json.dumps(warnings, ensure_ascii=False))
+                 for content_hash, (errors, warnings) in results.items()]
+            )
+
+    def prune(self, version: str) -> int:
+        """Drop results recorded under other rule versions."""
+        with self.lock, self.conn:
+            return self.conn.execute('DELETE FROM results WHERE rules_version != ?', (version,)).rowcount
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class IncrementalValidator:
+    """TranscriptValidator that only revalidates new or changed episodes.
+
+    Cached results are stored without the "Episode N:" prefix and prefixed
+    with the episode's current position when the report is assembled, so the
+    report is identical to a full validation even when episodes move.
+    Dataset-level checks are cheap and always run.
+    """
+
+    def __init__(self, cache: ValidationCache, validator: Optional[TranscriptValidator] = None):
+        self.cache = cache
+        self.validator = validator or TranscriptValidator()
+        self.version = rules_version()
+        self.stats = {'cached': 0, 'validated': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def validate_dataset(self, data: Dict) -> Tuple[bool, Dict[str, List[str]]]:
+        if not isinstance(data, dict) or 'metadata' not in data or 'episodes' not in data:
+            return self.validator.validate_dataset(data)
+
+        all_errors = []
+        all_warnings = []
+        if not self.validator._validate_global_metadata(data['metadata']):
+            all_errors.append('Invalid global metadata structure')
+
+        hashes = [episode_content_hash(episode) for episode in data['episodes']]
+        results = self.cache.get_many(hashes, self.version)
+        fresh = {}
+        cached = 0
+        for episode, content_hash in zip(data['episodes'], hashes):
+            if content_hash in results:
+                cached += 1
+                continue
+            errors, warnings = self.validator.check_episode(episode)
+            results[content_hash] = fresh[content_hash] = (list(errors), list(warnings))
+        self.stats['cached'] += cached
+        self.stats['validated'] += len(fresh)
+        if fresh:
+            self.cache.put_many(fresh, self.version)
+        # Results recorded under earlier rules can never be hit again
+        pruned = self.cache.prune(self.version)
+        if pruned:
+            self.logger.info("Validation cache: dropped %d results from older rules", pruned)
+
+        for i, content_hash in enumerate(hashes):
+            errors, warnings = results[content_hash]
+            all_errors.extend(f"Episode {i}: {error}" for error in errors)
+            all_warnings.extend(f"Episode {i}: {warning}" for warning in warnings)
+
+        self.logger.info("Validation: %d episodes from cache, %d validated",
+                         cached, len(hashes) - cached)
+        return not bool(all_errors), {'errors': all_errors, 'warnings': all_warnings}
@@ -0,0 +1,326 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def default_worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class WorkQueue(ABC):
+    """Interface for a shared queue of topic URLs with leased jobs.
+
+    A job handed out by :meth:`lease` belongs to that worker until the lease
+    expires. Workers extend it with :meth:`heartbeat` while they work and
+    finish with :meth:`complete`, which stores the job's result in the same
+    step, or :meth:`fail`. A job whose lease runs out
+    (its worker died) goes back to the queue. Jobs that keep failing are
+    moved to a dead-letter list after ``max_attempts``.
+
+    Jobs are plain dicts with at least ``id``, ``queue``, ``url``,
+    ``attempts`` and ``lease_token``. Backends other than
+    :class:`SqliteWorkQueue`, e.g. one talking to a network service,
+    implement the same methods.
+    """
+
+    @abstractmethod
+    def put(self, urls: Iterable[str], queue: str = 'default', requeue_done: bool = False) -> int:
+        """Add URLs not already queued; returns how many were added.
+
+        A URL whose job is already done stays done, so a later crawl of the
+        same queue skips it, unless ``requeue_done`` is set: its job then
+        goes back to pending with a fresh attempt count and its stored
+        result is dropped.
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = 300,
+              queue: Optional[str] = None) -> Optional[Dict]:
+        """Hand out the next available job, or None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, job: Dict, lease_seconds: float = 300) -> bool:
+        """Extend a lease; False means it was lost and the job may run elsewhere."""
+
+    @abstractmethod
+    def complete(self, job: Dict, result: Optional[Dict] = None) -> bool:
+        """Mark a job done and store its result atomically.
+
+        False means the lease was lost; nothing is stored then.
+        """
+
+    @abstractmethod
+    def fail(self, job: Dict, error: str) -> None:
+        """Return a job to the queue for a retry, or dead-letter it."""
+
+    @abstractmethod
+    def results(self, queue: Optional[str] = None) -> Iterator[Dict]:
+        """Stored results of completed jobs, in the order their URLs were queued."""
+
+    @abstractmethod
+    def is_drained(self, queue: Optional[str] = None) -> bool:
+        """Whether no job is pending or leased."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per queue and state."""
+
+    @abstractmethod
+    def dead_letters(self, queue: Optional[str] = None) -> List[Dict]:
+        """Jobs that used up their attempts."""
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteWorkQueue(WorkQueue):
+    """Work queue kept in a SQLite file.
+
+    Leasing runs in a ``BEGIN IMMEDIATE`` transaction, so concurrent workers
+    never receive the same job. Workers on one machine, or on machines
+    sharing the file over a filesystem with working locks, can share a queue.
+    Failed jobs are retried after ``retry_delay * attempts`` seconds.
+    """
+
+    def __init__(self, path: str = 'crawl_queue.sqlite', max_attempts: int = 3,
+                 retry_delay: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Used from heartbeat threads as well, so access is serialized through a lock
+        self.conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                queue TEXT NOT NULL,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                UNIQUE (queue, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, available_at);
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id INTEGER PRIMARY KEY,
+                queue TEXT NOT NULL,
+                url TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                failed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                job_id INTEGER PRIMARY KEY REFERENCES jobs(id),
+                queue TEXT NOT NULL,
+                url TEXT NOT NULL,
+                result TEXT NOT NULL,
+                completed_at REAL NOT NULL
+            );
+        """)
+
+    def put(self, urls: Iterable[str], queue: str = 'default', requeue_done: bool = False) -> int:
+        rows = [(queue, url) for url in urls]
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                added = 0
+                if requeue_done:
+                    self.conn.executemany(
+                        "DELETE FROM results WHERE job_id = "
+                        "(SELECT id FROM jobs WHERE queue = ? AND url = ? AND state = 'done')", rows
+                    )
+                    added += self.conn.executemany(
+                        "UPDATE jobs SET state = 'pending', attempts = 0, available_at = 0, "
+                        "lease_owner = NULL, lease_token = NULL, lease_expires = NULL, last_error = NULL "
+                        "WHERE queue = ? AND url = ? AND state = 'done'", rows
+                    ).rowcount
+                added += self.conn.executemany('INSERT OR IGNORE INTO jobs (queue, url) VALUES (?, ?)',
+                                               rows).rowcount
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            return added
+
+    def _dead_letter(self, job_id: int, error: Optional[str], now: float) -> None:
+        self.conn.execute(
+            'INSERT INTO dead_letters (queue, url, attempts, last_error, failed_at) '
+            'SELECT queue, url, attempts, COALESCE(?, last_error), ? FROM jobs WHERE id = ?',
+            (error, now, job_id)
+        )
+        self.conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def lease(self, worker_id: str, lease_seconds: float = 300,
+              queue: Optional[str] = None) -> Optional[Dict]:
+        now = time.time()
+        queue_clause, params = ('AND queue = ?', [queue]) if queue is not None else ('', [])
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Expired leases whose attempts are used up are dead-lettered, not reissued
+                expired = self.conn.execute(
+                    f"SELECT id FROM jobs WHERE state = 'leased' AND lease_expires < ? "
+                    f"AND attempts >= ? {queue_clause}",
+                    [now, self.max_attempts] + params
+                ).fetchall()
+                for (job_id,) in expired:
+                    self._dead_letter(job_id, 'lease expired', now)
+
+                row = self.conn.execute(
+                    f"SELECT id, queue, url, attempts FROM jobs WHERE "
+                    f"((state = 'pending' AND available_at <= ?) "
+                    f"OR (state = 'leased' AND lease_expires < ?)) {queue_clause} "
+                    f"ORDER BY id LIMIT 1",
+                    [now, now] + params
+                ).fetchone()
+                if row is None:
+                    self.conn.execute('COMMIT')
+                    return None
+
+                token = uuid.uuid4().hex
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                    "lease_token = ?, lease_expires = ? WHERE id = ?",
+                    (worker_id, token, now + lease_seconds, row[0])
+                )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        return {'id': row[0], 'queue': row[1], 'url': row[2], 'attempts': row[3] + 1,
+                'worker_id': worker_id, 'lease_token': token}
+
+    def heartbeat(self, job: Dict, lease_seconds: float = 300) -> bool:
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_token = ? AND state = 'leased'",
+                (time.time() + lease_seconds, job['id'], job['lease_token'])
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job: Dict, result: Optional[Dict] = None) -> bool:
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET state = 'done', lease_expires = NULL, last_error = NULL "
+                    "WHERE id = ? AND lease_token = ? AND state = 'leased'",
+                    (job['id'], job['lease_token'])
+                )
+                if cursor.rowcount != 1:
+                    self.conn.execute('ROLLBACK')
+                    return False
+                if result is not None:
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                        (job['id'], job['queue'], job['url'], json.dumps(result, ensure_ascii=False),
+                         time.time())
+                    )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            return True
+
+    def fail(self, job: Dict, error: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.conn.execute('SELECT attempts FROM jobs WHERE id = ? AND lease_token = ?',
+                                        (job['id'], job['lease_token'])).fetchone()
+                if row is not None:
+                    if row[0] >= self.max_attempts:
+                        self._dead_letter(job['id'], error, now)
+                    else:
+                        self.conn.execute(
+                            "UPDATE jobs SET state = 'pending', available_at = ?, lease_owner = NULL, "
+                            "lease_token = NULL, lease_expires = NULL, last_error = ? WHERE id = ?",
+                            (now + self.retry_delay * row[0], error, job['id'])
+                        )
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    def results(self, queue: Optional[str] = None) -> Iterator[Dict]:
+        query = 'SELECT result FROM results'
+        params = []
+        if queue is not None:
+            query += ' WHERE queue = ?'
+            params.append(queue)
+        with self.lock:
+            rows = self.conn.execute(query + ' ORDER BY job_id', params).fetchall()
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def is_drained(self, queue: Optional[str] = None) -> bool:
+        queue_clause, params = ('AND queue = ?', [queue]) if queue is not None else ('', [])
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT 1 FROM jobs WHERE state IN ('pending', 'leased') {queue_clause} LIMIT 1", params
+            ).fetchone()
+        return row is None
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per queue and state, with 'dead' for dead-lettered jobs."""
+        with self.lock:
+            rows = self.conn.execute('SELECT queue, state, COUNT(*) FROM jobs GROUP BY queue, state').fetchall()
+            rows += self.conn.execute("SELECT queue, 'dead', COUNT(*) FROM dead_letters GROUP BY queue").fetchall()
+        result: Dict[str, Dict[str, int]] = {}
+        for queue, state, count in rows:
+            result.setdefault(queue, {})[state] = count
+        return result
+
+    def dead_letters(self, queue: Optional[str] = None) -> List[Dict]:
+        query = 'SELECT queue, url, attempts, last_error, failed_at FROM dead_letters'
+        params = []
+        if queue is not None:
+            query += ' WHERE queue = ?'
+            params.append(queue)
+        with self.lock:
+            rows = self.conn.execute(query + ' ORDER BY id', params).fetchall()
+        return [dict(zip(('queue', 'url', 'attempts', 'last_error', 'failed_at'), row)) for row in rows]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+@contextmanager
+def keep_alive(queue: WorkQueue, job: Dict, lease_seconds: float = 300) -> Iterator[threading.Event]:
+    """Heartbeat a job's lease from a background thread while the block runs.
+
+    The yielded event is set if the lease was lost, in which case the result
+    should be discarded.
+    """
+    stop = threading.Event()
+    lost = threading.Event()
+
+    def beat():
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(job, lease_seconds):
+                lost.set()
+                return
+
+    thread = threading.Thread(target=beat, name=f"lease-{job['id']}", daemon=True)
+    thread.start()
+    try:
+        yield lost
+    finally:
+        stop.set()
+        thread.join()